@@ -1,23 +1,111 @@
 from llm import *
-from util.request import get_recent_arxiv_papers
+from util.request import (
+    ARXIV_REQUEST_INTERVAL,
+    ArxivHttpCache,
+    FetchStats,
+    fetch_recent_arxiv_papers_concurrently,
+    get_recent_arxiv_papers_combined,
+)
 from util.construct_email import *
 from tqdm import tqdm
+import asyncio
 import json
 import os
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import time
-import random
 import smtplib
 from email.header import Header
 from email.utils import parseaddr, formataddr
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import cached_property
 import threading
+import tracemalloc
 from loguru import logger
 from pathlib import Path
 
+from llm.endpoint_pool import is_request_error
+from util.batch_planner import TokenBudgetPlanner, estimate_tokens
+from util.json_stream import JsonArrayStream
+from util.keyword_filter import KeywordFilter
+from util.llm_cache import LlmResultCache, model_signature
+from util.oai import OaiWatermark, harvest_recent_arxiv_papers
+from util.paper_store import PaperStore, paper_haystack
 from util.seen_db import SeenDb, normalize_arxiv_id
 
 
+# 修改 scoring_system_prompt / _build_batch_prompt 的评分口径/输出格式时需要递增，使跨运行的 LLM 结果缓存失效
+SCORING_PROMPT_VERSION = "batch-v1"
+
+# 结构化输出（response_format=json_schema）使用的 schema。OpenAI 的 strict 模式要求顶层为对象、
+# 所有字段必填且不允许额外字段，因此数组包在 papers/ranking 字段里；取值范围仍由解析代码校验。
+_SCORES_SCHEMA = {
+    "type": "object",
+    "properties": {k: {"type": "integer"} for k in ("topic", "method", "novelty", "impact")},
+    "required": ["topic", "method", "novelty", "impact"],
+    "additionalProperties": False,
+}
+SCORING_SCHEMA = {
+    "name": "paper_scores",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "papers": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "arXiv_id": {"type": "string"},
+                        "summary": {"type": "string"},
+                        "scores": _SCORES_SCHEMA,
+                        "recommend_reason": {"type": "string"},
+                        "key_contribution": {"type": "string"},
+                    },
+                    "required": ["arXiv_id", "summary", "scores", "recommend_reason", "key_contribution"],
+                    "additionalProperties": False,
+                },
+            }
+        },
+        "required": ["papers"],
+        "additionalProperties": False,
+    },
+}
+RERANK_SCHEMA = {
+    "name": "paper_ranking",
+    "schema": {
+        "type": "object",
+        "properties": {
+            "ranking": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "arXiv_id": {"type": "string"},
+                        "score_100": {"type": "integer"},
+                        "reason": {"type": "string"},
+                    },
+                    "required": ["arXiv_id", "score_100", "reason"],
+                    "additionalProperties": False,
+                },
+            }
+        },
+        "required": ["ranking"],
+        "additionalProperties": False,
+    },
+}
+
+
+def _text_format_rate(stats_path: Path) -> float | None:
+    """从之前运行写出的 llm_stats.json 中取纯文本调用的格式重试率；没有纯文本调用或文件不可读时返回 None。"""
+    try:
+        data = json.loads(stats_path.read_text(encoding="utf-8"))
+        text = data.get("output_modes", {}).get("text") or {}
+        calls = int(text.get("calls", 0))
+        return int(text.get("format_retries", 0)) / calls if calls > 0 else None
+    except (OSError, ValueError, TypeError, AttributeError):
+        return None
+
+
 class ArxivDaily:
     def __init__(
         self,
@@ -44,6 +132,30 @@ class ArxivDaily:
         num_workers: int,
         temperature: float,
         save_dir: None,
+        fetch_workers: int = 4,
+        arxiv_request_interval: float = ARXIV_REQUEST_INTERVAL,
+        fetch_mode: str = "per_category",
+        page_size: int = 100,
+        http_cache_dir: str | None = None,
+        http_cache_ttl: float = 6 * 3600,
+        offline: bool = False,
+        oai_watermark_path: str | None = None,
+        keyword_expr: str | None = None,
+        paper_store_path: str | None = None,
+        seen_backend: str = "auto",
+        llm_concurrency: int = 0,
+        llm_weights: list[float] | None = None,
+        llm_max_inflight: list[int] | None = None,
+        llm_cache_path: str | None = None,
+        llm_cache_ttl_days: int = 90,
+        llm_cache_max_entries: int = 50000,
+        llm_input_token_budget: int = 12000,
+        llm_output_token_budget: int = 4000,
+        llm_output_tokens_per_paper: int = 300,
+        llm_stream: bool = False,
+        llm_structured_output: str = "off",
+        llm_format_baseline: str | None = None,
+        now_utc: datetime | None = None,
     ):
         self.model_name = model
         self.base_url = base_url
@@ -51,14 +163,38 @@ class ArxivDaily:
         self.max_paper_num = max_paper_num
         self.save_dir = save_dir
         self.num_workers = num_workers
+        # >0 时 LLM 阶段改用 asyncio（AsyncOpenAI），同时在途请求数上限为该值
+        self.llm_concurrency = max(0, int(llm_concurrency or 0))
+        # 多 endpoint 负载均衡的权重与单 endpoint 并发上限（单值或与 endpoint 等长的列表）
+        self.llm_weights = llm_weights
+        self.llm_max_inflight = llm_max_inflight
+        # 流式接收 LLM 输出，每篇论文的结果一闭合就校验入缓存；输出被截断时保留已完成的部分
+        self.llm_stream = bool(llm_stream)
+        # off：沿用纯文本解析；json_schema / json_object：按 endpoint 探测结构化输出，不支持时自动降级
+        if llm_structured_output not in ("off", "json_schema", "json_object"):
+            raise ValueError("llm_structured_output 只能是 off/json_schema/json_object")
+        self.llm_structured_output = llm_structured_output
+        # 纯文本模式的格式重试率基线（数值或之前运行的 llm_stats.json），用于估算结构化输出避免的重试
+        self.llm_format_baseline = llm_format_baseline
         self.temperature = temperature
-        self.run_datetime = datetime.now(timezone.utc)
+        # 回放录制的 arXiv 响应（离线压测）时固定运行时刻，lookback 窗口与输出目录保持不变
+        self.run_datetime = now_utc or datetime.now(timezone.utc)
+        if self.run_datetime.tzinfo is None:
+            self.run_datetime = self.run_datetime.replace(tzinfo=timezone.utc)
         self.run_date = self.run_datetime.strftime("%Y-%m-%d")
         self.lookback_hours = lookback_hours
         self.include_keywords = include_keywords
         self.exclude_keywords = exclude_keywords
         self.include_mode = include_mode
+        # 关键词/表达式只编译一次，所有抓取方式共用
+        self.keyword_filter = KeywordFilter.compile(
+            include_keywords, exclude_keywords, include_mode, expression=keyword_expr
+        )
         self.llm_batch_size = max(1, int(llm_batch_size))
+        # 批次按 token 预算打包（<=0 表示不限制该项），llm_batch_size 只作为每批篇数上限
+        self.llm_input_token_budget = int(llm_input_token_budget)
+        self.llm_output_token_budget = int(llm_output_token_budget)
+        self.llm_output_tokens_per_paper = max(1, int(llm_output_tokens_per_paper))
         self.score_weights = {
             "topic": float(weight_topic),
             "method": float(weight_method),
@@ -76,6 +212,7 @@ class ArxivDaily:
                 path=seen_path,
                 scope=seen_scope,
                 retention_days=int(seen_retention_days),
+                backend=seen_backend,
             )
             self.seen_db.prune(now_utc=self.run_datetime)
         base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -83,32 +220,279 @@ class ArxivDaily:
         if save_dir:
             self.cache_dir = os.path.join(base_dir, save_dir, self.run_date, "json")
             os.makedirs(self.cache_dir, exist_ok=True)
-        self.papers = {}
-        for category in categories:
-            self.papers[category] = get_recent_arxiv_papers(
-                category=category,
-                max_results=max_entries,
-                lookback_hours=self.lookback_hours,
-                now_utc=self.run_datetime,
-                include_keywords=self.include_keywords,
-                exclude_keywords=self.exclude_keywords,
-                include_mode=self.include_mode,
+        self.llm_cache: LlmResultCache | None = None
+        if llm_cache_path:
+            llm_cache_file = Path(llm_cache_path)
+            if not llm_cache_file.is_absolute():
+                llm_cache_file = Path(base_dir) / llm_cache_file
+            self.llm_cache = LlmResultCache(
+                path=llm_cache_file,
+                description=description,
+                model_signature=model_signature(model),
+                prompt_version=SCORING_PROMPT_VERSION,
+                ttl_days=int(llm_cache_ttl_days),
+                max_entries=int(llm_cache_max_entries),
             )
-            print(
-                "{} papers on arXiv for {} are fetched.".format(
-                    len(self.papers[category]), category
-                )
+            self.llm_cache.evict(self.run_datetime)
+        self.http_cache: ArxivHttpCache | None = None
+        if http_cache_dir or offline:
+            cache_path = Path(http_cache_dir or "state/http_cache")
+            if not cache_path.is_absolute():
+                cache_path = Path(base_dir) / cache_path
+            self.http_cache = ArxivHttpCache(
+                cache_dir=cache_path,
+                ttl_seconds=float(http_cache_ttl),
+                offline=bool(offline),
             )
-            # avoid being blocked
-            sleep_time = random.randint(5, 15)
-            time.sleep(sleep_time)
+        self.paper_store: PaperStore | None = None
+        if paper_store_path:
+            store_path = Path(paper_store_path)
+            if not store_path.is_absolute():
+                store_path = Path(base_dir) / store_path
+            self.paper_store = PaperStore(path=store_path)
+        # 各阶段的墙钟耗时（秒）；tracemalloc 开启时另记各阶段的 Python 内存峰值（字节）
+        self.stage_times: dict[str, float] = {}
+        self.stage_peak_memory: dict[str, int] = {}
+        fetch_mode = (fetch_mode or "").strip().lower()
+        self.fetch_stats = FetchStats()
+        self.oai_watermark: OaiWatermark | None = None
+        self._pending_oai_marks: dict[str, str] = {}
+        with self._stage("fetch"):
+            if fetch_mode == "per_category":
+                self.papers = fetch_recent_arxiv_papers_concurrently(
+                    categories,
+                    max_results=max_entries,
+                    lookback_hours=self.lookback_hours,
+                    now_utc=self.run_datetime,
+                    include_keywords=self.include_keywords,
+                    exclude_keywords=self.exclude_keywords,
+                    include_mode=self.include_mode,
+                    keyword_filter=self.keyword_filter,
+                    page_size=page_size,
+                    max_workers=fetch_workers,
+                    # 所有分类共享一个令牌桶，满足 arXiv 的请求间隔要求（避免被封）
+                    request_interval=arxiv_request_interval,
+                    stats=self.fetch_stats,
+                    cache=self.http_cache,
+                    store=self.paper_store,
+                )
+            elif fetch_mode == "combined":
+                # 单个 OR 查询：跨分类论文只下载/解析一次；条目上限按“每分类 max_entries”折算
+                self.papers = get_recent_arxiv_papers_combined(
+                    categories,
+                    max_results=max_entries * max(1, len(categories)),
+                    lookback_hours=self.lookback_hours,
+                    now_utc=self.run_datetime,
+                    include_keywords=self.include_keywords,
+                    exclude_keywords=self.exclude_keywords,
+                    include_mode=self.include_mode,
+                    keyword_filter=self.keyword_filter,
+                    page_size=page_size,
+                    request_interval=arxiv_request_interval,
+                    stats=self.fetch_stats,
+                    cache=self.http_cache,
+                    store=self.paper_store,
+                )
+            elif fetch_mode == "oai":
+                # OAI-PMH 增量收割：from= 为上次成功运行的水位；新水位在邮件发送成功后才写盘
+                watermark_path = Path(oai_watermark_path or "state/oai_watermark.json")
+                if not watermark_path.is_absolute():
+                    watermark_path = Path(base_dir) / watermark_path
+                self.oai_watermark = OaiWatermark(path=watermark_path)
+                self.papers, self._pending_oai_marks = harvest_recent_arxiv_papers(
+                    categories,
+                    self.oai_watermark,
+                    lookback_hours=self.lookback_hours,
+                    now_utc=self.run_datetime,
+                    include_keywords=self.include_keywords,
+                    exclude_keywords=self.exclude_keywords,
+                    include_mode=self.include_mode,
+                    keyword_filter=self.keyword_filter,
+                    request_interval=arxiv_request_interval,
+                    stats=self.fetch_stats,
+                    store=self.paper_store,
+                )
+            elif fetch_mode == "store":
+                # 直接从本地论文库读取时间窗口，不访问 arXiv（用于重跑/离线实验）
+                if self.paper_store is None:
+                    raise ValueError("fetch_mode=store 需要同时指定 paper_store_path")
+                window = self.paper_store.load_window(
+                    self.run_datetime - timedelta(hours=self.lookback_hours),
+                    self.run_datetime,
+                    categories,
+                )
+                self.papers = {
+                    category: [p for p in papers if self.keyword_filter(paper_haystack(p))]
+                    for category, papers in window.items()
+                }
+            else:
+                raise ValueError("fetch_mode 仅支持 'per_category'、'combined'、'oai' 或 'store'")
+        for category, papers in self.papers.items():
+            print("{} papers on arXiv for {} are fetched.".format(len(papers), category))
+        print(
+            f"arXiv fetch used {self.fetch_stats.pages} pages, "
+            f"{self.fetch_stats.entries} entries, {self.fetch_stats.bytes / 1024:.1f} KiB "
+            f"({self.fetch_stats.cache_hits} pages from cache)."
+        )
 
-        self.model = GPT(model, base_url, api_key)
+        self.model = GPT(
+            model,
+            base_url,
+            api_key,
+            weights=llm_weights,
+            max_inflight=llm_max_inflight,
+            output_mode=self._initial_output_mode(),
+        )
         print(f"Model initialized successfully. Using {model}.")
 
         self.description = description
         self.lock = threading.Lock()  # 添加线程锁
         self._last_scored_ids: list[str] = []
+        self._carried_seen_keys: list[str] = []
+        # 切换到 content 粒度前按 base 记录、本次已改用 content key 记录的旧 key（保存时删除）
+        self._migrated_seen_keys: list[str] = []
+        # content 粒度下沿用更早版本结果的新版本：(paper, LLM 原始结果)，邮件发送成功后写入 llm_cache
+        self._carried_results: list[tuple[dict, dict]] = []
+        # 本次运行中最终评分失败的论文：arXiv_id -> 原因（这些论文不会写入 seen_db，下次运行会重试）
+        self.failed_papers: dict[str, str] = {}
+        self._progress: tqdm | None = None
+        # 按实际输出模式统计的评分/重排调用数与其中因输出格式不合格而需要重试的次数
+        self.output_stats: dict[str, dict[str, int]] = {}
+        # 按调用类型（scoring / rerank）记录的成功调用，按完成先后排列，用于确认前缀缓存的效果
+        self.completions: dict[str, list[Completion]] = {}
+
+    @contextmanager
+    def _stage(self, name: str):
+        """计时一个流水线阶段（同名阶段累加）；tracemalloc 开启时记录该阶段内的内存峰值。"""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_times[name] = self.stage_times.get(name, 0.0) + time.perf_counter() - started
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1]
+                self.stage_peak_memory[name] = max(self.stage_peak_memory.get(name, 0), peak)
+
+    def stage_summary(self) -> str:
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.stage_times.items())
+
+    def _initial_output_mode(self) -> str:
+        return "text" if self.llm_structured_output == "off" else self.llm_structured_output
+
+    def _schema(self, schema: dict) -> dict | None:
+        return None if self.llm_structured_output == "off" else schema
+
+    def _record_output(self, mode: str, format_failed: bool) -> None:
+        with self.lock:
+            stats = self.output_stats.setdefault(mode, {"calls": 0, "format_retries": 0})
+            stats["calls"] += 1
+            stats["format_retries"] += int(format_failed)
+
+    def _record_completion(self, kind: str, reply: Completion) -> None:
+        with self.lock:
+            self.completions.setdefault(kind, []).append(reply)
+
+    def prompt_cache_summary(self) -> str:
+        """首次调用与其后调用的对比：命中服务端前缀缓存的输入 token 占比与平均耗时。"""
+        with self.lock:
+            groups = {k: list(v) for k, v in self.completions.items() if v}
+        parts = []
+        for kind, replies in sorted(groups.items()):
+            first, rest = replies[0], replies[1:]
+            text = (
+                f"{kind}: first call {first.cached_tokens}/{first.prompt_tokens} cached prompt tokens, "
+                f"{first.latency:.2f}s"
+            )
+            if rest:
+                prompt = sum(r.prompt_tokens for r in rest)
+                cached = sum(r.cached_tokens for r in rest)
+                share = f"{cached / prompt:.0%}" if prompt else "n/a"
+                text += (
+                    f"; later {len(rest)} calls {cached}/{prompt} cached ({share}), "
+                    f"avg {sum(r.latency for r in rest) / len(rest):.2f}s"
+                )
+            parts.append(text)
+        return " | ".join(parts)
+
+    def _format_failure_baseline(self, stats: dict[str, dict[str, int]]) -> tuple[float, str] | None:
+        """
+        纯文本模式下每次调用的格式重试率及其来源。依次取：llm_format_baseline（数值，或之前某次运行的 llm_stats.json）、
+        save_dir 历史中最近一份含纯文本调用记录的 llm_stats.json（不含当天），最后才用本次降级为纯文本的调用。
+        """
+        configured = self.llm_format_baseline
+        if configured:
+            try:
+                return float(configured), "llm_format_baseline"
+            except ValueError:
+                rate = _text_format_rate(Path(configured))
+                if rate is not None:
+                    return rate, configured
+                print(f"llm_format_baseline {configured} 中没有纯文本调用的统计，忽略。")
+        if self.save_dir:
+            for path in sorted(Path(self.save_dir).glob("*/llm_stats.json"), reverse=True):
+                if path.parent.name >= self.run_date:
+                    continue
+                rate = _text_format_rate(path)
+                if rate is not None:
+                    return rate, str(path)
+        text = stats.get("text")
+        if text and text["calls"]:
+            return text["format_retries"] / text["calls"], "free-text calls this run"
+        return None
+
+    def output_stats_summary(self) -> str:
+        """
+        各输出模式的调用数/格式重试数，以及“避免的重试数”估算：
+        按纯文本模式的格式重试率基线（见 _format_failure_baseline），推算结构化调用在纯文本模式下本会产生的重试数，再减去实际发生的。
+        """
+        with self.lock:
+            stats = {k: dict(v) for k, v in self.output_stats.items()}
+        text = " ".join(f"{m}={v['calls']} calls/{v['format_retries']} format retries" for m, v in sorted(stats.items()))
+        structured = [v for m, v in stats.items() if m != "text"]
+        if not structured:
+            return text
+        calls = sum(v["calls"] for v in structured)
+        retries = sum(v["format_retries"] for v in structured)
+        baseline = self._format_failure_baseline(stats)
+        if baseline is None:
+            return f"{text} (no free-text baseline to estimate avoided retries, see --llm_format_baseline)"
+        rate, source = baseline
+        avoided = calls * rate - retries
+        return (
+            f"{text}, ~{max(avoided, 0.0):.1f} retries avoided by structured output "
+            f"(baseline {rate:.3f} format retries/call from {source})"
+        )
+
+    @staticmethod
+    def _unwrap_array(data, key: str):
+        """
+        结构化输出的顶层是对象：{key: [...]} 取出其中的数组（没有 key 字段时取唯一的数组字段）；
+        带 arXiv_id 的对象（只有一篇论文时模型常直接输出该对象）视为单元素数组；其余情况原样返回。
+        """
+        if isinstance(data, dict):
+            if "arXiv_id" in data:
+                return [data]
+            if isinstance(data.get(key), list):
+                return data[key]
+            arrays = [v for v in data.values() if isinstance(v, list)]
+            if len(arrays) == 1:
+                return arrays[0]
+        return data
+
+    def _output_instruction(self, key: str) -> str:
+        """
+        user 消息末尾的输出格式要求。结构化输出模式下顶层必须是对象，明确要求包一层 {key: [...]}
+        （放在 user 消息里，system 前缀保持不变）；降级为纯文本的 endpoint 照此输出也能被解析。
+        """
+        if self.llm_structured_output == "off":
+            return "请直接输出 JSON 数组。"
+        return (
+            f'请直接输出一个 JSON 对象 {{"{key}": [...]}}，{key} 字段即上述要求的 JSON 数组'
+            "（只有一篇论文时也放在数组中）。"
+        )
 
     def _clean_model_response(self, raw_text: str) -> str:
         cleaned = (raw_text or "").strip()
@@ -152,23 +536,48 @@ class ArxivDaily:
             return "一般相关"
         return "不太相关"
 
-    def _build_batch_prompt(self, papers: list[dict]) -> str:
+    @staticmethod
+    def _prompt_item(paper: dict) -> dict:
+        return {
+            "arXiv_id": paper.get("arXiv_id"),
+            "title": paper.get("title"),
+            "abstract": paper.get("abstract"),
+        }
+
+    def _plan_batches(self, papers: list[dict]) -> list[list[dict]]:
+        """按 token 预算打包批次；llm_batch_size 为每批篇数上限。"""
+        planner = TokenBudgetPlanner(
+            overhead_tokens=(
+                estimate_tokens(self.scoring_system_prompt) + estimate_tokens(self._build_batch_prompt([]))
+            ),
+            input_budget=self.llm_input_token_budget,
+            output_budget=self.llm_output_token_budget,
+            output_tokens_per_paper=self.llm_output_tokens_per_paper,
+            max_batch_size=self.llm_batch_size,
+        )
+        # 每篇论文在 prompt 中是一个缩进的 JSON 对象，外加分隔符
+        paper_tokens = [
+            estimate_tokens(json.dumps(self._prompt_item(p), ensure_ascii=False, indent=2)) + 2 for p in papers
+        ]
+        batches = planner.plan(papers, paper_tokens)
+        if batches:
+            print(
+                f"Planned {len(batches)} LLM batches for {len(papers)} papers "
+                f"(avg {len(papers) / len(batches):.1f} papers/batch, prompt overhead ~{planner.overhead_tokens} tokens)."
+            )
+        return batches
+
+    @cached_property
+    def scoring_system_prompt(self) -> str:
+        """
+        评分调用的 system 消息：研究兴趣描述与全部指令，一次运行内逐字节不变（只依赖 description 与权重），
+        每批只在 user 消息里追加论文，服务端的前缀缓存（prompt caching）因此可以跨批次复用这一段。
+        """
         weights = self.score_weights
         weights_text = (
             f"topic={weights['topic']}, method={weights['method']}, "
             f"novelty={weights['novelty']}, impact={weights['impact']}"
         )
-        items = []
-        for p in papers:
-            items.append(
-                {
-                    "arXiv_id": p.get("arXiv_id"),
-                    "title": p.get("title"),
-                    "abstract": p.get("abstract"),
-                }
-            )
-        payload = json.dumps(items, ensure_ascii=False, indent=2)
-
         return f"""
 你是一名严谨的学术研究助手。请只基于我提供的“研究兴趣描述”和每篇论文的“标题/摘要”进行判断，不要臆测论文未提供的实验细节或结论。
 
@@ -199,13 +608,14 @@ class ArxivDaily:
     "recommend_reason": "...",
     "key_contribution": "..."
   }}
-
-输入论文 JSON 数组如下：
-{payload}
-
-请直接输出 JSON 数组。
 """.strip()
 
+    def _build_batch_prompt(self, papers: list[dict]) -> str:
+        """评分调用的 user 消息：只包含本批论文（固定部分见 scoring_system_prompt）。"""
+        items = [self._prompt_item(p) for p in papers]
+        payload = json.dumps(items, ensure_ascii=False, indent=2)
+        return f"输入论文 JSON 数组如下：\n{payload}\n\n{self._output_instruction('papers')}"
+
     def _load_cache(self, paper: dict) -> dict | None:
         if not self.cache_dir:
             return None
@@ -230,81 +640,262 @@ class ArxivDaily:
         except OSError as write_error:
             print(f"写入缓存 {cache_path} 时失败: {write_error}")
 
+    @staticmethod
+    def _parse_item(item) -> dict:
+        """校验单篇论文的 LLM 输出并规整为原始结果；不合格时抛出 ValueError。"""
+        if not isinstance(item, dict):
+            raise ValueError("数组元素不是对象")
+        scores = item.get("scores", {})
+        if not isinstance(scores, dict):
+            raise ValueError("scores 字段不是对象")
+        parsed_scores = {
+            "topic": int(scores.get("topic", 0)),
+            "method": int(scores.get("method", 0)),
+            "novelty": int(scores.get("novelty", 0)),
+            "impact": int(scores.get("impact", 0)),
+        }
+        for k, v in parsed_scores.items():
+            if v < 0 or v > 10:
+                raise ValueError(f"{k} 评分超出范围")
+        return {
+            "summary": str(item.get("summary", "")).strip(),
+            "scores": parsed_scores,
+            "recommend_reason": str(item.get("recommend_reason", "")).strip(),
+            "key_contribution": str(item.get("key_contribution", "")).strip(),
+        }
+
+    def _parse_batch_response(self, papers: list[dict], raw: str) -> tuple[list[dict], dict[str, str]]:
+        """
+        逐篇校验一批论文的 LLM 输出：合格的计算加权分并写缓存，不合格/缺失的记录原因。
+        返回 (results, {arXiv_id: 失败原因})；整段输出无法解析时所有论文都记为失败。
+        """
+        wanted = {p["arXiv_id"] for p in papers}
+        try:
+            data = self._unwrap_array(json.loads(self._clean_model_response(raw)), "papers")
+        except (TypeError, ValueError) as e:
+            return [], {aid: f"输出不是合法 JSON（{e}）" for aid in wanted}
+        if not isinstance(data, list):
+            return [], {aid: "输出不是 JSON 数组" for aid in wanted}
+
+        raw_by_id: dict[str, dict] = {}
+        errors: dict[str, str] = {}
+        for item in data:
+            arxiv_id = item.get("arXiv_id") if isinstance(item, dict) else None
+            if not isinstance(arxiv_id, str) or arxiv_id not in wanted:
+                continue
+            try:
+                raw_by_id[arxiv_id] = self._parse_item(item)
+                errors.pop(arxiv_id, None)
+            except (TypeError, ValueError) as e:
+                if arxiv_id not in raw_by_id:
+                    errors[arxiv_id] = str(e)
+
+        for paper in papers:
+            if paper["arXiv_id"] not in raw_by_id:
+                errors.setdefault(paper["arXiv_id"], "输出中缺少该论文")
+        results = self._accept_results([(p, raw_by_id[p["arXiv_id"]]) for p in papers if p["arXiv_id"] in raw_by_id])
+        return results, errors
+
+    def _accept_results(self, pairs: list[tuple[dict, dict]]) -> list[dict]:
+        """(paper, LLM 原始结果) -> 最终结果：写入按日缓存与持久化缓存，并推进进度条。"""
+        results = [self._build_result(paper, r) for paper, r in pairs]
+        for result in results:
+            self._write_cache(result)
+        if self.llm_cache and pairs:
+            self.llm_cache.put_many(pairs)
+        self._advance_progress(len(results))
+        return results
+
+    def _advance_progress(self, n: int) -> None:
+        if self._progress is not None and n:
+            with self.lock:
+                self._progress.update(n)
+
+    def _stream_consumer(self, papers: list[dict]):
+        """
+        流式评分：返回 (on_delta, finish)。on_delta 把增量文本喂给 JsonArrayStream，每个对象一闭合就校验、
+        写缓存并计入进度；格式错误时返回 False 让客户端提前断开。finish(reason) 返回 (results, {arXiv_id: 失败原因})。
+        """
+        by_id = {p["arXiv_id"]: p for p in papers}
+        parser = JsonArrayStream(key="papers")
+        results: list[dict] = []
+        errors: dict[str, str] = {}
+        done: set[str] = set()
+        state = {"abort": None}
+
+        def on_delta(text: str) -> bool:
+            try:
+                items = parser.feed(text)
+            except ValueError as e:
+                state["abort"] = f"流式输出格式错误（{e}）"
+                return False
+            for item in items:
+                arxiv_id = item.get("arXiv_id") if isinstance(item, dict) else None
+                if not isinstance(arxiv_id, str) or arxiv_id not in by_id or arxiv_id in done:
+                    continue
+                try:
+                    raw = self._parse_item(item)
+                except (TypeError, ValueError) as e:
+                    errors[arxiv_id] = str(e)
+                    continue
+                done.add(arxiv_id)
+                errors.pop(arxiv_id, None)
+                results.extend(self._accept_results([(by_id[arxiv_id], raw)]))
+            return True
+
+        def finish(reason: str | None = None) -> tuple[list[dict], dict[str, str]]:
+            if reason is None:
+                reason = state["abort"] or ("输出中缺少该论文" if parser.done else "流式输出被截断")
+            for arxiv_id in by_id:
+                if arxiv_id not in done:
+                    errors.setdefault(arxiv_id, reason)
+            return results, errors
+
+        return on_delta, finish
+
+    def _build_result(self, paper: dict, r: dict) -> dict:
+        """由论文元数据与 LLM 原始输出组装结果；加权总分按当前权重计算（缓存命中时也重新计算）。"""
+        score = self._compute_weighted_score(r["scores"])
+        return {
+            "title": paper.get("title", ""),
+            "arXiv_id": paper["arXiv_id"],
+            "abstract": paper.get("abstract", ""),
+            "summary": r["summary"],
+            "relevance_score": score,
+            "relevance_label": self._label_from_score(score),
+            "recommend_reason": r["recommend_reason"] or "未提供推荐理由",
+            "key_contribution": r["key_contribution"] or "未提供关键贡献",
+            "pdf_url": paper.get("pdf_url", ""),
+            "scores": r["scores"],
+        }
+
+    def _record_failures(self, papers: list[dict], reason: str | dict[str, str]) -> None:
+        with self.lock:
+            for p in papers:
+                aid = p["arXiv_id"]
+                self.failed_papers[aid] = reason if isinstance(reason, str) else reason.get(aid, "未知错误")
+        self._advance_progress(len(papers))
+
+    def _requeue(self, batch: list[dict], failures: int, errors: dict[str, str], queue: list, max_retries: int) -> None:
+        """
+        只把未通过校验的论文重新排队：第一次失败原样重试，再次失败时对半拆分（直到单篇），
+        单篇论文最多尝试 max_retries 次，之后按论文记录失败原因。
+        """
+        remaining = [p for p in batch if p["arXiv_id"] in errors]
+        if not remaining:
+            return
+        if len(remaining) == 1:
+            if failures + 1 >= max_retries:
+                self._record_failures(remaining, errors)
+                return
+            queue.append((remaining, failures + 1))
+        elif failures == 0:
+            queue.append((remaining, 1))
+        else:
+            mid = len(remaining) // 2
+            queue.append((remaining[mid:], 0))
+            queue.append((remaining[:mid], 0))
+        print(
+            f"{len(remaining)}/{len(batch)} 篇论文的 LLM 调用或输出校验失败，重新排队："
+            + "; ".join(f"{p['arXiv_id']}: {errors[p['arXiv_id']]}" for p in remaining[:3])
+            + (" ..." if len(remaining) > 3 else "")
+        )
+
+    def _scoring_request(self, batch: list[dict]):
+        """一批论文的评分请求：返回 (complete 的关键字参数, 流式模式下的 finish 或 None)。"""
+        request = {
+            "prompt": self._build_batch_prompt(batch),
+            "temperature": self.temperature,
+            "json_schema": self._schema(SCORING_SCHEMA),
+            "system": self.scoring_system_prompt,
+        }
+        finish = None
+        if self.llm_stream:
+            request["on_delta"], finish = self._stream_consumer(batch)
+        return request, finish
+
+    def _handle_scoring_reply(
+        self, batch: list[dict], failures: int, finish, reply, error: Exception | None, queue: list, max_retries: int
+    ) -> list[dict]:
+        """
+        处理一次评分调用的结果（reply 与 error 二选一）：校验输出、记录遥测，未通过校验的论文交给 _requeue；
+        请求被拒（is_request_error）时整批交给 _requeue，只有拆到单篇仍失败才按论文记录失败。
+        同步与 asyncio 两条路径共用，调用方只负责发出请求。
+        """
+        if error is not None:
+            ok, errors = finish(f"流式输出中断（{error}）") if finish else ([], {})
+            if not ok and is_request_error(error):
+                # 请求本身被拒（如 400/413 上下文超长）：整批重新排队，由 _requeue 二分拆批直到单篇
+                errors = {p["arXiv_id"]: f"LLM 调用失败（{error}）" for p in batch}
+            elif not ok:
+                # 其余错误 GPT 内部已经在所有 endpoint 上退避重试过，这里不再叠加一层重试
+                print(f"批处理 LLM 调用失败: {error}")
+                self._record_failures(batch, f"LLM 调用失败（{error}）")
+                return []
+        elif finish is not None:
+            ok, errors = finish()
+        else:
+            ok, errors = self._parse_batch_response(batch, reply.text)
+        if reply is not None:
+            # 断流不算输出格式问题；其余情况下只要有论文未通过校验就计为一次格式重试
+            self._record_completion("scoring", reply)
+            self._record_output(reply.output_mode, bool(errors))
+        self._requeue(batch, failures, errors, queue, max_retries)
+        return ok
+
     def process_paper_batch(self, papers: list[dict], max_retries: int = 3) -> list[dict]:
-        for attempt in range(1, max_retries + 1):
+        """评分一批论文；保留合格结果，只重试失败的论文（必要时二分拆批），最终失败的论文记入 failed_papers。"""
+        results: list[dict] = []
+        queue: list[tuple[list[dict], int]] = [(papers, 0)]
+        while queue:
+            batch, failures = queue.pop()
+            request, finish = self._scoring_request(batch)
+            reply, error = None, None
             try:
-                prompt = self._build_batch_prompt(papers)
-                raw = self.model.inference(prompt, temperature=self.temperature)
-                cleaned = self._clean_model_response(raw)
-                data = json.loads(cleaned)
-                if not isinstance(data, list) or len(data) != len(papers):
-                    raise ValueError("LLM 输出不是等长 JSON 数组")
+                reply = self.model.complete(**request)
+            except Exception as e:
+                error = e
+            results.extend(self._handle_scoring_reply(batch, failures, finish, reply, error, queue, max_retries))
+        return results
 
-                results_by_id: dict[str, dict] = {}
-                for item in data:
-                    if not isinstance(item, dict):
-                        raise ValueError("LLM 输出数组元素不是对象")
-                    arxiv_id = item.get("arXiv_id")
-                    if not arxiv_id or not isinstance(arxiv_id, str):
-                        raise ValueError("LLM 输出缺少 arXiv_id")
-                    scores = item.get("scores", {})
-                    if not isinstance(scores, dict):
-                        raise ValueError("scores 字段不是对象")
-                    parsed_scores = {
-                        "topic": int(scores.get("topic", 0)),
-                        "method": int(scores.get("method", 0)),
-                        "novelty": int(scores.get("novelty", 0)),
-                        "impact": int(scores.get("impact", 0)),
-                    }
-                    for k, v in parsed_scores.items():
-                        if v < 0 or v > 10:
-                            raise ValueError(f"{k} 评分超出范围")
-                    results_by_id[arxiv_id] = {
-                        "summary": str(item.get("summary", "")).strip(),
-                        "scores": parsed_scores,
-                        "recommend_reason": str(item.get("recommend_reason", "")).strip(),
-                        "key_contribution": str(item.get("key_contribution", "")).strip(),
-                    }
-
-                results: list[dict] = []
-                for paper in papers:
-                    arxiv_id = paper["arXiv_id"]
-                    if arxiv_id not in results_by_id:
-                        raise ValueError(f"LLM 输出缺少论文 {arxiv_id}")
-                    r = results_by_id[arxiv_id]
-                    score = self._compute_weighted_score(r["scores"])
-                    result = {
-                        "title": paper.get("title", ""),
-                        "arXiv_id": arxiv_id,
-                        "abstract": paper.get("abstract", ""),
-                        "summary": r["summary"],
-                        "relevance_score": score,
-                        "relevance_label": self._label_from_score(score),
-                        "recommend_reason": r["recommend_reason"] or "未提供推荐理由",
-                        "key_contribution": r["key_contribution"] or "未提供关键贡献",
-                        "pdf_url": paper.get("pdf_url", ""),
-                        "scores": r["scores"],
-                    }
-                    self._write_cache(result)
-                    results.append(result)
-                return results
+    async def process_paper_batch_async(self, llm: AsyncGPT, papers: list[dict], max_retries: int = 3) -> list[dict]:
+        """process_paper_batch 的 asyncio 版本：等待 LLM 时不占用线程。"""
+        results: list[dict] = []
+        queue: list[tuple[list[dict], int]] = [(papers, 0)]
+        while queue:
+            batch, failures = queue.pop()
+            request, finish = self._scoring_request(batch)
+            reply, error = None, None
+            try:
+                reply = await llm.complete(**request)
             except Exception as e:
-                print(f"批处理 LLM 推理第 {attempt} 次失败: {e}")
-                if attempt == max_retries:
-                    return []
-                time.sleep(1)
+                error = e
+            results.extend(self._handle_scoring_reply(batch, failures, finish, reply, error, queue, max_retries))
+        return results
 
-    def _build_rerank_prompt(self, papers: list[dict]) -> str:
-        items = []
-        for p in papers:
-            items.append(
-                {
-                    "arXiv_id": p.get("arXiv_id"),
-                    "title": p.get("title"),
-                    "abstract": p.get("abstract"),
-                }
-            )
-        payload = json.dumps(items, ensure_ascii=False, indent=2)
+    async def _process_batches_async(self, batches: list[list[dict]]) -> list[dict]:
+        results: list[dict] = []
+        async with AsyncGPT(
+            self.model_name,
+            self.base_url,
+            self.api_key,
+            max_concurrency=self.llm_concurrency,
+            weights=self.llm_weights,
+            max_inflight=self.llm_max_inflight,
+            output_mode=self._initial_output_mode(),
+            telemetry=self.model.telemetry,
+        ) as llm:
+            tasks = [asyncio.create_task(self.process_paper_batch_async(llm, batch)) for batch in batches]
+            for task in asyncio.as_completed(tasks):
+                batch_results = await task
+                if batch_results:
+                    results.extend(batch_results)
+            print(f"LLM endpoints: {llm.pool.summary()}")
+        return results
+
+    @cached_property
+    def rerank_system_prompt(self) -> str:
+        """Top-M 重排调用的 system 消息，与 scoring_system_prompt 一样在一次运行内保持不变。"""
         return f"""
 你是一名严谨的学术研究助手。请只基于我提供的“研究兴趣描述”和每篇论文的“标题/摘要”进行判断，不要臆测论文未提供的实验细节或结论。
 
@@ -324,22 +915,38 @@ class ArxivDaily:
   }}
 - score_100 为 0-100 的整数，越高越优先；请尽量避免大量相同分数（必要时可使用相邻分数）。
 - reason 用中文一句话说明排序原因（<=40 字）。
-
-输入论文 JSON 数组如下：
-{payload}
-
-请直接输出 JSON 数组。
 """.strip()
 
+    def _build_rerank_prompt(self, papers: list[dict]) -> str:
+        items = []
+        for p in papers:
+            items.append(
+                {
+                    "arXiv_id": p.get("arXiv_id"),
+                    "title": p.get("title"),
+                    "abstract": p.get("abstract"),
+                }
+            )
+        payload = json.dumps(items, ensure_ascii=False, indent=2)
+        return f"输入论文 JSON 数组如下：\n{payload}\n\n{self._output_instruction('ranking')}"
+
     def rerank_top_papers(self, papers: list[dict], max_retries: int = 2) -> list[dict]:
         if len(papers) <= 1:
             return papers
         for attempt in range(1, max_retries + 1):
             try:
                 prompt = self._build_rerank_prompt(papers)
-                raw = self.model.inference(prompt, temperature=self.temperature)
+                mode = None
+                reply = self.model.complete(
+                    prompt,
+                    temperature=self.temperature,
+                    json_schema=self._schema(RERANK_SCHEMA),
+                    system=self.rerank_system_prompt,
+                )
+                self._record_completion("rerank", reply)
+                raw, mode = reply.text, reply.output_mode
                 cleaned = self._clean_model_response(raw)
-                data = json.loads(cleaned)
+                data = self._unwrap_array(json.loads(cleaned), "ranking")
                 if not isinstance(data, list) or len(data) != len(papers):
                     raise ValueError("重排输出不是等长 JSON 数组")
 
@@ -387,116 +994,193 @@ class ArxivDaily:
                     # 统一使用 0-10 的 relevance_score 继续后续排序/展示
                     p["relevance_score"] = float(r["score_100"]) / 10.0
                     out.append(p)
+                self._record_output(mode, False)
                 return out
             except Exception as e:
+                if mode is not None:
+                    # 调用成功但输出不合格：计为一次格式重试
+                    self._record_output(mode, True)
                 print(f"Top-M 重排第 {attempt} 次失败: {e}")
                 if attempt == max_retries:
                     return papers
                 time.sleep(1)
 
+    def _report_llm_telemetry(self) -> None:
+        """打印本次运行的 LLM 调用汇总；指定 save_dir 时把按 endpoint 的统计与逐次调用记录写到当天的历史目录。"""
+        telemetry = self.model.telemetry
+        if not telemetry.events:
+            return
+        summary = telemetry.summary()
+        t = summary["totals"]
+        print(
+            f"LLM telemetry: {t['attempts']} attempts ({t['errors']} errors, {t['retries']} retries), "
+            f"latency p50 {t['latency_p50']}s / p95 {t['latency_p95']}s, "
+            f"tokens in {t['prompt_tokens']} (cached {t['cached_tokens']}) / out {t['completion_tokens']}, "
+            f"{t['failed_seconds'] + t['backoff_seconds']:.1f}s spent on failed attempts and backoff."
+        )
+        if self.save_dir:
+            out_dir = os.path.join(self.save_dir, self.run_date)
+            telemetry.write(
+                os.path.join(out_dir, "llm_stats.json"),
+                events_path=os.path.join(out_dir, "llm_calls.jsonl"),
+                # 各输出模式的调用数/格式重试数：之后开启结构化输出的运行以其中的纯文本数据为基线
+                extra={"output_modes": self.output_stats},
+            )
+
     def get_recommendation(self):
-        recommendations: dict[str, dict] = {}
-        for category, papers in self.papers.items():
-            for paper in papers:
-                recommendations[paper["arXiv_id"]] = paper
+        with self._stage("filter"):
+            recommendations: dict[str, dict] = {}
+            for category, papers in self.papers.items():
+                for paper in papers:
+                    recommendations[paper["arXiv_id"]] = paper
 
-        deduped_count = len(recommendations)
-        print(f"Got {deduped_count} non-overlapping papers from recent arXiv.")
+            deduped_count = len(recommendations)
+            print(f"Got {deduped_count} non-overlapping papers from recent arXiv.")
 
-        # 过滤已处理过的论文（用于“4 天窗口”每天运行一次，避免重复调用 LLM/重复发邮件）
-        if self.seen_db:
-            seen = self.seen_db.load()
-            filtered: dict[str, dict] = {}
-            skipped = 0
+            # 过滤已处理过的论文（用于“4 天窗口”每天运行一次，避免重复调用 LLM/重复发邮件）
+            self._carried_seen_keys = []
+            self._migrated_seen_keys = []
+            self._carried_results = []
+            cached_results: list[dict] = []
+            if self.seen_db:
+                content_scope = self.seen_db.scope == "content"
+                keys = {aid: self.seen_db.key_for(p) for aid, p in recommendations.items()}
+                lookup = set(keys.values())
+                if content_scope:
+                    # 切换到 content 粒度之前按 base 记录的历史：第一次遇到时视为已处理，并迁移为当前内容的 content key
+                    legacy = {aid: normalize_arxiv_id(aid, "base") for aid in recommendations}
+                    lookup.update(legacy.values())
+                seen = self.seen_db.contains(list(lookup))
+                earlier: dict[str, dict] = {}
+                if content_scope and self.llm_cache:
+                    # 标题/摘要未变的新版本：取更早版本的 LLM 结果，配上新版本的元数据直接沿用
+                    earlier = self.llm_cache.get_earlier_versions(
+                        p for aid, p in recommendations.items() if keys[aid] in seen
+                    )
+                filtered: dict[str, dict] = {}
+                skipped = 0
+                for aid, paper in recommendations.items():
+                    if aid in earlier:
+                        self._carried_results.append((paper, earlier[aid]))
+                        cached_results.append(self._build_result(paper, earlier[aid]))
+                        continue
+                    if keys[aid] in seen or (content_scope and legacy[aid] in seen):
+                        skipped += 1
+                        if content_scope and keys[aid] not in seen:
+                            # 迁移后旧 base 记录即被删除，之后标题/摘要再改动的版本会正常重评
+                            self._migrated_seen_keys.append(legacy[aid])
+                        if content_scope:
+                            # 已处理过的同一版本（或找不到更早版本的结果）：不再推送，只刷新记录日期
+                            self._carried_seen_keys.append(keys[aid])
+                        continue
+                    filtered[aid] = paper
+                recommendations = filtered
+                print(
+                    f"Seen filter enabled: skipped {skipped}, carried forward {len(self._carried_results)}, remaining {len(recommendations)} (scope={self.seen_db.scope}, retention_days={self.seen_db.retention_days}, backend={self.seen_db.backend})."
+                )
+
+            pending: list[dict] = []
+            persisted = self.llm_cache.get_many(recommendations.values()) if self.llm_cache else {}
             for paper in recommendations.values():
-                norm_id = normalize_arxiv_id(paper["arXiv_id"], self.seen_db.scope)
-                if norm_id in seen:
-                    skipped += 1
+                if paper["arXiv_id"] in persisted:
+                    cached_results.append(self._build_result(paper, persisted[paper["arXiv_id"]]))
                     continue
-                filtered[paper["arXiv_id"]] = paper
-            recommendations = filtered
-            print(
-                f"Seen filter enabled: skipped {skipped}, remaining {len(recommendations)} (scope={self.seen_db.scope}, retention_days={self.seen_db.retention_days})."
-            )
+                cached = self._load_cache(paper)
+                if cached:
+                    cached_results.append(cached)
+                else:
+                    pending.append(paper)
+            if self.llm_cache:
+                print(f"LLM result cache: {len(persisted)} hits, {len(recommendations) - len(persisted)} misses.")
 
-        cached_results: list[dict] = []
-        pending: list[dict] = []
-        for paper in recommendations.values():
-            cached = self._load_cache(paper)
-            if cached:
-                cached_results.append(cached)
+        with self._stage("llm_scoring"):
+            recommendations_: list[dict] = []
+            recommendations_.extend(cached_results)
+            if pending:
+                print(f"Performing LLM inference for {len(pending)} new papers...")
             else:
-                pending.append(paper)
+                print("No new papers to process (after seen filter).")
 
-        recommendations_: list[dict] = []
-        recommendations_.extend(cached_results)
-        if pending:
-            print(f"Performing LLM inference for {len(pending)} new papers...")
-        else:
-            print("No new papers to process (after seen filter).")
-
-        with ThreadPoolExecutor(self.num_workers) as executor:
-            futures = []
-            batch_size = self.llm_batch_size
-            for i in range(0, len(pending), batch_size):
-                batch = pending[i : i + batch_size]
-                futures.append(executor.submit(self.process_paper_batch, batch))
-            for future in tqdm(
-                as_completed(futures),
-                total=len(futures),
-                desc="Processing batches",
-                unit="batch",
-            ):
-                batch_results = future.result()
-                if batch_results:
-                    recommendations_.extend(batch_results)
+            batches = self._plan_batches(pending)
+            # 进度按论文计：非流式时一批完成才前进，流式时每篇论文的结果一闭合就前进
+            self._progress = tqdm(total=len(pending), desc="Scoring papers", unit="paper") if batches else None
+            if self.llm_concurrency > 0 and batches:
+                # asyncio 路径：并发只受 llm_concurrency 与服务端限流约束，不受线程数约束
+                recommendations_.extend(asyncio.run(self._process_batches_async(batches)))
+            else:
+                with ThreadPoolExecutor(self.num_workers) as executor:
+                    futures = [executor.submit(self.process_paper_batch, batch) for batch in batches]
+                    for future in as_completed(futures):
+                        batch_results = future.result()
+                        if batch_results:
+                            recommendations_.extend(batch_results)
+                if batches:
+                    print(f"LLM endpoints: {self.model.pool.summary()}")
+            if self._progress is not None:
+                self._progress.close()
+                self._progress = None
+            if self.failed_papers:
+                # 失败的论文不会写入 seen_db，下次运行会重新评分
+                print(f"LLM 评分失败 {len(self.failed_papers)} 篇（已保留其余结果）：")
+                for aid, reason in sorted(self.failed_papers.items()):
+                    print(f"  {aid}: {reason}")
 
         # 记录本次“成功得到 LLM 结果/缓存结果”的论文，用于发送成功后写入 seen_db
         self._last_scored_ids = [
-            p.get("arXiv_id", "") for p in recommendations_ if p.get("arXiv_id")
+            self.seen_db.key_for(p) if self.seen_db else p.get("arXiv_id", "")
+            for p in recommendations_
+            if p.get("arXiv_id")
         ]
 
-        # 按分数排序后再截断到 Top-N（邮件正文仍会展示 Top-N；邮件开头固定展示 Top-5）
-        recommendations_sorted = sorted(
-            recommendations_, key=lambda x: x.get("relevance_score", 0), reverse=True
-        )
-        recommendations_ = recommendations_sorted[: self.max_paper_num]
-
-        # Top-M 全局重排（用于减少同分与纠偏）
-        if self.rerank_top_m > 0 and len(recommendations_) > 1:
-            for p in recommendations_:
-                if "base_relevance_score" not in p:
-                    p["base_relevance_score"] = p.get("relevance_score", 0)
-            m = min(self.rerank_top_m, len(recommendations_))
-            top = recommendations_[:m]
-            tail = recommendations_[m:]
-            reranked_top = self.rerank_top_papers(top)
-            recommendations_ = reranked_top + tail
-            recommendations_ = sorted(
+        with self._stage("rerank"):
+            # 按分数排序后再截断到 Top-N（邮件正文仍会展示 Top-N；邮件开头固定展示 Top-5）
+            recommendations_sorted = sorted(
                 recommendations_, key=lambda x: x.get("relevance_score", 0), reverse=True
-            )[: self.max_paper_num]
-
-        # Save recommendation to markdown file
-        if self.save_dir:
-            current_time = self.run_datetime
-            save_path = os.path.join(
-                self.save_dir, self.run_date, f"{current_time.strftime('%Y-%m-%d')}.md"
             )
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            with open(save_path, "w", encoding="utf-8") as f:
-                f.write("# Daily arXiv Papers\n")
-                f.write(f"## Date: {current_time.strftime('%Y-%m-%d')}\n")
-                f.write(f"## Description: {self.description}\n")
-                f.write("## Papers:\n")
-                for i, paper in enumerate(recommendations_):
-                    f.write(f"### {i + 1}. {paper.get('title','')}\n")
-                    f.write("#### Abstract:\n")
-                    f.write(f"{paper.get('abstract','')}\n")
-                    f.write("#### Summary:\n")
-                    f.write(f"{paper.get('summary','')}\n")
-                    f.write(f"#### Relevance Score: {paper.get('relevance_score',0)}\n")
-                    f.write(f"#### PDF URL: {paper.get('pdf_url','')}\n")
-                    f.write("\n")
+            recommendations_ = recommendations_sorted[: self.max_paper_num]
+
+            # Top-M 全局重排（用于减少同分与纠偏）
+            if self.rerank_top_m > 0 and len(recommendations_) > 1:
+                for p in recommendations_:
+                    if "base_relevance_score" not in p:
+                        p["base_relevance_score"] = p.get("relevance_score", 0)
+                m = min(self.rerank_top_m, len(recommendations_))
+                top = recommendations_[:m]
+                tail = recommendations_[m:]
+                reranked_top = self.rerank_top_papers(top)
+                recommendations_ = reranked_top + tail
+                recommendations_ = sorted(
+                    recommendations_, key=lambda x: x.get("relevance_score", 0), reverse=True
+                )[: self.max_paper_num]
+        if self.output_stats:
+            print(f"LLM output modes: {self.output_stats_summary()}")
+        if self.completions:
+            print(f"Prompt cache: {self.prompt_cache_summary()}")
+        self._report_llm_telemetry()
+
+        with self._stage("save"):
+            # Save recommendation to markdown file
+            if self.save_dir:
+                current_time = self.run_datetime
+                save_path = os.path.join(
+                    self.save_dir, self.run_date, f"{current_time.strftime('%Y-%m-%d')}.md"
+                )
+                os.makedirs(os.path.dirname(save_path), exist_ok=True)
+                with open(save_path, "w", encoding="utf-8") as f:
+                    f.write("# Daily arXiv Papers\n")
+                    f.write(f"## Date: {current_time.strftime('%Y-%m-%d')}\n")
+                    f.write(f"## Description: {self.description}\n")
+                    f.write("## Papers:\n")
+                    for i, paper in enumerate(recommendations_):
+                        f.write(f"### {i + 1}. {paper.get('title','')}\n")
+                        f.write("#### Abstract:\n")
+                        f.write(f"{paper.get('abstract','')}\n")
+                        f.write("#### Summary:\n")
+                        f.write(f"{paper.get('summary','')}\n")
+                        f.write(f"#### Relevance Score: {paper.get('relevance_score',0)}\n")
+                        f.write(f"#### PDF URL: {paper.get('pdf_url','')}\n")
+                        f.write("\n")
+        print(f"Stage timings: {self.stage_summary()}")
 
         return recommendations_
 
@@ -529,6 +1213,10 @@ class ArxivDaily:
         return render_summary_sections(summary_data)
 
     def render_email(self, recommendations):
+        with self._stage("render"):
+            return self._render_email(recommendations)
+
+    def _render_email(self, recommendations):
         if self.save_dir:
             save_file_path = os.path.join(
                 self.save_dir, self.run_date, "arxiv_daily_email.html"
@@ -614,13 +1302,31 @@ class ArxivDaily:
         if self.seen_db:
             try:
                 self.seen_db.prune(now_utc=self.run_datetime)
-                self.seen_db.mark_processed(self._last_scored_ids, now_utc=self.run_datetime)
+                self.seen_db.mark_processed(
+                    self._last_scored_ids + self._carried_seen_keys, now_utc=self.run_datetime
+                )
+                self.seen_db.discard(self._migrated_seen_keys)
                 self.seen_db.prune(now_utc=self.run_datetime)
                 self.seen_db.save()
-                print(f"seen_db updated: {self.seen_db.path} (+{len(self._last_scored_ids)} ids)")
+                if self.llm_cache and self._carried_results:
+                    # 把沿用的结果记到新版本名下：之后再遇到这一版时按“已处理”跳过，而不是再推送一次
+                    self.llm_cache.put_many(self._carried_results)
+                print(
+                    f"seen_db updated: {self.seen_db.path} (+{len(self._last_scored_ids)} ids, "
+                    f"{len(self._carried_seen_keys)} unchanged versions carried forward, "
+                    f"{len(self._migrated_seen_keys)} base records migrated)"
+                )
             except Exception as e:
                 logger.warning(f"Failed to update seen_db: {e}")
 
+        if self.oai_watermark and self._pending_oai_marks:
+            try:
+                self.oai_watermark.update(self._pending_oai_marks)
+                self.oai_watermark.save()
+                print(f"OAI watermark updated: {self.oai_watermark.path} {self._pending_oai_marks}")
+            except Exception as e:
+                logger.warning(f"Failed to update OAI watermark: {e}")
+
 
 if __name__ == "__main__":
     categories = ["cs.CV"]
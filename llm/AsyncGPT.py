@@ -0,0 +1,130 @@
+"""
+Async GPT Series Models (AsyncOpenAI + semaphore-bounded concurrency)
+"""
+
+import asyncio
+
+from openai import AsyncOpenAI
+
+from .GPT import CallRetry, build_endpoint_pool, chat_request, consume_chunk
+from .telemetry import LlmTelemetry
+
+
+class AsyncGPT():
+    """
+    GPT 的 asyncio 版本：每个 endpoint 一个 AsyncOpenAI 客户端，所有请求共享一个信号量，
+    同时在途的请求数不超过 max_concurrency（可以远大于线程数）；endpoint 的选择与 GPT 相同（负载均衡池）。
+
+    用法：
+        async with AsyncGPT(model, base_url, api_key, max_concurrency=64) as llm:
+            text = await llm.inference(prompt)
+    """
+
+    def __init__(
+        self,
+        model,
+        base_url,
+        api_key,
+        max_concurrency=32,
+        weights=None,
+        max_inflight=None,
+        output_mode="text",
+        telemetry=None,
+    ):
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency 必须为正整数")
+        self.model_name = model
+        self.base_url = base_url
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.weights = weights
+        self.max_inflight = max_inflight
+        self.output_mode = output_mode
+        self.telemetry = telemetry if telemetry is not None else LlmTelemetry()
+        self._semaphore = None
+
+        self._init_model()
+
+    def _init_model(self):
+        self.pool = build_endpoint_pool(
+            self.model_name,
+            self.base_url,
+            self.api_key,
+            AsyncOpenAI,
+            self.weights,
+            self.max_inflight,
+            self.output_mode,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        for endpoint in self.pool.endpoints:
+            await endpoint.client.close()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # 延迟创建，保证信号量属于当前运行的事件循环
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def build_prompt(self, question, system=None):
+        prompt = [
+            {
+                "role": "user",
+                "content": [{"type": "text", "text": question}],
+            }
+        ]
+        if system:
+            prompt.insert(0, {"role": "system", "content": system})
+        return prompt
+
+    async def _create(self, endpoint, message, temperature, response_format, on_delta, state):
+        kwargs = chat_request(endpoint, message, temperature, response_format, on_delta is not None, state)
+        if on_delta is None:
+            result = await endpoint.client.chat.completions.create(**kwargs)
+            state["usage"] = result.usage
+            return result.choices[0].message.content
+        stream = await endpoint.client.chat.completions.create(**kwargs)
+        parts = []
+        async with stream:
+            async for chunk in stream:
+                if not consume_chunk(chunk, parts, state, on_delta):
+                    break
+        return "".join(parts)
+
+    async def call_gpt(self, message, retries=10, wait_time=1, temperature=0.0, json_schema=None, on_delta=None):
+        """返回 Completion；重试/退避/熔断/结构化输出降级/流式语义与 GPT.call_gpt 相同（共用 CallRetry）。"""
+        call = CallRetry(self.pool, self.telemetry, retries, wait_time, json_schema, on_delta is not None)
+        while True:
+            try:
+                async with self._get_semaphore():
+                    async with self.pool.lease_async(call.failed) as endpoint:
+                        response_format = call.begin(endpoint)
+                        try:
+                            text = await self._create(endpoint, message, temperature, response_format, on_delta, call.state)
+                        except Exception as e:
+                            call.fail(e)
+                            raise
+                        return call.succeed(text)
+            except Exception as e:
+                delay = call.retry_delay(e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    async def call_gpt_eval(self, message, retries=10, wait_time=1, temperature=0.0):
+        return (await self.call_gpt(message, retries=retries, wait_time=wait_time, temperature=temperature)).text
+
+    async def inference(self, prompt, temperature=0.7):
+        prompt = self.build_prompt(prompt)
+        return await self.call_gpt_eval(prompt, temperature=temperature)
+
+    async def complete(self, prompt, temperature=0.7, json_schema=None, on_delta=None, system=None):
+        """GPT.complete 的 asyncio 版本，返回 Completion。"""
+        prompt = self.build_prompt(prompt, system=system)
+        return await self.call_gpt(prompt, temperature=temperature, json_schema=json_schema, on_delta=on_delta)
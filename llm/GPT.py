@@ -4,66 +4,265 @@ Use GPT Series Models
 
 from openai import OpenAI
 import time
+from typing import NamedTuple
+
+from .endpoint_pool import (
+    STRUCTURED_OUTPUT_MODES,
+    Endpoint,
+    EndpointPool,
+    backoff_delay,
+    broadcast_option,
+    is_request_error,
+    response_format_for,
+)
+from .telemetry import CallEvent, LlmTelemetry, error_event
+
+
+class Completion(NamedTuple):
+    """一次成功调用的结果与统计（token 数来自 API 返回的 usage，服务端未返回时为 0）。"""
+
+    text: str
+    # 实际使用的输出模式：json_schema / json_object / text
+    output_mode: str
+    endpoint: str
+    latency: float
+    prompt_tokens: int = 0
+    # 命中服务端 prompt 缓存（前缀缓存）的输入 token 数
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+
+
+def usage_tokens(usage) -> tuple[int, int, int]:
+    """从 usage 中取 (prompt_tokens, cached_tokens, completion_tokens)。
+    缓存命中数优先取 OpenAI 的 prompt_tokens_details.cached_tokens，其次是 DeepSeek 的 prompt_cache_hit_tokens。"""
+    if usage is None:
+        return 0, 0, 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) if details is not None else None
+    if cached is None:
+        cached = getattr(usage, "prompt_cache_hit_tokens", None)
+    return (
+        int(getattr(usage, "prompt_tokens", 0) or 0),
+        int(cached or 0),
+        int(getattr(usage, "completion_tokens", 0) or 0),
+    )
+
+
+def chat_request(endpoint, message, temperature, response_format, stream, state) -> dict:
+    """chat.completions.create 的参数，同步与异步客户端共用；流式请求在 endpoint 支持时要求服务端附带 usage。"""
+    kwargs = {"model": endpoint.model, "messages": message, "temperature": temperature}
+    if response_format:
+        kwargs["response_format"] = response_format
+    if stream:
+        kwargs["stream"] = True
+        if endpoint.stream_usage:
+            # 让服务端在最后一个 chunk 里附带 usage（不支持的 endpoint 会被关闭该选项）
+            kwargs["stream_options"] = {"include_usage": True}
+            state["stream_options"] = True
+    return kwargs
+
+
+def consume_chunk(chunk, parts: list[str], state: dict, on_delta) -> bool:
+    """处理一个流式 chunk：记录 usage、收集文本并交给 on_delta；返回 False 表示调用方要求提前结束。"""
+    if getattr(chunk, "usage", None) is not None:
+        state["usage"] = chunk.usage
+    if not chunk.choices:
+        return True
+    text = chunk.choices[0].delta.content
+    if not text:
+        return True
+    parts.append(text)
+    state["delivered"] = True
+    return on_delta(text) is not False
+
+
+class CallRetry:
+    """
+    一次 call_gpt 的重试状态，GPT 与 AsyncGPT 共用：输出模式选择、失败记账、降级判断与退避计算都在这里，
+    两个客户端只负责各自的阻塞调用或 await。
+    """
+
+    def __init__(self, pool: EndpointPool, telemetry: LlmTelemetry, retries, wait_time, json_schema, stream: bool):
+        self.pool = pool
+        self.telemetry = telemetry
+        self.retries = retries
+        self.wait_time = wait_time
+        self.json_schema = json_schema
+        self.stream = stream
+        # 本次请求中失败过的 endpoint：重试时优先避开（全部失败过后再从头轮换）
+        self.failed: set[int] = set()
+        self.i = 0
+        self.attempt = 0
+        self.endpoint = None
+        self.mode = "text"
+        self.state = {"delivered": False}
+        self.event = None
+        self.started = 0.0
+
+    def begin(self, endpoint):
+        """租到 endpoint 后开始一次尝试，返回本次请求的 response_format（None 表示不传）。"""
+        self.endpoint = endpoint
+        self.mode = endpoint.output_mode if self.json_schema is not None else "text"
+        self.state = {"delivered": False}
+        self.event = None
+        self.started = time.monotonic()
+        return response_format_for(self.mode, self.json_schema)
+
+    def fail(self, e: BaseException) -> None:
+        """在租约内记录失败；请求本身的错误（400/413/422）不算 endpoint 故障。"""
+        self.event = self.telemetry.record(
+            error_event(self.endpoint, self.mode, time.monotonic() - self.started, self.attempt, self.stream, e)
+        )
+        if not is_request_error(e):
+            self.failed.add(self.pool.index(self.endpoint))
+
+    def succeed(self, text: str) -> Completion:
+        latency = time.monotonic() - self.started
+        tokens = usage_tokens(self.state.get("usage"))
+        self.pool.record_usage(self.endpoint, *tokens)
+        self.telemetry.record(
+            CallEvent(
+                endpoint=self.endpoint.name,
+                model=self.endpoint.model,
+                status="ok",
+                latency=latency,
+                attempt=self.attempt,
+                output_mode=self.mode,
+                stream=self.stream,
+                prompt_tokens=tokens[0],
+                cached_tokens=tokens[1],
+                completion_tokens=tokens[2],
+            )
+        )
+        return Completion(text, self.mode, self.endpoint.name, latency, *tokens)
+
+    def retry_delay(self, e: BaseException) -> float | None:
+        """
+        一次尝试失败后调用：返回重试前需要等待的秒数（降级后立即重试，不占用重试次数），
+        返回 None 表示放弃，调用方原样抛出异常。
+        """
+        self.attempt += 1
+        endpoint, event = self.endpoint, self.event
+        self.endpoint = self.event = None
+        delivered = self.state["delivered"]
+        if is_request_error(e) and not delivered and endpoint is not None:
+            if endpoint.downgrade_request(self.mode, self.state, e):
+                return 0.0
+        if delivered or is_request_error(e) or self.i == self.retries - 1:
+            print(f"Failed to call the API after {self.i+1} attempts.")
+            print(e)
+            return None
+        delay = backoff_delay(self.i, self.wait_time) if len(self.failed) >= len(self.pool) else 0.0
+        if event is not None:
+            event.backoff = delay
+        name = endpoint.name if endpoint is not None else "-"
+        print(f"Failed to call the API {self.i+1}/{self.retries} ({name}), retrying after {delay:.1f} seconds.")
+        print(e)
+        self.i += 1
+        return delay
+
+def build_endpoints(model, base_url, api_key) -> list[tuple[str, str, str]]:
+    """
+    把 model/base_url/api_key（单值或列表）展开为 (base_url, api_key, model) 三元组列表。
+    同步 GPT 与异步 AsyncGPT 共用这套广播规则。
+    """
+    models = model if isinstance(model, list) else [model]
+    base_urls = base_url if isinstance(base_url, list) else [base_url]
+    api_keys = api_key if isinstance(api_key, list) else [api_key]
+
+    models = [m for m in (models or []) if m]
+    base_urls = [u for u in (base_urls or []) if u]
+    api_keys = [k for k in (api_keys or []) if k]
+    if not models:
+        raise ValueError("model 不能为空")
+    if not base_urls:
+        raise ValueError("base_url 不能为空")
+    if not api_keys:
+        raise ValueError("api_key 不能为空")
+
+    triplets: list[tuple[str, str, str]] = []
+    if len(models) == 1:
+        model = models[0]
+        if len(base_urls) == 1 and len(api_keys) >= 1:
+            triplets = [(base_urls[0], k, model) for k in api_keys]
+        elif len(api_keys) == 1 and len(base_urls) >= 1:
+            triplets = [(u, api_keys[0], model) for u in base_urls]
+        else:
+            if len(base_urls) != len(api_keys):
+                raise ValueError("base_url 与 api_key 列表长度不一致")
+            triplets = [(u, k, model) for u, k in zip(base_urls, api_keys, strict=True)]
+    else:
+        # 支持三元组列表：base_url + api_key + model，请求在它们之间负载均衡
+        if len(base_urls) == 1 and len(api_keys) == 1:
+            triplets = [(base_urls[0], api_keys[0], m) for m in models]
+        elif len(base_urls) == 1 and len(api_keys) == len(models):
+            triplets = [(base_urls[0], k, m) for k, m in zip(api_keys, models, strict=True)]
+        elif len(api_keys) == 1 and len(base_urls) == len(models):
+            triplets = [(u, api_keys[0], m) for u, m in zip(base_urls, models, strict=True)]
+        else:
+            if not (len(base_urls) == len(api_keys) == len(models)):
+                raise ValueError("当 model 为列表时，base_url/api_key/model 需要可广播或三者长度一致")
+            triplets = list(zip(base_urls, api_keys, models, strict=True))
+    return triplets
+
+
+def build_endpoint_pool(
+    model, base_url, api_key, client_cls, weights=None, max_inflight=None, output_mode="text"
+) -> EndpointPool:
+    """
+    按 build_endpoints 展开三元组，为每个 endpoint 创建 client_cls 客户端并组装成负载均衡池。
+    output_mode 为各 endpoint 初始的结构化输出模式（json_schema / json_object / text）。
+    """
+    if output_mode not in STRUCTURED_OUTPUT_MODES:
+        raise ValueError(f"output_mode 只能是 {'/'.join(STRUCTURED_OUTPUT_MODES)}")
+    triplets = build_endpoints(model, base_url, api_key)
+    weights = broadcast_option(weights, len(triplets), "weights", 1.0)
+    max_inflight = broadcast_option(max_inflight, len(triplets), "max_inflight", 0)
+    return EndpointPool(
+        [
+            Endpoint(
+                base_url=url,
+                api_key=key,
+                model=m,
+                # SDK 自带的重试会绕过熔断器，这里关掉，由调用方统一退避/切换
+                client=client_cls(base_url=url, api_key=key, max_retries=0),
+                weight=float(w),
+                max_inflight=int(cap),
+                output_mode=output_mode,
+            )
+            for (url, key, m), w, cap in zip(triplets, weights, max_inflight)
+        ]
+    )
+
+
 class GPT():
-    def __init__(self, model, base_url, api_key):
+    """
+    同步客户端。请求在所有 endpoint 之间负载均衡（见 llm/endpoint_pool.py）：
+    weights 为各 endpoint 的权重，max_inflight 为各 endpoint 的并发上限（0=不限），均可传单值或与 endpoint 等长的列表。
+    output_mode 为结构化输出的初始模式（只对传了 json_schema 的调用生效），不支持的 endpoint 会自动降级。
+    每次尝试都记入 telemetry（未传入时新建一个 LlmTelemetry）。
+    """
+
+    def __init__(
+        self, model, base_url, api_key, weights=None, max_inflight=None, output_mode="text", telemetry=None
+    ):
         self.model_name = model
         self.base_url = base_url
         self.api_key = api_key
-        self._endpoint_index = 0
+        self.weights = weights
+        self.max_inflight = max_inflight
+        self.output_mode = output_mode
+        self.telemetry = telemetry if telemetry is not None else LlmTelemetry()
 
         self._init_model()
 
     def _init_model(self):
-        models = self.model_name if isinstance(self.model_name, list) else [self.model_name]
-        base_urls = self.base_url if isinstance(self.base_url, list) else [self.base_url]
-        api_keys = self.api_key if isinstance(self.api_key, list) else [self.api_key]
-
-        models = [m for m in (models or []) if m]
-        base_urls = [u for u in (base_urls or []) if u]
-        api_keys = [k for k in (api_keys or []) if k]
-        if not models:
-            raise ValueError("model 不能为空")
-        if not base_urls:
-            raise ValueError("base_url 不能为空")
-        if not api_keys:
-            raise ValueError("api_key 不能为空")
-
-        triplets: list[tuple[str, str, str]] = []
-        if len(models) == 1:
-            model = models[0]
-            if len(base_urls) == 1 and len(api_keys) >= 1:
-                triplets = [(base_urls[0], k, model) for k in api_keys]
-            elif len(api_keys) == 1 and len(base_urls) >= 1:
-                triplets = [(u, api_keys[0], model) for u in base_urls]
-            else:
-                if len(base_urls) != len(api_keys):
-                    raise ValueError("base_url 与 api_key 列表长度不一致")
-                triplets = [(u, k, model) for u, k in zip(base_urls, api_keys, strict=True)]
-        else:
-            # 支持三元组列表：base_url + api_key + model，按顺序故障切换
-            if len(base_urls) == 1 and len(api_keys) == 1:
-                triplets = [(base_urls[0], api_keys[0], m) for m in models]
-            elif len(base_urls) == 1 and len(api_keys) == len(models):
-                triplets = [(base_urls[0], k, m) for k, m in zip(api_keys, models, strict=True)]
-            elif len(api_keys) == 1 and len(base_urls) == len(models):
-                triplets = [(u, api_keys[0], m) for u, m in zip(base_urls, models, strict=True)]
-            else:
-                if not (len(base_urls) == len(api_keys) == len(models)):
-                    raise ValueError("当 model 为列表时，base_url/api_key/model 需要可广播或三者长度一致")
-                triplets = list(zip(base_urls, api_keys, models, strict=True))
-
-        self._endpoints: list[dict] = []
-        for url, key, model in triplets:
-            self._endpoints.append(
-                {
-                    "base_url": url,
-                    "api_key": key,
-                    "model": model,
-                    "client": OpenAI(base_url=url, api_key=key),
-                }
-            )
+        self.pool = build_endpoint_pool(
+            self.model_name, self.base_url, self.api_key, OpenAI, self.weights, self.max_inflight, self.output_mode
+        )
 
-    def build_prompt(self, question):
+    def build_prompt(self, question, system=None):
+        """system 不为空时作为单独的 system 消息放在最前面：跨批次保持逐字节一致，便于服务端前缀缓存复用。"""
         message = []
 
         message.append(
@@ -79,43 +278,66 @@ class GPT():
                 "content": message
             }
         ]
+        if system:
+            prompt.insert(0, {"role": "system", "content": system})
         return prompt
 
-    def call_gpt_eval(self, message, retries=10, wait_time=1, temperature=0.0):
-        last_error: Exception | None = None
-        for i in range(retries):
-            endpoint = self._endpoints[self._endpoint_index]
-            client: OpenAI = endpoint["client"]
-            model_name = endpoint["model"]
+    def _create(self, endpoint, message, temperature, response_format, on_delta, state):
+        kwargs = chat_request(endpoint, message, temperature, response_format, on_delta is not None, state)
+        if on_delta is None:
+            result = endpoint.client.chat.completions.create(**kwargs)
+            state["usage"] = result.usage
+            return result.choices[0].message.content
+        stream = endpoint.client.chat.completions.create(**kwargs)
+        parts = []
+        with stream:
+            for chunk in stream:
+                if not consume_chunk(chunk, parts, state, on_delta):
+                    break
+        return "".join(parts)
+
+    def call_gpt(self, message, retries=10, wait_time=1, temperature=0.0, json_schema=None, on_delta=None):
+        """
+        返回 Completion（文本、实际使用的输出模式、endpoint、耗时与 usage 中的 token 数）。
+
+        失败时换一个 endpoint 立即重试（被限流/熔断的 endpoint 由池子跳过，并按 Retry-After 冷却）；
+        只有本轮所有 endpoint 都失败过时，才按 wait_time 为基数做带抖动的指数退避。
+        json_schema（{"name": ..., "schema": {...}}）不为空时按 endpoint 的 output_mode 传 response_format，
+        被拒绝（400/422 且错误信息点名 response_format/json_schema）时该 endpoint 降级并立即重试，不占用重试次数；
+        与 response_format 无关的 400/413/422（如上下文超长）直接抛出，不降级。
+        on_delta 不为空时改为流式请求：每收到一段文本就调用 on_delta(text)，返回 False 时提前结束；
+        一旦向调用方交付过文本就不再重试，中途断流直接抛出。
+        """
+        call = CallRetry(self.pool, self.telemetry, retries, wait_time, json_schema, on_delta is not None)
+        while True:
             try:
-                result = client.chat.completions.create(
-                    model=model_name,
-                    messages=message,
-                    temperature=temperature,
-                )
-                response_message = result.choices[0].message.content
-                return response_message
+                with self.pool.lease(call.failed) as endpoint:
+                    response_format = call.begin(endpoint)
+                    try:
+                        text = self._create(endpoint, message, temperature, response_format, on_delta, call.state)
+                    except Exception as e:
+                        call.fail(e)
+                        raise
+                    return call.succeed(text)
             except Exception as e:
-                last_error = e
-                # 发生错误：按顺序切换到下一个 endpoint
-                if len(self._endpoints) > 1:
-                    self._endpoint_index = (self._endpoint_index + 1) % len(self._endpoints)
-                if i < retries - 1:
-                    print(f"Failed to call the API {i+1}/{retries}, switching endpoint and retrying after {wait_time} seconds.")
-                    print(e)
-                    time.sleep(wait_time)
-                    continue
-                print(f"Failed to call the API after {retries} attempts.")
-                print(e)
-                raise
-        if last_error is not None:
-            raise last_error
+                delay = call.retry_delay(e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    def call_gpt_eval(self, message, retries=10, wait_time=1, temperature=0.0):
+        return self.call_gpt(message, retries=retries, wait_time=wait_time, temperature=temperature).text
 
     def inference(self, prompt, temperature=0.7):
         prompt = self.build_prompt(prompt)
         response = self.call_gpt_eval(prompt, temperature=temperature)
         return response
-    
+
+    def complete(self, prompt, temperature=0.7, json_schema=None, on_delta=None, system=None):
+        """inference 的扩展版：可选 system 前缀、结构化输出与流式接收，返回 Completion。"""
+        prompt = self.build_prompt(prompt, system=system)
+        return self.call_gpt(prompt, temperature=temperature, json_schema=json_schema, on_delta=on_delta)
+
 if __name__ == "__main__":
     # Test OpenAI-compatible endpoint
     model = "gpt-3.5-turbo"
@@ -1 +1,3 @@
-from .GPT import GPT
+from .GPT import GPT, Completion
+from .AsyncGPT import AsyncGPT
+from .telemetry import LlmTelemetry
@@ -0,0 +1,330 @@
+"""
+多 endpoint 负载均衡：在所有 (base_url, api_key, model) 三元组之间分摊请求。
+
+选择规则：在未达并发上限、熔断器允许、且未被本次请求排除的 endpoint 中，选 outstanding/weight 最小者
+（least-outstanding-requests）；并列时用平滑加权轮询（smooth weighted round-robin）打破平局，
+因此串行调用时也会按权重轮流使用各个 endpoint。出错的 endpoint 由调用方排除后重试（故障切换兜底）。
+
+结构化输出（response_format）按 endpoint 探测：从配置的模式开始，被 endpoint 以 400/422 拒绝时
+逐级降级 json_schema -> json_object -> text，降级结果记在 endpoint 上，后续请求直接使用。
+
+每个 endpoint 有一个熔断器（closed / open / half-open）：连续失败或被限流（429）时打开，
+冷却期内不再分配请求；冷却期按 Retry-After 或带抖动的指数退避计算，期满后只放行一个探测请求。
+"""
+
+import asyncio
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+
+
+# 这些状态码说明请求本身有问题（换哪个 endpoint 都一样），不计入 endpoint 的失败
+_REQUEST_ERROR_STATUS = {400, 413, 422}
+# 错误信息中出现这些词时，才认为是该可选参数不被 endpoint 支持（而不是请求内容本身有问题）
+_STREAM_OPTION_HINTS = ("stream_options", "include_usage")
+_OUTPUT_FORMAT_HINTS = ("response_format", "json_schema", "json_object", "structured output")
+# 结构化输出模式，按约束从强到弱排列；"text" 即不传 response_format
+STRUCTURED_OUTPUT_MODES = ("json_schema", "json_object", "text")
+
+
+def retry_after_seconds(exc: BaseException) -> float | None:
+    """从 API 异常的响应头中读取 retry-after-ms / retry-after（秒数或 HTTP 日期）。"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_request_error(exc: BaseException) -> bool:
+    """请求本身无效（如 400 上下文超长），重试或换 endpoint 都没有意义。"""
+    return getattr(exc, "status_code", None) in _REQUEST_ERROR_STATUS
+
+
+def response_format_for(mode: str, json_schema: dict | None) -> dict | None:
+    """json_schema 形如 {"name": ..., "schema": {...}}；text 模式或未提供 schema 时返回 None。"""
+    if json_schema is None or mode == "text":
+        return None
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return {"type": "json_schema", "json_schema": {**json_schema, "strict": True}}
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """带完全抖动（full jitter）的指数退避：在 [0, min(cap, base * 2^attempt)] 内均匀取值。"""
+    return random.uniform(0.0, min(cap, base * (2 ** attempt)))
+
+
+@dataclass
+class CircuitBreaker:
+    """
+    closed：正常放行；连续 failure_threshold 次失败（或一次 429）后 -> open。
+    open：冷却期内拒绝；冷却期 = Retry-After（若有），否则 base_cooldown * 2^(连续打开次数-1)（带抖动，封顶 max_cooldown）。
+    half-open：冷却期满后只放行一个探测请求；成功 -> closed，失败 -> 再次 open（冷却期翻倍）。
+    """
+
+    failure_threshold: int = 3
+    base_cooldown: float = 5.0
+    max_cooldown: float = 120.0
+    state: str = "closed"
+    consecutive_failures: int = 0
+    trips: int = 0
+    open_until: float = 0.0
+    probing: bool = False
+
+    def available(self, now: float) -> bool:
+        if self.state == "open":
+            if now < self.open_until:
+                return False
+            self.state = "half_open"
+            self.probing = False
+        if self.state == "half_open":
+            return not self.probing
+        return True
+
+    def on_dispatch(self) -> None:
+        if self.state == "half_open":
+            self.probing = True
+
+    def on_success(self) -> None:
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.probing = False
+
+    def on_failure(self, now: float, retry_after: float | None = None, rate_limited: bool = False) -> None:
+        self.probing = False
+        self.consecutive_failures += 1
+        if not (
+            rate_limited
+            or retry_after is not None
+            or self.state == "half_open"
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            return
+        self.trips += 1
+        if retry_after is not None:
+            cooldown = min(retry_after, self.max_cooldown)
+        else:
+            cooldown = min(self.max_cooldown, self.base_cooldown * (2 ** (self.trips - 1)))
+            cooldown *= random.uniform(0.8, 1.2)
+        self.state = "open"
+        self.open_until = now + cooldown
+
+
+@dataclass
+class Endpoint:
+    base_url: str
+    api_key: str
+    model: str
+    client: object = None
+    weight: float = 1.0
+    # 0 表示不限
+    max_inflight: int = 0
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+    # 该 endpoint 当前使用的结构化输出模式（STRUCTURED_OUTPUT_MODES 之一），被拒绝时由 downgrade_output_mode 降级
+    output_mode: str = "text"
+    # 流式请求是否带 stream_options.include_usage（被拒绝时关闭）
+    stream_usage: bool = True
+    # 累计的 usage：输入 token、其中命中服务端前缀缓存的 token、输出 token
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    _current: float = field(default=0.0, repr=False)
+
+    @property
+    def name(self) -> str:
+        return f"{self.model}@{self.base_url}"
+
+    def has_capacity(self) -> bool:
+        return self.max_inflight <= 0 or self.outstanding < self.max_inflight
+
+    def downgrade_output_mode(self, rejected: str) -> bool:
+        """rejected 模式被拒绝后降一级；返回 False 表示已经是 text，没有可降的了。"""
+        if rejected == "text":
+            return False
+        # 并发请求可能同时被拒绝，只从被拒绝的那一级往下降，不会连降多级
+        if self.output_mode == rejected:
+            self.output_mode = STRUCTURED_OUTPUT_MODES[STRUCTURED_OUTPUT_MODES.index(rejected) + 1]
+            print(f"{self.name} 不支持 {rejected} 结构化输出，改用 {self.output_mode}。")
+        return True
+
+    def downgrade_request(self, mode: str, state: dict, error: BaseException) -> bool:
+        """
+        请求被拒绝（400/422）后去掉错误信息中点名的可选参数：提到 stream_options 时关闭流式 usage，
+        提到 response_format / json_schema 时降级结构化输出。错误与这些参数无关（上下文超长、内容审核等）
+        或为 413 时不做任何降级，返回 False 表示请求本身有问题。
+        """
+        if getattr(error, "status_code", None) == 413:
+            return False
+        message = str(error).lower()
+        if state.get("stream_options") and any(k in message for k in _STREAM_OPTION_HINTS):
+            if self.stream_usage:
+                self.stream_usage = False
+                print(f"{self.name} 不支持 stream_options，流式请求不再统计 usage。")
+            return True
+        if mode != "text" and any(k in message for k in _OUTPUT_FORMAT_HINTS):
+            return self.downgrade_output_mode(mode)
+        return False
+
+
+def broadcast_option(values, n: int, name: str, default):
+    """把单值/列表形式的 per-endpoint 选项广播为长度 n 的列表（与 base_url/api_key/model 的广播规则一致）。"""
+    if values is None or (isinstance(values, list) and not values):
+        return [default] * n
+    if not isinstance(values, list):
+        values = [values]
+    if len(values) == 1:
+        return values * n
+    if len(values) != n:
+        raise ValueError(f"{name} 的个数需要为 1 或与 endpoint 数量（{n}）一致")
+    return list(values)
+
+
+class EndpointPool:
+    """线程安全的 endpoint 池；lease() 供同步调用，lease_async() 供 asyncio 调用。"""
+
+    def __init__(self, endpoints: list[Endpoint]):
+        if not endpoints:
+            raise ValueError("endpoint 列表不能为空")
+        for ep in endpoints:
+            if ep.weight <= 0:
+                raise ValueError("endpoint 权重必须为正数")
+        self.endpoints = endpoints
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._async_cond: asyncio.Condition | None = None
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def _pick(self, exclude: set[int]) -> tuple[Endpoint | None, float | None]:
+        """
+        调用方需持有 self._lock。返回 (endpoint, None)；没有可用 endpoint 时返回 (None, 建议等待秒数)，
+        等待秒数为 None 表示只是并发已满（等其他请求释放即可）。
+        """
+        now = time.monotonic()
+        candidates = [ep for i, ep in enumerate(self.endpoints) if i not in exclude]
+        if not candidates:
+            # 所有 endpoint 都失败过：清空排除集合，从头再来
+            exclude.clear()
+            candidates = list(self.endpoints)
+        healthy = [ep for ep in candidates if ep.breaker.available(now)]
+        if not healthy:
+            # 全部熔断：等到最早恢复的那个进入 half-open
+            return None, max(0.0, min(ep.breaker.open_until for ep in candidates) - now)
+        ready = [ep for ep in healthy if ep.has_capacity()]
+        if not ready:
+            return None, None
+        total = sum(ep.weight for ep in ready)
+        for ep in ready:
+            ep._current += ep.weight
+        best = min(ready, key=lambda ep: (ep.outstanding / ep.weight, -ep._current))
+        best._current -= total
+        best.outstanding += 1
+        best.requests += 1
+        best.breaker.on_dispatch()
+        return best, None
+
+    def _release(self, endpoint: Endpoint, error: BaseException | None) -> None:
+        endpoint.outstanding -= 1
+        if error is None:
+            endpoint.breaker.on_success()
+            return
+        status = getattr(error, "status_code", None)
+        if is_request_error(error):
+            # 请求本身的问题，不影响 endpoint 健康度；half-open 探测名额需要归还
+            endpoint.breaker.probing = False
+            return
+        endpoint.failures += 1
+        endpoint.breaker.on_failure(
+            time.monotonic(), retry_after=retry_after_seconds(error), rate_limited=status == 429
+        )
+
+    def record_usage(self, endpoint: Endpoint, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> None:
+        with self._lock:
+            endpoint.prompt_tokens += prompt_tokens
+            endpoint.cached_tokens += cached_tokens
+            endpoint.completion_tokens += completion_tokens
+
+    def index(self, endpoint: Endpoint) -> int:
+        return self.endpoints.index(endpoint)
+
+    @contextmanager
+    def lease(self, exclude: set[int] | None = None):
+        """阻塞直到拿到一个可用的 endpoint；with 块内抛出的异常会计入该 endpoint 的熔断器。"""
+        exclude = exclude if exclude is not None else set()
+        with self._cond:
+            endpoint, wait = self._pick(exclude)
+            while endpoint is None:
+                self._cond.wait(timeout=wait)
+                endpoint, wait = self._pick(exclude)
+        error: BaseException | None = None
+        try:
+            yield endpoint
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            with self._cond:
+                self._release(endpoint, error)
+                self._cond.notify_all()
+
+    @asynccontextmanager
+    async def lease_async(self, exclude: set[int] | None = None):
+        exclude = exclude if exclude is not None else set()
+        if self._async_cond is None:
+            self._async_cond = asyncio.Condition()
+        cond = self._async_cond
+        async with cond:
+            while True:
+                with self._lock:
+                    endpoint, wait = self._pick(exclude)
+                if endpoint is not None:
+                    break
+                try:
+                    await asyncio.wait_for(cond.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        error: BaseException | None = None
+        try:
+            yield endpoint
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            with self._lock:
+                self._release(endpoint, error)
+            async with cond:
+                cond.notify_all()
+
+    def summary(self) -> str:
+        with self._lock:
+            return ", ".join(
+                f"{ep.name}: {ep.requests} req/{ep.failures} err ({ep.breaker.state}, output={ep.output_mode}"
+                + (f", cached {ep.cached_tokens}/{ep.prompt_tokens} prompt tokens" if ep.prompt_tokens else "")
+                + ")"
+                for ep in self.endpoints
+            )
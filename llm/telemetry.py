@@ -0,0 +1,132 @@
+"""
+LLM 调用遥测：GPT / AsyncGPT 的每一次尝试（含失败、重试、结构化输出降级）都记录为一条 CallEvent，
+运行结束时汇总为按 endpoint 的统计（p50/p95 延迟、错误率、token 用量、输出 token/s）并写入 JSON。
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+@dataclass
+class CallEvent:
+    endpoint: str
+    model: str
+    # ok / error
+    status: str
+    # 从发出请求到拿到完整响应（或失败）的秒数，不含等待 endpoint 空闲的排队时间
+    latency: float
+    # 本次逻辑调用中的第几次尝试（从 0 开始，结构化输出降级引起的重发也计入）
+    attempt: int
+    output_mode: str = "text"
+    stream: bool = False
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    # 失败时的 HTTP 状态码（无则为 None）与异常类型/信息
+    status_code: int | None = None
+    error: str = ""
+    # 该次失败之后退避等待的秒数
+    backoff: float = 0.0
+    timestamp: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+
+def error_event(
+    endpoint, output_mode: str, latency: float, attempt: int, stream: bool, exc: BaseException
+) -> CallEvent:
+    """由失败的尝试构造事件（endpoint 为 llm.endpoint_pool.Endpoint）。"""
+    return CallEvent(
+        endpoint=endpoint.name,
+        model=endpoint.model,
+        status="error",
+        latency=latency,
+        attempt=attempt,
+        output_mode=output_mode,
+        stream=stream,
+        status_code=getattr(exc, "status_code", None),
+        error=f"{type(exc).__name__}: {exc}"[:500],
+    )
+
+
+def _percentile(sorted_values: list[float], q: float) -> float | None:
+    """最近秩法（nearest-rank）百分位；样本为空时返回 None。"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LlmTelemetry:
+    """线程安全的事件收集器；同一次运行中的 GPT 与 AsyncGPT 可以共用一个实例。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.events: list[CallEvent] = []
+        self.started = time.monotonic()
+
+    def record(self, event: CallEvent) -> CallEvent:
+        with self._lock:
+            self.events.append(event)
+        return event
+
+    def summary(self) -> dict:
+        with self._lock:
+            events = list(self.events)
+        by_endpoint: dict[str, list[CallEvent]] = {}
+        for ev in events:
+            by_endpoint.setdefault(ev.endpoint, []).append(ev)
+        endpoints = {name: self._summarize(evs) for name, evs in by_endpoint.items()}
+        totals = self._summarize(events)
+        totals["wall_seconds"] = round(time.monotonic() - self.started, 3)
+        return {"totals": totals, "endpoints": endpoints}
+
+    @staticmethod
+    def _summarize(events: list[CallEvent]) -> dict:
+        ok = [ev for ev in events if ev.status == "ok"]
+        failed = [ev for ev in events if ev.status != "ok"]
+        latencies = sorted(ev.latency for ev in ok)
+        busy = sum(latencies)
+        completion = sum(ev.completion_tokens for ev in ok)
+        p50 = _percentile(latencies, 50)
+        p95 = _percentile(latencies, 95)
+        return {
+            "models": sorted({ev.model for ev in events}),
+            "attempts": len(events),
+            "ok": len(ok),
+            "errors": len(failed),
+            "error_rate": round(len(failed) / len(events), 4) if events else 0.0,
+            "retries": sum(1 for ev in events if ev.attempt > 0),
+            "latency_p50": round(p50, 3) if p50 is not None else None,
+            "latency_p95": round(p95, 3) if p95 is not None else None,
+            "latency_mean": round(busy / len(latencies), 3) if latencies else None,
+            # 花在失败尝试与退避等待上的时间
+            "failed_seconds": round(sum(ev.latency for ev in failed), 3),
+            "backoff_seconds": round(sum(ev.backoff for ev in events), 3),
+            "prompt_tokens": sum(ev.prompt_tokens for ev in ok),
+            "cached_tokens": sum(ev.cached_tokens for ev in ok),
+            "completion_tokens": completion,
+            "completion_tokens_per_s": round(completion / busy, 2) if busy > 0 else None,
+            "status_codes": {
+                str(code): sum(1 for ev in failed if ev.status_code == code)
+                for code in sorted({ev.status_code for ev in failed}, key=lambda c: (c is None, c or 0))
+            },
+        }
+
+    def write(
+        self, summary_path: str | Path, events_path: str | Path | None = None, extra: dict | None = None
+    ) -> None:
+        """summary 写为 JSON（extra 中的字段一并写入）；events_path 不为空时每次尝试一行写为 JSONL。"""
+        summary_path = Path(summary_path)
+        summary_path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"generated_at": datetime.now(timezone.utc).isoformat(), **self.summary(), **(extra or {})}
+        summary_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        if events_path is not None:
+            with self._lock:
+                lines = [json.dumps(asdict(ev), ensure_ascii=False) for ev in self.events]
+            Path(events_path).write_text("\n".join(lines) + ("\n" if lines else ""), encoding="utf-8")
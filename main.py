@@ -8,7 +8,68 @@ if __name__ == "__main__":
     parser.add_argument("--categories", nargs="+", help="categories", required=True)
     parser.add_argument("--max_paper_num", type=int, help="max_paper_num", default=60)
     parser.add_argument(
-        "--max_entries", type=int, help="max_entries to get from arxiv", default=100
+        "--max_entries",
+        type=int,
+        help="每个分类最多拉取的条目数（分页抓取的安全上限；<=0 表示不设上限，仅由 lookback 阈值决定）",
+        default=100,
+    )
+    parser.add_argument(
+        "--page_size",
+        type=int,
+        default=100,
+        help="arXiv API 每页条目数（默认 100）；自动翻页直到越过 lookback 阈值。",
+    )
+    parser.add_argument(
+        "--fetch_mode",
+        type=str,
+        default="per_category",
+        choices=["per_category", "combined", "oai", "store"],
+        help=(
+            "抓取方式：per_category=每个分类单独查询；combined=用一个 cat:A OR cat:B 查询分页拉取（跨分类论文只下载一次）；"
+            "oai=OAI-PMH 增量收割（只拉取上次成功运行以来的新记录）；"
+            "store=直接从 --paper_store 本地论文库读取时间窗口（不访问 arXiv）。"
+        ),
+    )
+    parser.add_argument(
+        "--paper_store",
+        type=str,
+        default="",
+        help="本地 SQLite 论文元数据库路径（例如 state/papers.sqlite；默认空=关闭）。抓取到的全部条目都会写入。",
+    )
+    parser.add_argument(
+        "--oai_watermark",
+        type=str,
+        default="state/oai_watermark.json",
+        help="fetch_mode=oai 时的收割水位文件（默认 state/oai_watermark.json，邮件发送成功后更新）。",
+    )
+    parser.add_argument(
+        "--fetch_workers",
+        type=int,
+        default=4,
+        help="并发抓取分类的线程数（默认 4）；所有分类共享同一个 arXiv 请求限速器。",
+    )
+    parser.add_argument(
+        "--arxiv_request_interval",
+        type=float,
+        default=3.0,
+        help="相邻两次 arXiv API 请求的最小间隔秒数（默认 3，对应 arXiv 官方建议）。",
+    )
+    parser.add_argument(
+        "--http_cache_dir",
+        type=str,
+        default="",
+        help="arXiv 原始响应的磁盘缓存目录（例如 state/http_cache；默认空=关闭）。同一天重复运行时可复用。",
+    )
+    parser.add_argument(
+        "--http_cache_ttl",
+        type=float,
+        default=6 * 3600,
+        help="缓存快照直接复用的秒数（默认 21600）；过期后用 ETag/If-Modified-Since 做条件请求。",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="离线回放：只读取 http_cache_dir 中的快照，不访问 arXiv（未指定目录时使用 state/http_cache）。",
     )
     parser.add_argument(
         "--lookback_hours",
@@ -20,13 +81,19 @@ if __name__ == "__main__":
         "--include_keywords",
         nargs="+",
         default=None,
-        help="关键词包含过滤（大小写不敏感）。命中规则由 --include_mode 控制。",
+        help='关键词包含过滤（大小写不敏感）。命中规则由 --include_mode 控制；用双引号包裹（如 \'"flow"\'）表示整词/短语匹配。',
     )
     parser.add_argument(
         "--exclude_keywords",
         nargs="+",
         default=None,
-        help="关键词排除过滤（大小写不敏感）。命中任一关键词则剔除。",
+        help="关键词排除过滤（大小写不敏感）。命中任一关键词则剔除；词项语法同 --include_keywords。",
+    )
+    parser.add_argument(
+        "--keyword_expr",
+        type=str,
+        default=None,
+        help='布尔关键词表达式（AND/OR/NOT + 括号），例如 \'(diffusion OR "flow matching") AND NOT "workflow"\'；与 include/exclude 同时生效。',
     )
     parser.add_argument(
         "--include_mode",
@@ -38,8 +105,47 @@ if __name__ == "__main__":
     parser.add_argument(
         "--llm_batch_size",
         type=int,
-        default=5,
-        help="LLM 批处理大小（每次调用处理 N 篇论文，默认 5）。",
+        default=10,
+        help="每次 LLM 调用最多处理的论文数（默认 10）；实际批次按下面的 token 预算自适应打包。",
+    )
+    parser.add_argument(
+        "--llm_input_token_budget",
+        type=int,
+        default=12000,
+        help="单次评分调用的输入 token 预算（含研究兴趣描述与 prompt 模板，默认 12000；<=0 不限制）。",
+    )
+    parser.add_argument(
+        "--llm_output_token_budget",
+        type=int,
+        default=4000,
+        help="单次评分调用的输出 token 预算（默认 4000；<=0 不限制），按每篇 --llm_output_tokens_per_paper 估算。",
+    )
+    parser.add_argument(
+        "--llm_output_tokens_per_paper",
+        type=int,
+        default=300,
+        help="每篇论文评分输出（摘要、四项评分、理由）的预估 token 数（默认 300）。",
+    )
+    parser.add_argument(
+        "--llm_stream",
+        action="store_true",
+        help="流式接收评分输出：每篇论文的结果一生成完就校验并写缓存，输出中途被截断时保留已完成的论文。",
+    )
+    parser.add_argument(
+        "--llm_structured_output",
+        type=str,
+        default="off",
+        choices=["off", "json_schema", "json_object"],
+        help="评分与重排调用使用 response_format 约束输出格式（默认 off）；不支持的 endpoint 自动降级到 json_object/纯文本。",
+    )
+    parser.add_argument(
+        "--llm_format_baseline",
+        type=str,
+        default="",
+        help=(
+            "估算结构化输出避免了多少次格式重试时使用的纯文本基线：每次调用的格式重试率（如 0.15），"
+            "或之前某次纯文本运行的 llm_stats.json 路径；默认空=取 save_dir 历史中最近一份含纯文本调用的 llm_stats.json。"
+        ),
     )
     parser.add_argument(
         "--weight_topic",
@@ -77,6 +183,16 @@ if __name__ == "__main__":
         default="state/seen_ids.json",
         help="已处理论文 ID 的持久化文件路径（用于长窗口去重；默认 state/seen_ids.json；设为空字符串可关闭）。",
     )
+    parser.add_argument(
+        "--seen_backend",
+        type=str,
+        default="auto",
+        choices=["auto", "json", "log", "sqlite", "compact"],
+        help=(
+            "seen_db 存储后端：json=整文件重写（旧格式）；log=追加日志（每次只追加新增行，定期压缩）；"
+            "sqlite=增量插入+按日期范围删除；compact=打包整数 id 的紧凑二进制（.bin，适合多年保留期）；auto=按文件后缀选择（默认）。非 JSON 后端首次创建时自动导入同名 .json。"
+        ),
+    )
     parser.add_argument(
         "--seen_retention_days",
         type=int,
@@ -87,14 +203,38 @@ if __name__ == "__main__":
         "--seen_scope",
         type=str,
         default="base",
-        choices=["base", "version"],
-        help="seen_db 的 ID 粒度：base=去掉 v1/v2 后缀；version=保留版本号。",
+        choices=["base", "version", "content"],
+        help=(
+            "seen_db 的 ID 粒度：base=去掉 v1/v2 后缀；version=保留版本号；"
+            "content=按 base id + 标题/摘要哈希记录，只有内容改动的新版本才会重新送 LLM 评分。"
+        ),
+    )
+    parser.add_argument(
+        "--llm_cache",
+        type=str,
+        default="state/llm_cache.sqlite",
+        help=(
+            "跨运行的 LLM 评分缓存（SQLite；默认 state/llm_cache.sqlite；设为空字符串可关闭）。"
+            "key 为 arXiv id+版本、标题/摘要、研究兴趣描述、模型与 prompt 版本，与 --save 无关。"
+        ),
+    )
+    parser.add_argument(
+        "--llm_cache_ttl_days",
+        type=int,
+        default=90,
+        help="LLM 评分缓存中超过 N 天未被使用的条目会被删除（默认 90；<=0 不按时间淘汰）。",
+    )
+    parser.add_argument(
+        "--llm_cache_max_entries",
+        type=int,
+        default=50000,
+        help="LLM 评分缓存最多保留的条目数，超出时按最近使用时间（LRU）淘汰（默认 50000；<=0 不限）。",
     )
     parser.add_argument(
         "--model",
         nargs="+",
         type=str,
-        help="model（支持多个；当某个 model 调用失败时会按顺序切换）",
+        help="model（支持多个；与 base_url/api_key 组成三元组，请求在各 endpoint 间负载均衡）",
         required=True,
     )
     parser.add_argument(
@@ -132,6 +272,29 @@ if __name__ == "__main__":
     parser.add_argument("--temperature", type=float, help="Temperature", default=0.7)
 
     parser.add_argument("--num_workers", type=int, help="Number of workers", default=4)
+    parser.add_argument(
+        "--llm_weights",
+        type=float,
+        nargs="+",
+        default=None,
+        help="各 endpoint（base_url+api_key+model 三元组）的负载均衡权重；单值对所有 endpoint 生效，默认均为 1。",
+    )
+    parser.add_argument(
+        "--llm_max_inflight",
+        type=int,
+        nargs="+",
+        default=None,
+        help="各 endpoint 同时在途请求数上限（0=不限，默认不限）；单值对所有 endpoint 生效。",
+    )
+    parser.add_argument(
+        "--llm_concurrency",
+        type=int,
+        default=0,
+        help=(
+            "大于 0 时 LLM 批处理改用 asyncio（AsyncOpenAI），最多同时 N 个在途请求，不再受线程数限制；"
+            "默认 0 保持线程池（--num_workers）。"
+        ),
+    )
     parser.add_argument(
         "--title", type=str, help="Title of the email", default="Daily arXiv"
     )
@@ -187,6 +350,29 @@ if __name__ == "__main__":
         args.num_workers,
         args.temperature,
         args.save_dir,
+        fetch_workers=args.fetch_workers,
+        arxiv_request_interval=args.arxiv_request_interval,
+        fetch_mode=args.fetch_mode,
+        page_size=args.page_size,
+        http_cache_dir=args.http_cache_dir.strip() or None,
+        http_cache_ttl=args.http_cache_ttl,
+        offline=args.offline,
+        oai_watermark_path=args.oai_watermark,
+        keyword_expr=args.keyword_expr,
+        paper_store_path=args.paper_store.strip() or None,
+        seen_backend=args.seen_backend,
+        llm_concurrency=args.llm_concurrency,
+        llm_weights=args.llm_weights,
+        llm_max_inflight=args.llm_max_inflight,
+        llm_cache_path=args.llm_cache.strip() or None,
+        llm_cache_ttl_days=args.llm_cache_ttl_days,
+        llm_cache_max_entries=args.llm_cache_max_entries,
+        llm_input_token_budget=args.llm_input_token_budget,
+        llm_output_token_budget=args.llm_output_token_budget,
+        llm_output_tokens_per_paper=args.llm_output_tokens_per_paper,
+        llm_stream=args.llm_stream,
+        llm_structured_output=args.llm_structured_output,
+        llm_format_baseline=args.llm_format_baseline.strip() or None,
     )
 
     arxiv_daily.send_email(
@@ -12,7 +12,7 @@ cd "$(dirname "$0")"
 #
 
 uv run python main.py --categories cs.CV cs.AI \
-  --max_entries 200 \
+  --max_entries 2000 --page_size 200 \
   --base_url "https://api-inference.modelscope.cn/v1" \
   --api_key "${MODELSCOPE_API_KEY:-*}" \
   --model "deepseek-ai/DeepSeek-V3.2" \
@@ -27,7 +27,7 @@ uv run python main.py --categories cs.CV cs.AI \
   --exclude_keywords workflow workflows \
   --include_mode any \
   --seen_db "state/seen_ids.json" --seen_retention_days 30 --seen_scope base \
-  --llm_batch_size 5 \
+  --llm_batch_size 10 --llm_input_token_budget 12000 --llm_output_token_budget 4000 \
   --weight_topic 0.45 --weight_method 0.25 --weight_novelty 0.15 --weight_impact 0.15 \
   --rerank_top_m 30 \
   --num_workers 10 \
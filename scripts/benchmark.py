@@ -0,0 +1,516 @@
+"""
+端到端离线基准：回放录制在磁盘上的 arXiv Atom 响应，在本地模拟 LLM 服务上跑完整的 ArxivDaily 流程
+（抓取解析 → 去重/seen 过滤/缓存查找 → LLM 评分 → Top-M 重排 → 保存 → 渲染邮件，不发送邮件），
+记录各阶段墙钟耗时、峰值内存与每篇论文的 LLM 调用次数，结果写为 JSON，便于在版本之间比较。
+
+录制的数据是按固定种子生成的合成 Atom 响应（标题/摘要长度、作者数、交叉分类比例接近真实数据），
+按 ArxivHttpCache 的格式写入 <work_dir>/feeds/<分类>-n<条数>-p<每页>-s<种子>/，参数不变时重复使用；运行时刻固定在 FEED_ANCHOR，
+因此每次回放的 lookback 窗口、分页与 LLM 输出完全一致。每个规模（及每次重复）在独立的子进程中运行，
+峰值内存互不干扰；模拟 LLM 服务（scripts/mock_llm_server.py）运行在父进程中，不计入被测进程。
+
+示例：
+    python scripts/benchmark.py                                   # 100 / 1000 / 10000 篇
+    python scripts/benchmark.py --sizes 100 1000 --repeat 3 --output bench/v2.json
+    python scripts/benchmark.py --compare bench/v1.json --max_regression 0.2
+"""
+
+import argparse
+from datetime import datetime, timedelta, timezone
+import json
+import os
+from pathlib import Path
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from xml.sax.saxutils import escape
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from mock_llm_server import build_parser as build_mock_parser, make_server  # noqa: E402
+from util.request import ARXIV_API_URL, ArxivHttpCache  # noqa: E402
+
+
+# 录制数据的格式版本：修改下面的生成逻辑时递增，已有的录制会被重新生成
+FEED_FORMAT_VERSION = 1
+# 回放时固定的运行时刻；所有录制条目都相对它生成
+FEED_ANCHOR = datetime(2026, 1, 6, 0, 0, tzinfo=timezone.utc)
+REPORT_SCHEMA_VERSION = 1
+# 参与回归比较的指标（越小越好）
+COMPARE_METRICS = ("wall_seconds", "peak_rss_mib", "llm_calls_per_paper")
+
+_WORDS = (
+    "diffusion flow matching rectified autoregressive transformer guidance classifier-free alignment "
+    "preference reward distillation consistency sampling solver latent tokenizer video image 3D scene "
+    "segmentation detection tracking depth estimation reconstruction radiance field gaussian splatting "
+    "multimodal vision-language instruction benchmark dataset robustness efficient inference quantization "
+    "pruning attention sparse mixture-of-experts contrastive self-supervised pretraining fine-tuning "
+    "adapter low-rank editing inpainting super-resolution restoration generation editing controllable "
+    "temporal spatial semantic geometric physical dynamics policy robot manipulation navigation medical "
+    "remote sensing point cloud stereo optical event camera calibration uncertainty evaluation metric"
+).split()
+_TITLE_OPENERS = ("Towards", "Learning", "Rethinking", "Scaling", "Efficient", "Unified", "Revisiting", "On")
+_SURNAMES = ("Wang", "Li", "Zhang", "Chen", "Liu", "Smith", "Kim", "Müller", "Garcia", "Rossi", "Sato", "Singh")
+_GIVEN = ("Wei", "Jing", "Alex", "Maria", "Hyun", "Yuki", "Priya", "Lukas", "Sofia", "Omar", "Chen", "Ana")
+_CROSS_LISTS = ("cs.LG", "cs.AI", "cs.CL", "cs.RO", "eess.IV")
+_COMMENTS = ("Project page available", "Accepted to CVPR 2026", "Code will be released", "Under review")
+
+
+# ---------------------------------------------------------------------------
+# 录制数据
+# ---------------------------------------------------------------------------
+
+
+def _sentence(rng: random.Random, lo: int, hi: int) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(lo, hi))]
+    return " ".join(words).capitalize() + "."
+
+
+def _atom_entry(rng: random.Random, arxiv_id: str, published: datetime, category: str) -> str:
+    stamp = published.strftime("%Y-%m-%dT%H:%M:%SZ")
+    title = f"{rng.choice(_TITLE_OPENERS)} " + " ".join(rng.choice(_WORDS) for _ in range(rng.randint(5, 11)))
+    # 真实摘要约 150~250 词、带换行缩进
+    abstract = "\n  ".join(_sentence(rng, 12, 28) for _ in range(rng.randint(7, 10)))
+    authors = "".join(
+        f"\n    <author>\n      <name>{rng.choice(_GIVEN)} {rng.choice(_SURNAMES)}</name>\n    </author>"
+        for _ in range(rng.randint(2, 9))
+    )
+    categories = [category] + rng.sample(_CROSS_LISTS, k=rng.choice((0, 0, 1, 2)))
+    category_tags = "".join(
+        f'\n    <category term="{c}" scheme="http://arxiv.org/schemas/atom"/>' for c in categories
+    )
+    comment = ""
+    if rng.random() < 0.6:
+        comment = (
+            f"\n    <arxiv:comment>{rng.randint(8, 30)} pages, {rng.randint(2, 12)} figures. "
+            f"{escape(rng.choice(_COMMENTS))}</arxiv:comment>"
+        )
+    return (
+        "  <entry>\n"
+        f"    <id>http://arxiv.org/abs/{arxiv_id}</id>\n"
+        f"    <updated>{stamp}</updated>\n"
+        f"    <published>{stamp}</published>\n"
+        f"    <title>{escape(title)}</title>\n"
+        f"    <summary>  {escape(abstract)}\n    </summary>{authors}{comment}\n"
+        f'    <link href="http://arxiv.org/abs/{arxiv_id}" rel="alternate" type="text/html"/>\n'
+        f'    <link title="pdf" href="http://arxiv.org/pdf/{arxiv_id}" rel="related" type="application/pdf"/>\n'
+        f'    <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="{category}" '
+        f'scheme="http://arxiv.org/schemas/atom"/>{category_tags}\n'
+        "  </entry>\n"
+    )
+
+
+def _atom_page(search_query: str, total: int, start: int, entries: list[str]) -> bytes:
+    head = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/" '
+        'xmlns:arxiv="http://arxiv.org/schemas/atom">\n'
+        f"  <title>arXiv Query: search_query={escape(search_query)}&amp;start={start}</title>\n"
+        f"  <updated>{FEED_ANCHOR.strftime('%Y-%m-%dT%H:%M:%SZ')}</updated>\n"
+        f"  <opensearch:totalResults>{total}</opensearch:totalResults>\n"
+        f"  <opensearch:startIndex>{start}</opensearch:startIndex>\n"
+        f"  <opensearch:itemsPerPage>{len(entries)}</opensearch:itemsPerPage>\n"
+    )
+    return (head + "".join(entries) + "</feed>\n").encode("utf-8")
+
+
+def record_feeds(feed_dir: Path, size: int, category: str, page_size: int, seed: int) -> dict:
+    """
+    生成一天 size 篇（均匀分布在 FEED_ANCHOR 之前 24 小时内）外加半页更早条目的 Atom 响应，
+    按 get_recent_arxiv_papers 分页时实际发出的查询参数逐页写入 ArxivHttpCache，抓取会像线上一样在越过阈值处停止。
+    manifest 与参数一致时直接复用已有录制。
+    """
+    manifest = {
+        "format_version": FEED_FORMAT_VERSION,
+        "size": size,
+        "category": category,
+        "page_size": page_size,
+        "seed": seed,
+        "anchor": FEED_ANCHOR.isoformat(),
+    }
+    manifest_path = feed_dir / "manifest.json"
+    if manifest_path.exists():
+        try:
+            existing = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            existing = None
+        if existing and {k: existing.get(k) for k in manifest} == manifest:
+            return existing
+    shutil.rmtree(feed_dir, ignore_errors=True)
+
+    rng = random.Random(f"{seed}:{size}:{category}")
+    older = max(1, page_size // 2)
+    total = size + older
+    step = timedelta(hours=24) / size
+    yymm = (FEED_ANCHOR - timedelta(days=1)).strftime("%y%m")
+    search_query = f"cat:{category}"
+    cache = ArxivHttpCache(cache_dir=feed_dir, offline=True)
+    nbytes = 0
+    pages = 0
+    for start in range(0, total, page_size):
+        entries = []
+        for i in range(start, min(start + page_size, total)):
+            if i < size:
+                published = FEED_ANCHOR - step * (i + 0.5)
+            else:
+                published = FEED_ANCHOR - timedelta(hours=24, minutes=i - size + 1)
+            entries.append(_atom_entry(rng, f"{yymm}.{total - i:05d}v1", published, category))
+        params = {
+            "search_query": search_query,
+            "start": start,
+            "max_results": page_size,
+            "sortBy": "submittedDate",
+            "sortOrder": "descending",
+        }
+        body = _atom_page(search_query, total, start, entries)
+        cache.store(ARXIV_API_URL, params, body)
+        nbytes += len(body)
+        pages += 1
+
+    manifest.update({"entries": total, "pages": pages, "bytes": nbytes})
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return manifest
+
+
+# ---------------------------------------------------------------------------
+# 被测子进程
+# ---------------------------------------------------------------------------
+
+
+def _peak_rss_mib() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位为 KiB，macOS 上为字节
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_worker(config: dict) -> dict:
+    """在当前进程中跑一遍完整流程，返回本次的测量结果。"""
+    from arxiv_daily import ArxivDaily
+
+    if config["trace_memory"]:
+        tracemalloc.start()
+    work = Path(config["run_dir"])
+    description = (REPO_ROOT / "description.txt").read_text(encoding="utf-8")
+
+    started = time.perf_counter()
+    daily = ArxivDaily(
+        [config["category"]],
+        0,
+        config["max_paper_num"],
+        24,
+        None,
+        None,
+        "any",
+        config["llm_batch_size"],
+        0.45,
+        0.25,
+        0.15,
+        0.15,
+        config["rerank_top_m"],
+        str(work / "seen_ids.json"),
+        30,
+        "base",
+        "mock-model",
+        config["base_url"],
+        "mock",
+        description,
+        config["num_workers"],
+        0.7,
+        str(work / "history"),
+        page_size=config["page_size"],
+        http_cache_dir=config["feed_dir"],
+        offline=True,
+        llm_cache_path=str(work / "llm_cache.sqlite"),
+        llm_concurrency=config["llm_concurrency"],
+        llm_stream=config["llm_stream"],
+        llm_structured_output=config["llm_structured_output"],
+        now_utc=FEED_ANCHOR,
+    )
+    setup = time.perf_counter() - started - daily.stage_times.get("fetch", 0.0)
+    recommendations = daily.get_recommendation()
+    daily.render_email(recommendations)
+    wall = time.perf_counter() - started
+
+    fetched = len({p["arXiv_id"] for papers in daily.papers.values() for p in papers})
+    totals = daily.model.telemetry.summary()["totals"]
+    stages = {"setup": setup, **daily.stage_times}
+    result = {
+        "papers_fetched": fetched,
+        "papers_failed": len(daily.failed_papers),
+        "recommendations": len(recommendations),
+        "wall_seconds": round(wall, 3),
+        "stages": {name: round(seconds, 3) for name, seconds in stages.items()},
+        "peak_rss_mib": _peak_rss_mib(),
+        "stage_peak_mib": (
+            {name: round(peak / 2**20, 1) for name, peak in daily.stage_peak_memory.items()}
+            if config["trace_memory"]
+            else None
+        ),
+        "fetch": {
+            "pages": daily.fetch_stats.pages,
+            "entries": daily.fetch_stats.entries,
+            "bytes": daily.fetch_stats.bytes,
+        },
+        "llm": {
+            key: totals[key]
+            for key in ("attempts", "ok", "errors", "retries", "prompt_tokens", "cached_tokens", "completion_tokens")
+        },
+    }
+    result["llm_calls_per_paper"] = round(totals["attempts"] / fetched, 4) if fetched else 0.0
+    return result
+
+
+# ---------------------------------------------------------------------------
+# 父进程：调度、汇总与比较
+# ---------------------------------------------------------------------------
+
+
+def _git_info() -> dict:
+    def git(*args) -> str:
+        try:
+            out = subprocess.run(
+                ["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, timeout=30, check=True
+            )
+            return out.stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+
+    return {
+        "commit": git("rev-parse", "HEAD") or None,
+        "describe": git("describe", "--always", "--dirty") or None,
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def _start_mock(args: argparse.Namespace):
+    mock_args = build_mock_parser().parse_args(
+        [
+            "--port", "0",
+            "--latency", str(args.llm_latency),
+            "--per_paper_latency", str(args.llm_per_paper_latency),
+            "--seed", str(args.seed),
+        ]
+    )
+    server, state = make_server(mock_args)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, state
+
+
+def run_once(args: argparse.Namespace, size: int, feed_dir: Path, log_path: Path) -> dict:
+    """在独立子进程中跑一次，模拟 LLM 服务每次重新启动（计数与前缀缓存从零开始）。"""
+    server, state = _start_mock(args)
+    run_dir = Path(tempfile.mkdtemp(prefix=f"arxiv-bench-{size}-"))
+    try:
+        config = {
+            "category": args.category,
+            "feed_dir": str(feed_dir),
+            "page_size": args.page_size,
+            "run_dir": str(run_dir),
+            "base_url": f"http://127.0.0.1:{server.server_port}/v1",
+            "max_paper_num": args.max_paper_num,
+            "llm_batch_size": args.llm_batch_size,
+            "rerank_top_m": args.rerank_top_m,
+            "num_workers": args.num_workers,
+            "llm_concurrency": args.llm_concurrency,
+            "llm_stream": args.llm_stream,
+            "llm_structured_output": args.llm_structured_output,
+            "trace_memory": args.trace_memory,
+        }
+        config_path = run_dir / "config.json"
+        result_path = run_dir / "result.json"
+        config_path.write_text(json.dumps(config), encoding="utf-8")
+        with open(log_path, "w", encoding="utf-8") as log:
+            proc = subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()), "--worker", str(config_path), str(result_path)],
+                cwd=REPO_ROOT,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+        if proc.returncode != 0 or not result_path.exists():
+            raise RuntimeError(f"规模 {size} 的基准运行失败（退出码 {proc.returncode}），日志见 {log_path}")
+        result = json.loads(result_path.read_text(encoding="utf-8"))
+        stats = state.snapshot()
+        result["llm"]["scoring_calls"] = stats.get("scoring_calls", 0)
+        result["llm"]["rerank_calls"] = stats.get("rerank_calls", 0)
+        return result
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+def _median_nested(values: list):
+    """逐字段取中位数（数值字段）；非数值字段取第一次运行的值。"""
+    first = values[0]
+    if isinstance(first, dict):
+        return {k: _median_nested([v[k] for v in values if isinstance(v, dict) and k in v]) for k in first}
+    if isinstance(first, (int, float)) and not isinstance(first, bool):
+        median = statistics.median(values)
+        return round(median, 4) if isinstance(median, float) else median
+    return first
+
+
+def summarize_runs(size: int, runs: list[dict]) -> dict:
+    summary = _median_nested(runs)
+    # 峰值内存取各次运行中的最大值
+    summary["peak_rss_mib"] = max((r["peak_rss_mib"] for r in runs if r["peak_rss_mib"] is not None), default=None)
+    return {"size": size, "repeat": len(runs), **summary, "runs": runs}
+
+
+def compare_reports(old: dict, new: dict, max_regression: float) -> list[str]:
+    """打印两份报告中同规模结果的变化；返回超出 max_regression（相对变化）的回归项。"""
+    old_by_size = {r["size"]: r for r in old.get("results", [])}
+    regressions = []
+    base = (old.get("git") or {}).get("describe") or "baseline"
+    print(f"\nCompared with {base}:")
+    old_config, new_config = old.get("config", {}), new.get("config", {})
+    differs = [k for k in new_config if k not in ("sizes", "repeat") and old_config.get(k) != new_config[k]]
+    if old.get("feed_format_version") != new.get("feed_format_version"):
+        differs.append("feed_format_version")
+    if differs:
+        print(f"  note: runs used different settings ({', '.join(differs)}), numbers are not directly comparable")
+    for result in new["results"]:
+        prev = old_by_size.get(result["size"])
+        if prev is None:
+            print(f"  n={result['size']}: no baseline result")
+            continue
+        rows = [(m, prev.get(m), result.get(m)) for m in COMPARE_METRICS]
+        rows += [
+            (f"stages.{name}", prev.get("stages", {}).get(name), seconds)
+            for name, seconds in result.get("stages", {}).items()
+        ]
+        for metric, before, after in rows:
+            if not isinstance(before, (int, float)) or not isinstance(after, (int, float)):
+                continue
+            change = (after - before) / before if before else 0.0
+            flag = ""
+            if metric in COMPARE_METRICS and change > max_regression:
+                flag = "  <-- regression"
+                regressions.append(f"n={result['size']} {metric}: {before} -> {after} ({change:+.1%})")
+            print(f"  n={result['size']:<6} {metric:<24} {before:>10} -> {after:<10} {change:+7.1%}{flag}")
+    return regressions
+
+
+def _print_table(results: list[dict]) -> None:
+    stage_names = list(dict.fromkeys(name for r in results for name in r["stages"]))
+    header = ["size", "wall_s", *stage_names, "peak_MiB", "calls/paper", "failed"]
+    print("\n" + " | ".join(header))
+    for r in results:
+        row = [
+            str(r["size"]),
+            f"{r['wall_seconds']:.2f}",
+            *(f"{r['stages'].get(name, 0.0):.2f}" for name in stage_names),
+            str(r["peak_rss_mib"]),
+            f"{r['llm_calls_per_paper']:.3f}",
+            str(r["papers_failed"]),
+        ]
+        print(" | ".join(row))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="端到端离线基准：回放录制的 arXiv 响应 + 本地模拟 LLM。")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="每天的条目数（默认 100 1000 10000）")
+    parser.add_argument("--repeat", type=int, default=1, help="每个规模重复运行次数，结果取中位数（默认 1）")
+    parser.add_argument("--work_dir", type=str, default="state/benchmark", help="录制数据与日志目录（默认 state/benchmark）")
+    parser.add_argument("--output", type=str, default="", help="结果 JSON 路径（默认 <work_dir>/results/<时间>-<commit>.json）")
+    parser.add_argument("--compare", type=str, default="", help="与之前的结果 JSON 比较各规模的耗时/内存/调用次数")
+    parser.add_argument(
+        "--max_regression",
+        type=float,
+        default=0.0,
+        help="配合 --compare：总耗时/峰值内存/每篇调用次数的相对增幅超过该值时以退出码 1 结束（<=0 只打印不判定）",
+    )
+    parser.add_argument("--category", type=str, default="cs.CV")
+    parser.add_argument("--page_size", type=int, default=100, help="arXiv 每页条目数（与 main.py 默认一致）")
+    parser.add_argument("--seed", type=int, default=0, help="录制数据与模拟服务的随机数种子")
+    parser.add_argument("--max_paper_num", type=int, default=60)
+    parser.add_argument("--llm_batch_size", type=int, default=10)
+    parser.add_argument("--rerank_top_m", type=int, default=30)
+    parser.add_argument("--num_workers", type=int, default=4)
+    parser.add_argument("--llm_concurrency", type=int, default=0, help="同 main.py --llm_concurrency（>0 走 asyncio）")
+    parser.add_argument("--llm_stream", action="store_true")
+    parser.add_argument("--llm_structured_output", type=str, default="off", choices=["off", "json_schema", "json_object"])
+    parser.add_argument("--llm_latency", type=float, default=0.0, help="模拟 LLM 每次调用的延迟（秒，默认 0：只测本地开销）")
+    parser.add_argument("--llm_per_paper_latency", type=float, default=0.0, help="模拟 LLM 每篇论文额外的生成耗时（秒）")
+    parser.add_argument(
+        "--trace_memory",
+        action="store_true",
+        help="用 tracemalloc 记录各阶段的 Python 内存峰值（明显拖慢运行，耗时数据仅供参考）",
+    )
+    parser.add_argument("--worker", nargs=2, metavar=("CONFIG", "RESULT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        config_path, result_path = args.worker
+        result = run_worker(json.loads(Path(config_path).read_text(encoding="utf-8")))
+        Path(result_path).write_text(json.dumps(result, ensure_ascii=False), encoding="utf-8")
+        return 0
+
+    work_dir = Path(args.work_dir)
+    if not work_dir.is_absolute():
+        work_dir = REPO_ROOT / work_dir
+    git = _git_info()
+    results = []
+    for size in args.sizes:
+        feed_dir = work_dir / "feeds" / f"{args.category}-n{size}-p{args.page_size}-s{args.seed}"
+        manifest = record_feeds(feed_dir, size, args.category, args.page_size, args.seed)
+        print(f"n={size}: replaying {manifest['pages']} recorded pages ({manifest['bytes'] / 2**20:.1f} MiB) from {feed_dir}")
+        runs = []
+        for i in range(max(1, args.repeat)):
+            log_path = work_dir / "logs" / f"n{size}-run{i + 1}.log"
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            run = run_once(args, size, feed_dir, log_path)
+            print(
+                f"  run {i + 1}: {run['wall_seconds']:.2f}s, peak {run['peak_rss_mib']} MiB, "
+                f"{run['llm']['attempts']} LLM calls for {run['papers_fetched']} papers"
+            )
+            runs.append(run)
+        results.append(summarize_runs(size, runs))
+
+    report = {
+        "schema_version": REPORT_SCHEMA_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git": git,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("worker", "output", "compare", "max_regression", "work_dir")},
+        "feed_format_version": FEED_FORMAT_VERSION,
+        "results": results,
+    }
+    if args.output:
+        output = Path(args.output)
+    else:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = work_dir / "results" / f"{stamp}-{(git['commit'] or 'nogit')[:10]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    _print_table(results)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare_reports(baseline, report, args.max_regression)
+        if args.max_regression > 0 and regressions:
+            print("\nRegressions over threshold:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,367 @@
+"""
+本地 OpenAI 兼容的 chat.completions 模拟服务，用于在没有网络/不消耗 API 额度的情况下压测整条流程。
+
+对 prompt 中出现的每篇论文返回符合格式的评分/重排 JSON（分数由 arXiv id 决定，多次运行结果一致），
+并可配置延迟、随机 5xx、429 突发/限流、格式错误的输出；支持流式（SSE）、response_format 与 usage（含模拟的前缀缓存命中）。
+
+示例：
+    python scripts/mock_llm_server.py --port 8000 --latency 1.5 --error_rate 0.05 --malformed_rate 0.1
+    python main.py ... --base_url http://127.0.0.1:8000/v1 --api_key mock --model mock-model
+多个 endpoint 可以用不同端口各起一个实例，或共用一个实例、用不同的路径前缀（如 http://127.0.0.1:8000/a/v1）。
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+_PAYLOAD_MARKER = "输入论文 JSON 数组如下："
+_ID_RE = re.compile(r'"arXiv_id":\s*"([^"]+)"')
+_MALFORMED_KINDS = ("code_fence", "prose", "missing_paper", "bad_score", "truncated")
+
+
+def _stable_int(text: str, mod: int) -> int:
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16) % mod
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def extract_paper_ids(text: str) -> list[str]:
+    """优先解析 payload 标记之后的 JSON 数组；解析不了时退回到正则匹配（跳过模板里的 "..."）。"""
+    start = text.find(_PAYLOAD_MARKER)
+    if start >= 0:
+        bracket = text.find("[", start)
+        if bracket >= 0:
+            try:
+                items, _ = json.JSONDecoder().raw_decode(text[bracket:])
+                return [str(it["arXiv_id"]) for it in items if isinstance(it, dict) and it.get("arXiv_id")]
+            except (ValueError, KeyError, TypeError):
+                pass
+    return [i for i in _ID_RE.findall(text) if i != "..."]
+
+
+def scoring_items(ids: list[str]) -> list[dict]:
+    items = []
+    for arxiv_id in ids:
+        scores = {k: _stable_int(f"{k}:{arxiv_id}", 11) for k in ("topic", "method", "novelty", "impact")}
+        items.append(
+            {
+                "arXiv_id": arxiv_id,
+                "summary": f"模拟摘要：{arxiv_id} 的主要内容。",
+                "scores": scores,
+                "recommend_reason": "模拟推荐理由。",
+                "key_contribution": "模拟关键贡献。",
+            }
+        )
+    return items
+
+
+def rerank_items(ids: list[str]) -> list[dict]:
+    items = [{"arXiv_id": i, "score_100": _stable_int(f"rerank:{i}", 101), "reason": "模拟排序理由。"} for i in ids]
+    return sorted(items, key=lambda it: it["score_100"], reverse=True)
+
+
+class MockState:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.counts: dict[str, int] = {}
+        self.prefixes: set[str] = set()
+        self.inflight = 0
+        self.peak_inflight = 0
+        self._tokens = float(args.rps_limit)
+        self._refill = time.monotonic()
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + n
+
+    def random(self) -> float:
+        with self.lock:
+            return self.rng.random()
+
+    def latency(self, n_papers: int) -> float:
+        args = self.args
+        with self.lock:
+            base = max(0.0, self.rng.gauss(args.latency, args.latency_jitter)) if args.latency_jitter else args.latency
+        return base + args.per_paper_latency * n_papers
+
+    def choice(self, seq):
+        with self.lock:
+            return self.rng.choice(seq)
+
+    def rate_limited(self) -> float | None:
+        """返回需要客户端等待的秒数（即 Retry-After）；None 表示放行。"""
+        args = self.args
+        now = time.monotonic()
+        if args.burst_period > 0 and args.burst_duration > 0:
+            phase = (now - self.started) % args.burst_period
+            if phase < args.burst_duration:
+                return args.burst_duration - phase
+        if args.rps_limit > 0:
+            with self.lock:
+                self._tokens = min(args.rps_limit, self._tokens + (now - self._refill) * args.rps_limit)
+                self._refill = now
+                if self._tokens < 1.0:
+                    return (1.0 - self._tokens) / args.rps_limit
+                self._tokens -= 1.0
+        return None
+
+    def cached_tokens(self, prefix: str) -> int:
+        """同一个 system 前缀第二次出现时，按其长度模拟服务端前缀缓存命中。"""
+        if not prefix:
+            return 0
+        with self.lock:
+            hit = prefix in self.prefixes
+            self.prefixes.add(prefix)
+        return len(prefix) // 4 if hit else 0
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "uptime_seconds": round(time.monotonic() - self.started, 3),
+                "peak_inflight": self.peak_inflight,
+                "inflight": self.inflight,
+                **dict(sorted(self.counts.items())),
+            }
+
+
+def make_handler(state: MockState):
+    args = state.args
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *log_args):
+            if args.verbose:
+                super().log_message(format, *log_args)
+
+        def _send_json(self, status: int, payload: dict, headers: dict | None = None) -> None:
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _error(self, status: int, message: str, headers: dict | None = None) -> None:
+            state.count(f"status_{status}")
+            self._send_json(status, {"error": {"message": message, "type": "mock_error", "code": status}}, headers)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._send_json(200, {"object": "list", "data": [{"id": args.model, "object": "model"}]})
+            elif self.path.rstrip("/").endswith("/stats"):
+                self._send_json(200, state.snapshot())
+            else:
+                self._error(404, f"unknown path {self.path}")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw_body = self.rfile.read(length)
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self._error(404, f"unknown path {self.path}")
+            try:
+                body = json.loads(raw_body)
+            except ValueError:
+                return self._error(400, "request body is not JSON")
+            state.count("requests")
+            with state.lock:
+                state.inflight += 1
+                state.peak_inflight = max(state.peak_inflight, state.inflight)
+            try:
+                self._complete(body)
+            finally:
+                with state.lock:
+                    state.inflight -= 1
+
+        def _complete(self, body: dict) -> None:
+            retry_after = state.rate_limited()
+            if retry_after is not None:
+                return self._error(429, "rate limited (mock)", {"Retry-After": f"{max(retry_after, 0.05):.2f}"})
+            if args.error_rate > 0 and state.random() < args.error_rate:
+                time.sleep(args.latency * state.random())
+                return self._error(500, "internal error (mock)")
+
+            response_format = (body.get("response_format") or {}).get("type")
+            if response_format and response_format not in args.response_formats:
+                return self._error(400, f"response_format {response_format} is not supported")
+            stream = bool(body.get("stream"))
+            if stream and body.get("stream_options") and args.no_stream_options:
+                return self._error(400, "stream_options is not supported")
+
+            messages = body.get("messages") or []
+            texts = [_message_text(m) for m in messages]
+            system = "".join(t for m, t in zip(messages, texts) if m.get("role") == "system")
+            user = texts[-1] if texts else ""
+            is_rerank = "score_100" in "".join(texts)
+            ids = extract_paper_ids(user)
+            items = rerank_items(ids) if is_rerank else scoring_items(ids)
+            state.count("rerank_calls" if is_rerank else "scoring_calls")
+            state.count("papers", len(ids))
+
+            malformed = None
+            if ids and args.malformed_rate > 0 and state.random() < args.malformed_rate:
+                malformed = state.choice(_MALFORMED_KINDS)
+                state.count(f"malformed_{malformed}")
+                if malformed == "missing_paper" and len(items) > 1:
+                    items = items[:-1]
+                elif malformed == "bad_score":
+                    first = items[0]
+                    if is_rerank:
+                        first["score_100"] = "high"
+                    else:
+                        first["scores"]["topic"] = "high"
+
+            if response_format:
+                content = json.dumps({"ranking" if is_rerank else "papers": items}, ensure_ascii=False)
+            else:
+                content = json.dumps(items, ensure_ascii=False, indent=2)
+            if malformed == "code_fence":
+                content = f"```json\n{content}\n```"
+            elif malformed == "prose":
+                content = "好的，以下是评分结果：\n" + content
+            elif malformed == "truncated":
+                content = content[: max(1, len(content) // 2)]
+
+            prompt_tokens = sum(len(t) for t in texts) // 4
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4,
+                "prompt_tokens_details": {"cached_tokens": state.cached_tokens(system)},
+            }
+            latency = state.latency(len(ids))
+            if stream:
+                return self._stream(body, content, usage, latency)
+            time.sleep(latency)
+            self._send_json(
+                200,
+                {
+                    "id": f"mock-{time.time_ns()}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", args.model),
+                    "choices": [
+                        {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                    ],
+                    "usage": usage,
+                },
+            )
+
+        def _stream(self, body: dict, content: str, usage: dict, latency: float) -> None:
+            """SSE：先等待约 1/4 的延迟（首 token），其余延迟均摊到各个 chunk 上。"""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            chunks = [content[i : i + args.stream_chunk_chars] for i in range(0, len(content), args.stream_chunk_chars)]
+            time.sleep(latency / 4)
+            per_chunk = (latency * 3 / 4) / max(1, len(chunks))
+            base = {"id": f"mock-{time.time_ns()}", "object": "chat.completion.chunk", "created": int(time.time())}
+            base["model"] = body.get("model", args.model)
+            try:
+                for i, piece in enumerate(chunks):
+                    delta = {"content": piece} if i else {"role": "assistant", "content": piece}
+                    event = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    if per_chunk:
+                        time.sleep(per_chunk)
+                final = {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+                self.wfile.write(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    self.wfile.write(f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n".encode("utf-8"))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # 客户端提前断开（例如流式解析发现格式错误后主动中止）
+                state.count("client_aborts")
+
+    return Handler
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容 chat.completions 模拟服务（离线压测用）。")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", type=str, default="mock-model", help="/v1/models 返回的模型名（请求中的模型名不做校验）")
+    parser.add_argument("--latency", type=float, default=0.5, help="每次调用的基础延迟（秒，默认 0.5）")
+    parser.add_argument("--latency_jitter", type=float, default=0.0, help="延迟的高斯抖动标准差（秒，默认 0）")
+    parser.add_argument("--per_paper_latency", type=float, default=0.0, help="每篇论文额外增加的生成耗时（秒，默认 0）")
+    parser.add_argument("--error_rate", type=float, default=0.0, help="随机返回 500 的概率（默认 0）")
+    parser.add_argument("--rps_limit", type=float, default=0.0, help="每秒请求数上限，超出返回 429 + Retry-After（<=0 不限）")
+    parser.add_argument(
+        "--burst_period",
+        type=float,
+        default=0.0,
+        help="429 突发的周期（秒）：每个周期开头的 --burst_duration 秒内所有请求都返回 429（<=0 关闭）",
+    )
+    parser.add_argument("--burst_duration", type=float, default=0.0, help="每次 429 突发持续的秒数")
+    parser.add_argument(
+        "--malformed_rate",
+        type=float,
+        default=0.0,
+        help=f"返回格式错误输出的概率（随机取 {'/'.join(_MALFORMED_KINDS)}，默认 0）",
+    )
+    parser.add_argument(
+        "--response_formats",
+        nargs="*",
+        default=["json_schema", "json_object"],
+        help="支持的 response_format 类型，其余类型返回 400（传空列表模拟不支持结构化输出的服务）",
+    )
+    parser.add_argument("--no_stream_options", action="store_true", help="模拟不支持 stream_options 的服务（返回 400）")
+    parser.add_argument("--stream_chunk_chars", type=int, default=24, help="流式输出每个 chunk 的字符数（默认 24）")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子（错误/格式错误/抖动可复现）")
+    parser.add_argument("--verbose", action="store_true", help="打印每个请求的访问日志")
+    return parser
+
+
+class MockHTTPServer(ThreadingHTTPServer):
+    # 压测时并发连接可能很多，调大监听队列（只作用于本服务，不修改标准库的类）
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def make_server(args: argparse.Namespace) -> tuple[MockHTTPServer, MockState]:
+    """按参数创建（尚未开始监听循环的）服务；port=0 时由系统分配端口，见 server.server_port。"""
+    args.stream_chunk_chars = max(1, args.stream_chunk_chars)
+    state = MockState(args)
+    server = MockHTTPServer((args.host, args.port), make_handler(state))
+    return server, state
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+    server, state = make_server(args)
+    print(f"Mock LLM server listening on http://{args.host}:{server.server_port}/v1 (stats: GET /v1/stats)")
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(state.snapshot(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,7 +6,13 @@ import sys
 REPO_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(REPO_ROOT))
 
-from util.request import get_recent_arxiv_papers  # noqa: E402
+from util.rate_limit import TokenBucket  # noqa: E402
+from util.request import (  # noqa: E402
+    ARXIV_REQUEST_INTERVAL,
+    FetchStats,
+    get_arxiv_session,
+    get_recent_arxiv_papers,
+)
 
 
 def main() -> int:
@@ -14,7 +20,8 @@ def main() -> int:
         description="检查点：仅测试 arXiv 抓取（不做关键词过滤、不调用 LLM）。"
     )
     parser.add_argument("--categories", nargs="+", required=True, help="例如 cs.CV cs.AI")
-    parser.add_argument("--max_entries", type=int, default=50, help="每个分类最多拉取条目数")
+    parser.add_argument("--max_entries", type=int, default=50, help="每个分类最多拉取条目数（<=0 不限）")
+    parser.add_argument("--page_size", type=int, default=50, help="每页条目数（自动翻页）")
     parser.add_argument(
         "--lookback_hours",
         type=int,
@@ -27,6 +34,11 @@ def main() -> int:
     now_utc = datetime.now(timezone.utc)
     print(f"UTC 当前时间：{now_utc.isoformat()}")
 
+    # 与主流程相同：预热共享的连接池 Session，各分类复用同一连接 + 共享限速器（重试同样经过限速器）
+    get_arxiv_session()
+    rate_limiter = TokenBucket.from_interval(ARXIV_REQUEST_INTERVAL)
+    stats = FetchStats()
+
     total = 0
     for category in args.categories:
         print(f"\n=== 分类 {category} ===")
@@ -34,11 +46,14 @@ def main() -> int:
             papers = get_recent_arxiv_papers(
                 category=category,
                 max_results=args.max_entries,
+                page_size=args.page_size,
                 lookback_hours=args.lookback_hours,
                 now_utc=now_utc,
                 include_keywords=None,
                 exclude_keywords=None,
                 include_mode="any",
+                rate_limiter=rate_limiter,
+                stats=stats,
             )
         except Exception as e:
             print(f"抓取失败：{e}")
@@ -53,6 +68,7 @@ def main() -> int:
             print(f"{i}. [{arxiv_id}] {published} {title}")
 
     print(f"\n总计抓取到 {total} 篇（跨 {len(args.categories)} 个分类）")
+    print(f"共请求 {stats.pages} 页，读取 {stats.bytes / 1024:.1f} KiB")
     return 0
 
 
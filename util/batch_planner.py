@@ -0,0 +1,63 @@
+"""
+按 token 预算打包 LLM 评分批次：短摘要多装几篇（摊薄每次重复发送研究兴趣描述的开销），
+长摘要少装几篇（避免超出上下文或输出被截断导致 JSON 校验失败）。
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    不依赖分词器的 token 粗估：CJK 字符按 1 token/字，其余按 3.5 字符/token。
+    对英文摘要通常比 BPE 分词器的实际值略高（偏保守），足以用来控制批次大小。
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 3.5)
+
+
+@dataclass
+class TokenBudgetPlanner:
+    """
+    overhead_tokens：不含论文的 prompt（模板 + 研究兴趣描述）的 token 数；
+    input_budget / output_budget：单次调用的输入 / 输出 token 上限（<=0 表示不限制该项）；
+    output_tokens_per_paper：每篇论文输出（summary、评分、理由）的预估 token 数；
+    max_batch_size：每批最多论文数（即 --llm_batch_size）。
+    """
+
+    overhead_tokens: int
+    input_budget: int = 12000
+    output_budget: int = 4000
+    output_tokens_per_paper: int = 300
+    max_batch_size: int = 10
+
+    def plan(self, papers: list[dict], paper_tokens: list[int]) -> list[list[dict]]:
+        """按原顺序贪心装箱；单篇就超预算的论文单独成批。"""
+        batches: list[list[dict]] = []
+        current: list[dict] = []
+        used = self.overhead_tokens
+        for paper, tokens in zip(papers, paper_tokens):
+            fits = (
+                len(current) < self.max_batch_size
+                and (self.input_budget <= 0 or used + tokens <= self.input_budget)
+                and (
+                    self.output_budget <= 0
+                    or (len(current) + 1) * self.output_tokens_per_paper <= self.output_budget
+                )
+            )
+            if current and not fits:
+                batches.append(current)
+                current, used = [], self.overhead_tokens
+            current.append(paper)
+            used += tokens
+        if current:
+            batches.append(current)
+        return batches
@@ -0,0 +1,160 @@
+"""
+增量 JSON 数组解析：LLM 流式输出一段 `[{...}, {...}, ...]` 时，每个顶层对象一闭合就立即交给调用方，
+不必等整段输出结束；输出被截断时，已经闭合的对象依然可用。
+
+只在顶层做括号/字符串状态跟踪，对象本身仍交给 json.loads 解析，因此每个字符只扫描一次。
+"""
+
+from __future__ import annotations
+
+import json
+
+
+class JsonArrayStream:
+    """
+    用法：
+        parser = JsonArrayStream(key="papers")
+        for chunk in stream:
+            for item in parser.feed(chunk):
+                ...
+
+    输出格式明显不对（数组前出现正文、元素不是对象、对象无法解析）时 feed() 抛出 ValueError，
+    调用方可以据此提前中断流式请求。允许数组前有 ```json 代码块标记；结构化输出模式下顶层必须是对象，
+    因此也接受 {"papers": [...]} 这样只包一层的数组：取 key 字段的数组（key 为 None 时取第一个数组字段），
+    字符串里的括号不影响定位。顶层对象本身带 arXiv_id 时（只有一篇论文），视为只有这一个元素的数组。
+    """
+
+    def __init__(self, key: str | None = None) -> None:
+        self.key = key
+        self._buf = ""
+        self._pos = 0
+        # 当前对象在 _buf 中的起点；-1 表示不在顶层对象内
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.started = False
+        self._wrapped = False
+        # 外层对象（数组之前）的扫描状态：对象起点、当前字符串起点、是否在等待字段名、最近一个字段名
+        self._outer = -1
+        self._str_start = -1
+        self._expect_key = False
+        self._last_key: str | None = None
+        self.done = False
+        self.count = 0
+
+    def _scan_wrapper(self, buf: str, i: int, items: list) -> int:
+        """在外层对象内扫描到目标数组的 `[` 为止；返回下一个待扫描的位置。对象闭合时按单篇论文处理。"""
+        ch = buf[i]
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if self._depth == 1 and self._expect_key:
+                    self._last_key = json.loads(buf[self._str_start : i + 1])
+                    self._expect_key = False
+        elif ch == '"':
+            self._in_string = True
+            self._str_start = i
+        elif ch == "[" and self._depth == 1 and (self.key is None or self._last_key == self.key):
+            self.started = True
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                try:
+                    obj = json.loads(buf[self._outer : i + 1])
+                except ValueError as e:
+                    raise ValueError(f"顶层对象无法解析（{e}）") from e
+                if not (isinstance(obj, dict) and "arXiv_id" in obj):
+                    raise ValueError(f"顶层对象中没有 {self.key or '数组'} 字段")
+                items.append(obj)
+                self.count += 1
+                self.done = True
+        elif ch == "," and self._depth == 1:
+            self._expect_key = True
+            self._last_key = None
+        return i + 1
+
+    def feed(self, text: str) -> list:
+        if self.done or not text:
+            return []
+        self._buf += text
+        items = []
+        buf = self._buf
+        i = self._pos
+        n = len(buf)
+        while i < n:
+            ch = buf[i]
+            if not self.started:
+                if self._wrapped:
+                    # 外层对象的字段部分（如 "papers":），找到目标数组为止
+                    i = self._scan_wrapper(buf, i, items)
+                    if self.done:
+                        break
+                    continue
+                if ch == "[":
+                    self.started = True
+                elif ch == "{":
+                    self._wrapped = True
+                    self._outer = i
+                    self._depth = 1
+                    self._expect_key = True
+                elif ch == "`":
+                    # 跳过 ``` 与紧随其后的语言标记（如 json），标记需在同一行内完整到达
+                    end = buf.find("\n", i)
+                    if end < 0:
+                        break
+                    i = end
+                elif not ch.isspace():
+                    raise ValueError(f"JSON 数组之前出现了意外的字符 {ch!r}")
+            elif self._start < 0:
+                if ch == "{":
+                    self._start = i
+                    self._depth = 1
+                elif ch == "]":
+                    self.done = True
+                    i += 1
+                    break
+                elif ch != "," and not ch.isspace():
+                    raise ValueError(f"数组元素不是对象（意外的字符 {ch!r}）")
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        items.append(json.loads(buf[self._start : i + 1]))
+                    except ValueError as e:
+                        raise ValueError(f"第 {self.count + 1} 个对象无法解析（{e}）") from e
+                    self.count += 1
+                    self._start = -1
+            i += 1
+        # 丢掉已经消费的前缀，避免长输出时缓冲区反复拼接；数组之前的外层对象要整体保留（可能是单篇论文）
+        if self._start >= 0:
+            keep = self._start
+        elif self._wrapped and not self.started and not self.done:
+            keep = self._outer
+        else:
+            keep = i
+        self._buf = buf[keep:]
+        self._pos = i - keep
+        if self._start >= 0:
+            self._start = 0
+        if self._outer >= 0:
+            self._outer -= keep
+            self._str_start -= keep
+        return items
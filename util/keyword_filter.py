@@ -0,0 +1,254 @@
+"""
+编译型关键词过滤引擎：所有 include/exclude/表达式中的词项只编译一次，每个条目单遍扫描。
+
+词项语法：
+- `flow`：子串匹配（大小写不敏感，与旧版行为一致，会命中 workflow）；
+- `"flow"` / `"flow matching"`：整词/短语匹配（两端必须是词边界，短语内空白不敏感）。
+
+表达式语法（--keyword_expr）：词项 + AND / OR / NOT（大写）+ 括号，例如
+    (diffusion OR "flow matching") AND NOT "workflow"
+优先级：NOT > AND > OR。
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class _Term:
+    text: str
+    whole_word: bool
+
+
+def parse_term(raw: str) -> _Term | None:
+    raw = raw.strip()
+    whole_word = len(raw) >= 2 and raw[0] == raw[-1] == '"'
+    if whole_word:
+        raw = raw[1:-1]
+    text = " ".join(raw.casefold().split())
+    if not text:
+        return None
+    return _Term(text=text, whole_word=whole_word)
+
+
+_TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|("[^"]*")|([^\s()"]+))')
+
+
+def _tokenize(expr: str) -> list[str]:
+    tokens: list[str] = []
+    pos = 0
+    expr = expr.strip()
+    while pos < len(expr):
+        m = _TOKEN_RE.match(expr, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"关键词表达式无法解析：{expr[pos:]!r}")
+        tokens.append(next(g for g in m.groups() if g is not None))
+        pos = m.end()
+        while pos < len(expr) and expr[pos].isspace():
+            pos += 1
+    return tokens
+
+
+class _ExprParser:
+    """递归下降：or := and (OR and)* ; and := not (AND not)* ; not := NOT not | atom。"""
+
+    def __init__(self, tokens: list[str], intern):
+        self.tokens = tokens
+        self.pos = 0
+        self.intern = intern
+
+    def _peek(self) -> str | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _take(self) -> str:
+        tok = self._peek()
+        if tok is None:
+            raise ValueError("关键词表达式意外结束")
+        self.pos += 1
+        return tok
+
+    def parse(self):
+        node = self._or()
+        if self._peek() is not None:
+            raise ValueError(f"关键词表达式多余的内容：{self._peek()!r}")
+        return node
+
+    def _or(self):
+        nodes = [self._and()]
+        while self._peek() == "OR":
+            self._take()
+            nodes.append(self._and())
+        return nodes[0] if len(nodes) == 1 else ("or", tuple(nodes))
+
+    def _and(self):
+        nodes = [self._not()]
+        while self._peek() == "AND":
+            self._take()
+            nodes.append(self._not())
+        return nodes[0] if len(nodes) == 1 else ("and", tuple(nodes))
+
+    def _not(self):
+        if self._peek() == "NOT":
+            self._take()
+            return ("not", self._not())
+        return self._atom()
+
+    def _atom(self):
+        tok = self._take()
+        if tok == "(":
+            node = self._or()
+            if self._take() != ")":
+                raise ValueError("关键词表达式括号不匹配")
+            return node
+        if tok in (")", "AND", "OR", "NOT"):
+            raise ValueError(f"关键词表达式在 {tok!r} 处语法错误")
+        term = parse_term(tok)
+        if term is None:
+            raise ValueError("关键词表达式包含空词项")
+        return ("term", self.intern(term))
+
+
+def _evaluate(node, hits: set[int]) -> bool:
+    kind = node[0]
+    if kind == "term":
+        return node[1] in hits
+    if kind == "not":
+        return not _evaluate(node[1], hits)
+    if kind == "and":
+        return all(_evaluate(child, hits) for child in node[1])
+    return any(_evaluate(child, hits) for child in node[1])
+
+
+def _trie_regex(patterns: list[str]) -> str:
+    """
+    把模式集合编译成前缀树形状的正则：在每个位置上只沿前缀树走一条路径（而不是逐个尝试模式），
+    贪婪可选分支保证得到“从该位置开始的最长模式”。
+    """
+    trie: dict = {}
+    for p in patterns:
+        node = trie
+        for ch in p:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class KeywordFilter:
+    """
+    编译后的关键词过滤器；调用 `filter(haystack)` 返回是否保留（haystack 需已 casefold）。
+
+    所有词项去重后编译进一个前缀树正则，用零宽前瞻在每个起点取最长匹配，再借助预计算的
+    “前缀模式表”补全同一起点上更短的模式——等价于多模式自动机的单遍扫描，扫描在 re 的 C 实现中完成。
+    整词项在命中位置上额外检查两端词边界。
+    """
+
+    def __init__(self) -> None:
+        self._terms: list[_Term] = []
+        self._term_ids: dict[_Term, int] = {}
+        self._include: list[int] = []
+        self._include_mode = "any"
+        self._exclude: list[int] = []
+        self._expr = None
+        self._scanner: re.Pattern | None = None
+        # pattern 文本 -> [(term_id, whole_word)]，以及 pattern -> 同一起点可能命中的全部 pattern（含自身）
+        self._by_pattern: dict[str, list[tuple[int, bool]]] = {}
+        self._prefix_closure: dict[str, list[str]] = {}
+        self._normalize_space = False
+
+    @classmethod
+    def compile(
+        cls,
+        include_keywords: list[str] | None = None,
+        exclude_keywords: list[str] | None = None,
+        include_mode: str = "any",
+        expression: str | None = None,
+    ) -> "KeywordFilter":
+        include_mode = (include_mode or "any").lower().strip()
+        if include_mode not in ("any", "all"):
+            raise ValueError("include_mode 仅支持 'any' 或 'all'")
+        self = cls()
+        self._include_mode = include_mode
+        for raw in include_keywords or []:
+            term = parse_term(raw)
+            if term is not None:
+                self._include.append(self._intern(term))
+        for raw in exclude_keywords or []:
+            term = parse_term(raw)
+            if term is not None:
+                self._exclude.append(self._intern(term))
+        if expression and expression.strip():
+            self._expr = _ExprParser(_tokenize(expression), self._intern).parse()
+        self._build()
+        return self
+
+    def _intern(self, term: _Term) -> int:
+        if term not in self._term_ids:
+            self._term_ids[term] = len(self._terms)
+            self._terms.append(term)
+        return self._term_ids[term]
+
+    def _build(self) -> None:
+        for term_id, term in enumerate(self._terms):
+            self._by_pattern.setdefault(term.text, []).append((term_id, term.whole_word))
+            if " " in term.text:
+                self._normalize_space = True
+        patterns = list(self._by_pattern)
+        for p in patterns:
+            self._prefix_closure[p] = [q for q in patterns if p.startswith(q)]
+        if patterns:
+            self._scanner = re.compile("(?=(" + _trie_regex(patterns) + "))")
+
+    @property
+    def is_empty(self) -> bool:
+        return not self._terms
+
+    def scan(self, text: str) -> set[int]:
+        """单遍扫描 text，返回命中的词项 id 集合。"""
+        hits: set[int] = set()
+        if self._scanner is None:
+            return hits
+        if self._normalize_space:
+            text = " ".join(text.split())
+        n = len(text)
+        for m in self._scanner.finditer(text):
+            start = m.start()
+            for pattern in self._prefix_closure[m.group(1)]:
+                end = start + len(pattern)
+                for term_id, whole_word in self._by_pattern[pattern]:
+                    if term_id in hits:
+                        continue
+                    if whole_word and (
+                        (start > 0 and text[start - 1].isalnum())
+                        or (end < n and text[end].isalnum())
+                    ):
+                        continue
+                    hits.add(term_id)
+        return hits
+
+    def __call__(self, text: str) -> bool:
+        if self.is_empty:
+            return True
+        hits = self.scan(text)
+        if self._include:
+            if self._include_mode == "all":
+                if not all(t in hits for t in self._include):
+                    return False
+            elif not any(t in hits for t in self._include):
+                return False
+        if any(t in hits for t in self._exclude):
+            return False
+        if self._expr is not None and not _evaluate(self._expr, hits):
+            return False
+        return True
@@ -0,0 +1,187 @@
+"""
+跨运行的 LLM 评分缓存（SQLite，内容寻址）：与 --save、运行日期无关，同一篇论文在相同条件下只花一次 LLM 调用。
+
+缓存 key = sha256(arXiv id（含版本）、标题+摘要哈希、研究兴趣描述哈希、模型签名、prompt 模板版本)；
+value 只保存 LLM 的原始输出（summary / scores / 推荐理由 / 关键贡献），加权总分在读取时按当前权重重新计算。
+淘汰策略：超过 ttl_days 未被使用的条目删除；条目数超过 max_entries 时按 last_used 做 LRU 删除。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from util.seen_db import content_hash, split_arxiv_version
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_results (
+    key TEXT PRIMARY KEY,
+    arxiv_id TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    last_used TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_results_last_used ON llm_results (last_used);
+"""
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def model_signature(models) -> str:
+    """负载均衡时结果可能来自任一 endpoint，因此签名取全部已配置模型（去重排序）。"""
+    models = models if isinstance(models, list) else [models]
+    return "|".join(sorted({str(m) for m in models if m}))
+
+
+@dataclass
+class LlmResultCache:
+    path: Path
+    description: str
+    model_signature: str
+    prompt_version: str
+    ttl_days: int = 90
+    max_entries: int = 50000
+    hits: int = 0
+    misses: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.path = Path(self.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._context = _sha256(
+            "\n".join([_sha256(self.description or ""), self.model_signature, self.prompt_version])
+        )
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _key(self, arxiv_id: str, digest: str) -> str:
+        return _sha256(f"{self._context}\n{arxiv_id}\n{digest}")
+
+    def key_for(self, paper: dict) -> str:
+        return self._key(paper.get("arXiv_id", ""), content_hash(paper.get("title", ""), paper.get("abstract", "")))
+
+    def get_many(self, papers: Iterable[dict]) -> dict[str, dict]:
+        """返回 {arXiv_id: LLM 原始结果}，并刷新命中条目的 last_used。"""
+        keys = {self.key_for(p): p["arXiv_id"] for p in papers if p.get("arXiv_id")}
+        found: dict[str, dict] = {}
+        if not keys:
+            return found
+        now = datetime.now(timezone.utc).isoformat()
+        key_list = list(keys)
+        with self._lock, self._connect() as conn:
+            for start in range(0, len(key_list), 500):
+                chunk = key_list[start : start + 500]
+                marks = ",".join("?" for _ in chunk)
+                for key, result in conn.execute(
+                    f"SELECT key, result FROM llm_results WHERE key IN ({marks})", chunk
+                ):
+                    try:
+                        found[keys[key]] = json.loads(result)
+                    except json.JSONDecodeError:
+                        continue
+            hit_keys = [k for k, aid in keys.items() if aid in found]
+            conn.executemany(
+                "UPDATE llm_results SET last_used = ? WHERE key = ?", [(now, k) for k in hit_keys]
+            )
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def get_earlier_versions(self, papers: Iterable[dict]) -> dict[str, dict]:
+        """
+        标题+摘要未变的新版本（如 v2 只改了 comments）：返回 {arXiv_id: 最近一个更早版本的 LLM 原始结果}。
+        当前版本本身已有缓存（这一版已经处理过）的论文不返回，避免同一版本每次运行都被沿用一次。
+        """
+        exact: dict[str, str] = {}
+        # 候选 key -> (arXiv_id, 与当前版本相差的版本数)，相差越少越优先
+        candidates: dict[str, tuple[str, int]] = {}
+        for paper in papers:
+            arxiv_id = paper.get("arXiv_id", "")
+            base, version = split_arxiv_version(arxiv_id)
+            if not version or version < 2:
+                continue
+            digest = content_hash(paper.get("title", ""), paper.get("abstract", ""))
+            exact[self._key(arxiv_id, digest)] = arxiv_id
+            for v in range(version - 1, 0, -1):
+                candidates[self._key(f"{base}v{v}", digest)] = (arxiv_id, version - v)
+        found: dict[str, dict] = {}
+        if not exact:
+            return found
+        now = datetime.now(timezone.utc).isoformat()
+        key_list = list(exact) + list(candidates)
+        present: dict[str, str] = {}
+        with self._lock, self._connect() as conn:
+            for start in range(0, len(key_list), 500):
+                chunk = key_list[start : start + 500]
+                marks = ",".join("?" for _ in chunk)
+                present.update(
+                    conn.execute(f"SELECT key, result FROM llm_results WHERE key IN ({marks})", chunk).fetchall()
+                )
+            handled = {exact[k] for k in present if k in exact}
+            best: dict[str, tuple[int, str]] = {}
+            for key, (arxiv_id, distance) in candidates.items():
+                if key in present and arxiv_id not in handled and distance < best.get(arxiv_id, (distance + 1,))[0]:
+                    best[arxiv_id] = (distance, key)
+            used = []
+            for arxiv_id, (_, key) in best.items():
+                try:
+                    found[arxiv_id] = json.loads(present[key])
+                except json.JSONDecodeError:
+                    continue
+                used.append(key)
+            conn.executemany("UPDATE llm_results SET last_used = ? WHERE key = ?", [(now, k) for k in used])
+        return found
+
+    def put_many(self, items: Iterable[tuple[dict, dict]]) -> None:
+        """写入 (paper, LLM 原始结果) 列表。"""
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [
+            (self.key_for(paper), paper.get("arXiv_id", ""), json.dumps(result, ensure_ascii=False), now, now)
+            for paper, result in items
+        ]
+        if not rows:
+            return
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO llm_results (key, arxiv_id, result, created_at, last_used) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET result = excluded.result, last_used = excluded.last_used",
+                rows,
+            )
+
+    def evict(self, now_utc: datetime | None = None) -> int:
+        """按 TTL 与容量上限淘汰，返回删除的条目数。"""
+        now_utc = now_utc or datetime.now(timezone.utc)
+        removed = 0
+        with self._lock, self._connect() as conn:
+            if self.ttl_days > 0:
+                cutoff = (now_utc - timedelta(days=self.ttl_days)).isoformat()
+                removed += conn.execute("DELETE FROM llm_results WHERE last_used < ?", (cutoff,)).rowcount
+            if self.max_entries > 0:
+                (count,) = conn.execute("SELECT COUNT(*) FROM llm_results").fetchone()
+                if count > self.max_entries:
+                    removed += conn.execute(
+                        "DELETE FROM llm_results WHERE key IN "
+                        "(SELECT key FROM llm_results ORDER BY last_used ASC LIMIT ?)",
+                        (count - self.max_entries,),
+                    ).rowcount
+        return removed
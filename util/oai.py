@@ -0,0 +1,259 @@
+"""
+基于 arXiv OAI-PMH 的增量抓取：只拉取上次成功运行以来新增/变更的记录。
+
+与 Atom API 的“回看窗口”不同，这里用持久化的 watermark（上次收割的日期）作为 `from=`，
+并沿着 resumptionToken 翻页，每天的抓取量只与新论文数量有关。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+import xml.etree.ElementTree as ET
+
+import requests
+
+from util.keyword_filter import KeywordFilter
+from util.paper_store import PaperStore
+from util.rate_limit import TokenBucket
+from util.request import (
+    ARXIV_REQUEST_INTERVAL,
+    FetchStats,
+    arxiv_get,
+    normalize_now,
+)
+
+
+ARXIV_OAI_URL = "https://oaipmh.arxiv.org/oai"
+_OAI_NS = "http://www.openarchives.org/OAI/2.0/"
+_ARXIV_META_NS = "http://arxiv.org/OAI/arXiv/"
+# 这些 archive 在 OAI 中是顶层 set，其余（astro-ph、hep-th、cond-mat 等）都挂在 physics 下
+_TOP_LEVEL_SETS = {"cs", "econ", "eess", "math", "q-bio", "q-fin", "stat"}
+# 新投稿从提交（created）到公告（datestamp）可能隔着周末/节假日
+_NEW_SUBMISSION_SLACK_DAYS = 7
+
+
+def category_to_oai_set(category: str) -> str:
+    archive = category.split(".", 1)[0].strip()
+    if archive in _TOP_LEVEL_SETS:
+        return archive
+    return f"physics:{archive}"
+
+
+@dataclass
+class OaiWatermark:
+    """
+    每个 OAI set 的收割水位（上次成功收割时服务器的 responseDate 日期）。
+
+    文件格式：{"watermarks": {"cs": "2026-01-05", ...}}。
+    OAI 的 from= 为闭区间且按天粒度，因此下次会重叠一天，重复条目交给 seen_db 去重。
+    """
+
+    path: Path
+    watermarks: dict[str, str] | None = None
+
+    def load(self) -> dict[str, str]:
+        if self.watermarks is not None:
+            return self.watermarks
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            marks = data.get("watermarks", {}) if isinstance(data, dict) else {}
+            self.watermarks = {str(k): str(v) for k, v in marks.items()}
+        except (OSError, json.JSONDecodeError):
+            self.watermarks = {}
+        return self.watermarks
+
+    def get(self, set_spec: str) -> str | None:
+        return self.load().get(set_spec)
+
+    def update(self, marks: dict[str, str]) -> None:
+        current = self.load()
+        for set_spec, day in marks.items():
+            if day and day > current.get(set_spec, ""):
+                current[set_spec] = day
+        self.watermarks = current
+
+    def save(self) -> None:
+        marks = self.load()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"watermarks": dict(sorted(marks.items()))}
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def _request_oai(params: dict, rate_limiter: TokenBucket | None) -> requests.Response:
+    """OAI 服务端用 503 + Retry-After 做流控；arxiv_get 会按其指示等待，并在重发前重新取令牌。"""
+    resp = arxiv_get(ARXIV_OAI_URL, params, rate_limiter, timeout=60)
+    if not resp.ok:
+        resp.close()
+    resp.raise_for_status()
+    return resp
+
+
+def _text(elem: ET.Element, tag: str) -> str:
+    return " ".join((elem.findtext(f"{{{_ARXIV_META_NS}}}{tag}", default="") or "").split())
+
+
+def _parse_oai_record(record: ET.Element) -> tuple[dict, str] | None:
+    """解析单条 OAI 记录，返回 (paper, haystack)；已删除/缺字段的记录返回 None。"""
+    header = record.find(f"{{{_OAI_NS}}}header")
+    if header is None or header.get("status") == "deleted":
+        return None
+    meta = record.find(f"{{{_OAI_NS}}}metadata/{{{_ARXIV_META_NS}}}arXiv")
+    if meta is None:
+        return None
+    arxiv_id = _text(meta, "id")
+    created = _text(meta, "created")
+    if not arxiv_id or not created:
+        return None
+    title = _text(meta, "title")
+    abstract = _text(meta, "abstract")
+    comments = _text(meta, "comments")
+    categories = _text(meta, "categories").split()
+    published = datetime.fromisoformat(created).replace(tzinfo=timezone.utc)
+    paper = {
+        "title": title or "No title available",
+        "arXiv_id": arxiv_id,
+        "abstract": abstract or "No abstract available",
+        "comments": comments or "No comments available",
+        "pdf_url": f"https://arxiv.org/pdf/{arxiv_id}",
+        "abstract_url": f"https://arxiv.org/abs/{arxiv_id}",
+        "published_utc": published.isoformat(),
+        "categories": categories,
+        "oai_datestamp": (header.findtext(f"{{{_OAI_NS}}}datestamp") or "").strip(),
+    }
+    haystack = "\n".join([title, abstract, comments]).casefold()
+    return paper, haystack
+
+
+def iter_oai_records(
+    set_spec: str,
+    from_date: str,
+    *,
+    rate_limiter: TokenBucket | None = None,
+    stats: FetchStats | None = None,
+    response_dates: list[str] | None = None,
+) -> Iterator[tuple[dict, str]]:
+    """
+    ListRecords(metadataPrefix=arXiv, set=set_spec, from=from_date)，沿 resumptionToken 翻页逐条产出 (paper, haystack)。
+
+    response_dates：可选列表，用于收集每页的 responseDate（调用方据此推进 watermark）。
+    """
+    if rate_limiter is None:
+        rate_limiter = TokenBucket.from_interval(ARXIV_REQUEST_INTERVAL)
+    params: dict = {
+        "verb": "ListRecords",
+        "metadataPrefix": "arXiv",
+        "set": set_spec,
+        "from": from_date,
+    }
+    record_tag = f"{{{_OAI_NS}}}record"
+    list_tag = f"{{{_OAI_NS}}}ListRecords"
+    while params:
+        token = None
+        count = 0
+        with _request_oai(params, rate_limiter) as resp:
+            resp.raw.decode_content = True
+            container = None
+            for event, elem in ET.iterparse(resp.raw, events=("start", "end")):
+                if event == "start":
+                    if elem.tag == list_tag:
+                        container = elem
+                    continue
+                tag = elem.tag
+                if tag == f"{{{_OAI_NS}}}responseDate" and response_dates is not None:
+                    response_dates.append((elem.text or "").strip())
+                elif tag == f"{{{_OAI_NS}}}error":
+                    code = elem.get("code", "")
+                    if code == "noRecordsMatch":
+                        break
+                    raise RuntimeError(f"OAI-PMH 错误 {code}: {(elem.text or '').strip()}")
+                elif tag == f"{{{_OAI_NS}}}resumptionToken":
+                    token = (elem.text or "").strip() or None
+                elif tag == record_tag:
+                    count += 1
+                    parsed = _parse_oai_record(elem)
+                    elem.clear()
+                    if container is not None:
+                        container.clear()
+                    if parsed is not None:
+                        yield parsed
+            nbytes = resp.raw.tell()
+        if stats is not None:
+            stats.record_page(nbytes, count)
+        params = {"verb": "ListRecords", "resumptionToken": token} if token else {}
+
+
+def harvest_recent_arxiv_papers(
+    categories: list[str],
+    watermark: OaiWatermark,
+    lookback_hours: int = 24,
+    *,
+    now_utc: datetime | None = None,
+    include_keywords: list[str] | None = None,
+    exclude_keywords: list[str] | None = None,
+    include_mode: str = "any",
+    keyword_filter: KeywordFilter | None = None,
+    include_updates: bool = False,
+    request_interval: float = ARXIV_REQUEST_INTERVAL,
+    stats: FetchStats | None = None,
+    store: PaperStore | None = None,
+) -> tuple[dict[str, list[dict]], dict[str, str]]:
+    """
+    增量收割 categories 对应的 OAI set，返回 ({category: papers}, 新 watermark)。
+
+    - 没有 watermark 的 set 从 now - lookback_hours 所在日期开始收割（首次运行）；
+    - include_updates=False 时只保留新投稿（created 距 from 不超过若干天），忽略老论文的新版本；
+    - store：可选的 PaperStore，收割到的全部记录（过滤前）都会 upsert 进去；
+    - 新 watermark 不会自动写盘：调用方应在整条流水线成功后再 watermark.update(...) + save()。
+    """
+    now_utc = normalize_now(now_utc)
+    if lookback_hours <= 0:
+        raise ValueError("lookback_hours 必须为正整数")
+    match = keyword_filter or KeywordFilter.compile(include_keywords, exclude_keywords, include_mode)
+    rate_limiter = TokenBucket.from_interval(request_interval)
+
+    categories = list(dict.fromkeys(categories))
+    result: dict[str, list[dict]] = {category: [] for category in categories}
+    requested = set(categories)
+    default_from = (now_utc - timedelta(hours=lookback_hours)).date().isoformat()
+
+    sets = list(dict.fromkeys(category_to_oai_set(c) for c in categories))
+    new_marks: dict[str, str] = {}
+    seen_ids: set[str] = set()
+    for set_spec in sets:
+        from_date = watermark.get(set_spec) or default_from
+        min_created = (date.fromisoformat(from_date) - timedelta(days=_NEW_SUBMISSION_SLACK_DAYS)).isoformat()
+        response_dates: list[str] = []
+        parsed: list[dict] = []
+        for paper, haystack in iter_oai_records(
+            set_spec,
+            from_date,
+            rate_limiter=rate_limiter,
+            stats=stats,
+            response_dates=response_dates,
+        ):
+            parsed.append(paper)
+            if paper["arXiv_id"] in seen_ids:
+                continue
+            if not include_updates and paper["published_utc"][:10] < min_created:
+                continue
+            matched = [c for c in paper["categories"] if c in requested]
+            if not matched or not match(haystack):
+                continue
+            seen_ids.add(paper["arXiv_id"])
+            paper["matched_categories"] = matched
+            for category in matched:
+                result[category].append(paper)
+        if store is not None:
+            store.upsert(parsed)
+        if response_dates:
+            new_marks[set_spec] = response_dates[0][:10]
+        print(f"OAI-PMH set={set_spec} from={from_date}: harvested up to {new_marks.get(set_spec, '-')}.")
+
+    return result, new_marks
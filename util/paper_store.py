@@ -0,0 +1,198 @@
+"""
+本地 SQLite 论文元数据库：每次抓取解析到的条目都会 upsert 进来，便于重跑/离线实验直接按时间窗口读取。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+from util.seen_db import split_arxiv_version
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    arxiv_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    abstract TEXT NOT NULL,
+    comments TEXT NOT NULL,
+    pdf_url TEXT NOT NULL,
+    abstract_url TEXT NOT NULL,
+    published_utc TEXT NOT NULL,
+    published_date TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_papers_published ON papers (published_utc);
+CREATE INDEX IF NOT EXISTS idx_papers_published_date ON papers (published_date);
+CREATE TABLE IF NOT EXISTS paper_categories (
+    id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    PRIMARY KEY (id, category)
+);
+CREATE INDEX IF NOT EXISTS idx_paper_categories_category ON paper_categories (category, id);
+"""
+
+_UPSERT = """
+INSERT INTO papers (
+    id, version, arxiv_id, title, abstract, comments, pdf_url, abstract_url,
+    published_utc, published_date, updated_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    version = excluded.version,
+    arxiv_id = excluded.arxiv_id,
+    title = excluded.title,
+    abstract = excluded.abstract,
+    comments = excluded.comments,
+    pdf_url = excluded.pdf_url,
+    abstract_url = excluded.abstract_url,
+    published_utc = excluded.published_utc,
+    published_date = excluded.published_date,
+    updated_at = excluded.updated_at
+WHERE excluded.version >= papers.version
+"""
+
+_PLACEHOLDERS = {"No title available", "No abstract available", "No comments available"}
+
+
+def _utc_iso(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def paper_haystack(paper: dict) -> str:
+    """与抓取时一致的关键词匹配文本（占位文本不参与匹配）。"""
+    parts = [paper.get(k, "") for k in ("title", "abstract", "comments")]
+    return "\n".join(p for p in parts if p not in _PLACEHOLDERS).casefold()
+
+
+@dataclass
+class PaperStore:
+    """
+    papers 表以去掉版本号的 arXiv id 为主键，只保留最新版本；paper_categories 记录分类归属。
+    索引：id（主键）、published_utc / published_date、(category, id)。
+    """
+
+    path: Path
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.path = Path(self.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def upsert(self, papers: Iterable[dict], category: str | None = None) -> int:
+        """写入/更新论文；category 为抓取时所在的分类（会与条目自身的 categories 合并）。"""
+        now = datetime.now(timezone.utc).isoformat()
+        rows = []
+        cat_rows = []
+        for p in papers:
+            raw_id = p.get("arXiv_id") or ""
+            if not raw_id:
+                continue
+            base_id, version = split_arxiv_version(raw_id)
+            published = p.get("published_utc") or ""
+            if not published:
+                continue
+            published = _utc_iso(datetime.fromisoformat(published))
+            rows.append(
+                (
+                    base_id,
+                    version or 0,
+                    raw_id,
+                    p.get("title", ""),
+                    p.get("abstract", ""),
+                    p.get("comments", ""),
+                    p.get("pdf_url", ""),
+                    p.get("abstract_url", ""),
+                    published,
+                    published[:10],
+                    now,
+                )
+            )
+            cats = list(p.get("categories") or [])
+            if category and category not in cats:
+                cats.append(category)
+            cat_rows.extend((base_id, c) for c in cats)
+        if not rows:
+            return 0
+        with self._lock, self._connect() as conn:
+            conn.executemany(_UPSERT, rows)
+            conn.executemany(
+                "INSERT OR IGNORE INTO paper_categories (id, category) VALUES (?, ?)", cat_rows
+            )
+        return len(rows)
+
+    def load_window(
+        self,
+        start_utc: datetime,
+        end_utc: datetime | None = None,
+        categories: list[str] | None = None,
+    ) -> dict[str, list[dict]]:
+        """
+        读取 published_utc ∈ [start_utc, end_utc] 的论文，按 published 倒序。
+        返回 {category: papers}（同一篇论文在多个分类下共享同一个 dict）；categories 为空时放在 "*" 下。
+        """
+        end_utc = end_utc or datetime.now(timezone.utc)
+        params: list = [_utc_iso(start_utc), _utc_iso(end_utc)]
+        sql = "SELECT * FROM papers WHERE published_utc >= ? AND published_utc <= ?"
+        if categories:
+            marks = ",".join("?" for _ in categories)
+            sql += (
+                f" AND id IN (SELECT id FROM paper_categories WHERE category IN ({marks}))"
+            )
+            params.extend(categories)
+        sql += " ORDER BY published_utc DESC"
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+            ids = [r["id"] for r in rows]
+            cats_by_id: dict[str, list[str]] = {i: [] for i in ids}
+            for start in range(0, len(ids), 500):
+                chunk = ids[start : start + 500]
+                marks = ",".join("?" for _ in chunk)
+                for r in conn.execute(
+                    f"SELECT id, category FROM paper_categories WHERE id IN ({marks})", chunk
+                ):
+                    cats_by_id[r["id"]].append(r["category"])
+
+        keys = list(dict.fromkeys(categories)) if categories else ["*"]
+        result: dict[str, list[dict]] = {k: [] for k in keys}
+        for r in rows:
+            paper = {
+                "title": r["title"],
+                "arXiv_id": r["arxiv_id"],
+                "abstract": r["abstract"],
+                "comments": r["comments"],
+                "pdf_url": r["pdf_url"],
+                "abstract_url": r["abstract_url"],
+                "published_utc": r["published_utc"],
+                "categories": sorted(cats_by_id.get(r["id"], [])),
+            }
+            if not categories:
+                result["*"].append(paper)
+                continue
+            matched = [c for c in keys if c in paper["categories"]]
+            paper["matched_categories"] = matched
+            for c in matched:
+                result[c].append(paper)
+        return result
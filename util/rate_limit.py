@@ -0,0 +1,55 @@
+"""
+简单的线程安全令牌桶限速器，用于让多个并发抓取任务共享同一个请求配额。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    令牌桶：以 rate 个/秒的速度补充令牌，最多累积 capacity 个。
+
+    - acquire() 会阻塞直到拿到令牌，返回本次等待的秒数。
+    - capacity=1 时退化为“相邻两次请求间隔不少于 1/rate 秒”，正好对应 arXiv API 的要求。
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate 必须为正数")
+        if capacity < 1:
+            raise ValueError("capacity 不能小于 1")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_interval(cls, interval_seconds: float, capacity: float = 1.0) -> "TokenBucket":
+        if interval_seconds <= 0:
+            raise ValueError("interval_seconds 必须为正数")
+        return cls(rate=1.0 / interval_seconds, capacity=capacity)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._last = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        if tokens > self.capacity:
+            raise ValueError("tokens 不能超过 capacity")
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
@@ -4,17 +4,136 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+import hashlib
+import json
+import os
+from pathlib import Path
+import random
+import threading
+import time
+import uuid
 import xml.etree.ElementTree as ET
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from util.keyword_filter import KeywordFilter
+from util.paper_store import PaperStore
+from util.rate_limit import TokenBucket
+
+
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+# arXiv API 使用说明要求：连续请求之间至少间隔 3 秒
+ARXIV_REQUEST_INTERVAL = 3.0
+# arxiv_get 对连接错误与这些状态码的重试次数与退避参数
+ARXIV_MAX_RETRIES = 4
+ARXIV_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_DEFAULT_HEADERS = {
+    "User-Agent": "customize-arxiv-daily (https://github.com; contact: local)",
+}
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def create_arxiv_session(*, pool_maxsize: int = 8) -> requests.Session:
+    """
+    创建带连接池的 Session（keep-alive 复用 TCP/TLS 连接）。
+
+    适配器层不做任何重试：urllib3 的重试会绕过限速器直接重发，打破共享的请求间隔；
+    连接错误与 429/5xx 的重试由 arxiv_get 负责，每次重发前都重新取令牌。
+    """
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(_DEFAULT_HEADERS)
+    return session
+
+
+def get_arxiv_session() -> requests.Session:
+    """进程内共享的 arXiv Session（懒加载，线程安全），多页/多分类抓取复用已建立的连接。"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_arxiv_session()
+    return _session
+
+
+def _retry_after(value: str | None) -> float:
+    """解析 Retry-After（秒数或 HTTP 日期）；缺失或无法解析时返回 0。"""
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0.0
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def arxiv_get(
+    url: str,
+    params: dict | None = None,
+    rate_limiter: TokenBucket | None = None,
+    *,
+    headers: dict | None = None,
+    timeout: float = 30,
+    max_retries: int = ARXIV_MAX_RETRIES,
+    backoff_factor: float = 1.0,
+    backoff_jitter: float = 1.0,
+) -> requests.Response:
+    """
+    用共享 Session 发 GET（stream=True），返回响应（调用方负责关闭/检查状态码）。
+
+    - 连接错误、超时与 ARXIV_RETRY_STATUSES 中的状态码最多重试 max_retries 次；
+    - 每次发送（包括重试）前都先从 rate_limiter 取令牌，重试同样遵守共享的请求间隔；
+    - 退避时间为指数退避 + 随机抖动；429/503 带 Retry-After 时至少按服务端指示等待。
+    """
+    session = get_arxiv_session()
+    attempt = 0
+    while True:
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            resp = session.get(url, params=params, headers=headers, timeout=timeout, stream=True)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= max_retries:
+                raise
+            delay = backoff_factor * (2**attempt) + random.uniform(0, backoff_jitter)
+            reason = str(e)
+        else:
+            if resp.status_code not in ARXIV_RETRY_STATUSES or attempt >= max_retries:
+                return resp
+            delay = max(
+                backoff_factor * (2**attempt) + random.uniform(0, backoff_jitter),
+                _retry_after(resp.headers.get("Retry-After")),
+            )
+            reason = f"HTTP {resp.status_code}"
+            resp.close()
+        attempt += 1
+        print(f"arXiv 请求失败（{reason}），{delay:.1f} 秒后第 {attempt}/{max_retries} 次重试。")
+        time.sleep(delay)
 
 
 def get_yesterday_arxiv_papers(category: str = "cs.CV", max_results: int = 100):
     url = f"https://arxiv.org/list/{category}/new?skip=0&show={max_results}"
 
-    response = requests.get(url)
+    response = arxiv_get(url, timeout=30)
 
     soup = BeautifulSoup(response.text, "html.parser")
 
@@ -61,6 +180,325 @@ def get_yesterday_arxiv_papers(category: str = "cs.CV", max_results: int = 100):
     return papers
 
 
+_ATOM_NS = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "arxiv": "http://arxiv.org/schemas/atom",
+}
+
+
+def normalize_now(now_utc: datetime | None) -> datetime:
+    """None 取当前 UTC 时间；不带时区的时间按 UTC 处理（抓取与 OAI 收割共用）。"""
+    if now_utc is None:
+        now_utc = datetime.now(timezone.utc)
+    if now_utc.tzinfo is None:
+        now_utc = now_utc.replace(tzinfo=timezone.utc)
+    return now_utc
+
+
+def _parse_published(entry: ET.Element) -> datetime | None:
+    published_text = entry.findtext("atom:published", default="", namespaces=_ATOM_NS).strip()
+    if not published_text:
+        return None
+    # 例：2026-01-05T08:12:34Z
+    return datetime.fromisoformat(published_text.replace("Z", "+00:00"))
+
+
+def _parse_atom_entry(entry: ET.Element, published: datetime) -> tuple[dict, str]:
+    """解析单个 Atom entry，返回 (paper, haystack)；haystack 为 casefold 后的 title + abstract + comments。"""
+    ns = _ATOM_NS
+    title = entry.findtext("atom:title", default="", namespaces=ns).strip()
+    title = " ".join(title.split())
+    abstract = entry.findtext("atom:summary", default="", namespaces=ns).strip()
+    abstract = " ".join(abstract.split())
+    abs_url = entry.findtext("atom:id", default="", namespaces=ns).strip()
+
+    pdf_url = ""
+    for link in entry.findall("atom:link", ns):
+        link_type = (link.get("type") or "").strip()
+        link_title = (link.get("title") or "").strip().lower()
+        if link_type == "application/pdf" or link_title == "pdf":
+            pdf_url = link.get("href") or ""
+            break
+
+    comments = entry.findtext("arxiv:comment", default="", namespaces=ns).strip()
+    arxiv_id = abs_url.rsplit("/", 1)[-1] if abs_url else ""
+
+    categories: list[str] = []
+    primary = entry.find("arxiv:primary_category", ns)
+    if primary is not None and primary.get("term"):
+        categories.append(primary.get("term"))
+    for cat in entry.findall("atom:category", ns):
+        term = (cat.get("term") or "").strip()
+        if term and term not in categories:
+            categories.append(term)
+
+    haystack = "\n".join([title, abstract, comments]).casefold()
+    paper = {
+        "title": title or "No title available",
+        "arXiv_id": arxiv_id,
+        "abstract": abstract or "No abstract available",
+        "comments": comments or "No comments available",
+        "pdf_url": pdf_url or (f"https://arxiv.org/pdf/{arxiv_id}" if arxiv_id else ""),
+        "abstract_url": abs_url or (f"https://arxiv.org/abs/{arxiv_id}" if arxiv_id else ""),
+        "published_utc": published.isoformat(),
+        "categories": categories,
+    }
+    return paper, haystack
+
+
+@dataclass
+class FetchStats:
+    """分页抓取的统计信息（线程安全，可在多个分类间共享）。"""
+
+    pages: int = 0
+    bytes: int = 0
+    entries: int = 0
+    cache_hits: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record_page(self, nbytes: int, nentries: int, from_cache: bool = False) -> None:
+        with self._lock:
+            self.pages += 1
+            self.bytes += nbytes
+            self.entries += nentries
+            if from_cache:
+                self.cache_hits += 1
+
+
+@dataclass
+class ArxivHttpCache:
+    """
+    arXiv 查询响应的磁盘快照缓存（按 URL + 查询参数做 key，保存原始 Atom 响应）。
+
+    - ttl_seconds 内的快照直接复用，不发任何请求；
+    - 过期后带 If-None-Match / If-Modified-Since 做条件请求，304 时继续复用本地快照；
+    - offline=True 为离线回放：只读缓存（不看 TTL），未命中的页按“结果结束”处理。
+    """
+
+    cache_dir: Path
+    ttl_seconds: float = 6 * 3600
+    offline: bool = False
+
+    def __post_init__(self) -> None:
+        self.cache_dir = Path(self.cache_dir)
+
+    def _paths(self, url: str, params: dict) -> tuple[Path, Path]:
+        raw = json.dumps({"url": url, "params": params}, sort_keys=True, ensure_ascii=False)
+        key = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.xml", self.cache_dir / f"{key}.json"
+
+    @staticmethod
+    def _read_meta(meta_path: Path) -> dict | None:
+        try:
+            return json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_meta(self, meta_path: Path, meta: dict) -> None:
+        tmp = meta_path.with_name(f"{meta_path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, meta_path)
+
+    def store(self, url: str, params: dict, body: bytes) -> Path:
+        """直接写入一页快照（录制/导入 Atom 响应，供离线回放）；返回快照文件路径。"""
+        body_path, meta_path = self._paths(url, params)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = body_path.with_name(f"{body_path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            tmp.write_bytes(body)
+            os.replace(tmp, body_path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        self._write_meta(
+            meta_path,
+            {"url": url, "params": params, "etag": None, "last_modified": None, "fetched_at": time.time()},
+        )
+        return body_path
+
+    def fetch(
+        self,
+        url: str,
+        params: dict,
+        rate_limiter: TokenBucket | None = None,
+    ) -> tuple[Path | None, bool]:
+        """
+        返回 (快照文件路径, 是否未产生下载)。离线模式下未命中时路径为 None。
+        """
+        body_path, meta_path = self._paths(url, params)
+        meta = self._read_meta(meta_path) if body_path.exists() else None
+
+        if self.offline:
+            if meta is None:
+                print(f"离线模式：缓存未命中 {params.get('search_query')} start={params.get('start')}，按结果结束处理。")
+                return None, True
+            return body_path, True
+
+        if meta is not None and time.time() - float(meta.get("fetched_at", 0)) < self.ttl_seconds:
+            return body_path, True
+
+        headers: dict[str, str] = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with arxiv_get(url, params, rate_limiter, headers=headers, timeout=30) as resp:
+            if resp.status_code == 304 and meta is not None:
+                meta["fetched_at"] = time.time()
+                self._write_meta(meta_path, meta)
+                return body_path, True
+            resp.raise_for_status()
+            tmp = body_path.with_name(f"{body_path.name}.{uuid.uuid4().hex}.tmp")
+            try:
+                with open(tmp, "wb") as f:
+                    for chunk in resp.iter_content(chunk_size=64 * 1024):
+                        f.write(chunk)
+                os.replace(tmp, body_path)
+            finally:
+                tmp.unlink(missing_ok=True)
+            self._write_meta(
+                meta_path,
+                {
+                    "url": url,
+                    "params": params,
+                    "etag": resp.headers.get("ETag"),
+                    "last_modified": resp.headers.get("Last-Modified"),
+                    "fetched_at": time.time(),
+                },
+            )
+        return body_path, False
+
+
+class _CountingReader:
+    """包装响应流，统计解析器实际读取的字节数。"""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.bytes = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._raw.read(size)
+        self.bytes += len(data)
+        return data
+
+
+@contextmanager
+def _open_arxiv_page(
+    params: dict,
+    rate_limiter: TokenBucket | None,
+    cache: ArxivHttpCache | None,
+):
+    """产出 (可读的字节流 | None, 是否来自缓存)。"""
+    if cache is not None:
+        body_path, from_cache = cache.fetch(ARXIV_API_URL, params, rate_limiter)
+        if body_path is None:
+            yield None, True
+            return
+        with open(body_path, "rb") as f:
+            yield f, from_cache
+        return
+
+    with arxiv_get(ARXIV_API_URL, params, rate_limiter, timeout=30) as resp:
+        resp.raise_for_status()
+        resp.raw.decode_content = True
+        yield resp.raw, False
+
+
+def _iter_arxiv_page(
+    params: dict,
+    rate_limiter: TokenBucket | None,
+    stats: FetchStats | None = None,
+    cache: ArxivHttpCache | None = None,
+) -> Iterator[ET.Element]:
+    """
+    流式请求一页 Atom 结果，用 iterparse 逐个产出 <entry> 元素。
+
+    - 每个 entry 被消费后立即 clear，整页不会在内存中保留完整的树；
+    - 调用方提前结束迭代（或 close 生成器）时会立即关闭连接，不再下载剩余内容；
+    - 启用 cache 时整页先落盘（保证快照完整），再从本地文件流式解析。
+    """
+    entry_tag = f"{{{_ATOM_NS['atom']}}}entry"
+    with _open_arxiv_page(params, rate_limiter, cache) as (stream, from_cache):
+        if stream is None:
+            return
+        reader = _CountingReader(stream)
+        count = 0
+        try:
+            root = None
+            for event, elem in ET.iterparse(reader, events=("start", "end")):
+                if event == "start":
+                    if root is None:
+                        root = elem
+                    continue
+                if elem.tag != entry_tag:
+                    continue
+                count += 1
+                yield elem
+                elem.clear()
+                root.clear()
+        finally:
+            if stats is not None:
+                stats.record_page(reader.bytes, count, from_cache=from_cache)
+
+
+def iter_recent_arxiv_entries(
+    search_query: str,
+    threshold: datetime,
+    *,
+    page_size: int = 100,
+    max_results: int = 0,
+    rate_limiter: TokenBucket | None = None,
+    stats: FetchStats | None = None,
+    cache: ArxivHttpCache | None = None,
+) -> Iterator[tuple[dict, str]]:
+    """
+    按 submittedDate 倒序自动分页（start=0, page_size, 2*page_size, ...），逐条产出 (paper, haystack)。
+    每页都是流式解析：遇到越过阈值的条目会立即关闭连接。
+
+    停止条件（任一满足即停止，不再请求下一页）：
+    - 某一页出现 published < threshold 的条目（后面的条目只会更旧）；
+    - 返回条目数少于本页请求数（已到结果末尾）；
+    - 累计拉取条目数达到 max_results（<=0 表示不设上限）。
+    分页期间新提交的论文会让后续页整体后移，因此按 arXiv_id 去重。
+    """
+    if page_size <= 0:
+        raise ValueError("page_size 必须为正整数")
+    if rate_limiter is None:
+        rate_limiter = TokenBucket.from_interval(ARXIV_REQUEST_INTERVAL)
+
+    seen_ids: set[str] = set()
+    fetched = 0
+    while max_results <= 0 or fetched < max_results:
+        size = page_size if max_results <= 0 else min(page_size, max_results - fetched)
+        params = {
+            "search_query": search_query,
+            "start": fetched,
+            "max_results": size,
+            "sortBy": "submittedDate",
+            "sortOrder": "descending",
+        }
+        count = 0
+        with closing(_iter_arxiv_page(params, rate_limiter, stats, cache)) as page:
+            for entry in page:
+                count += 1
+                published = _parse_published(entry)
+                if published is None:
+                    continue
+                if published < threshold:
+                    # 后续条目只会更旧：关闭连接，剩余内容不再下载/解析
+                    return
+                paper, haystack = _parse_atom_entry(entry, published)
+                if paper["arXiv_id"] in seen_ids:
+                    continue
+                seen_ids.add(paper["arXiv_id"])
+                yield paper, haystack
+        fetched += count
+        if count < size:
+            return
+
+
 def get_recent_arxiv_papers(
     category: str = "cs.CV",
     max_results: int = 100,
@@ -70,117 +508,179 @@ def get_recent_arxiv_papers(
     include_keywords: list[str] | None = None,
     exclude_keywords: list[str] | None = None,
     include_mode: str = "any",
+    keyword_filter: KeywordFilter | None = None,
+    page_size: int = 100,
+    rate_limiter: TokenBucket | None = None,
+    stats: FetchStats | None = None,
+    cache: ArxivHttpCache | None = None,
+    store: PaperStore | None = None,
 ):
     """
     使用 arXiv Atom API 拉取最近论文（按 submittedDate 倒序），并筛选出过去 lookback_hours 小时内的条目。
 
     说明：
     - 过去 24 小时的判断以 UTC 时间为准（arXiv API 的 published/updated 通常为 UTC）。
+    - 按 page_size 自动分页，直到某页越过 lookback 阈值为止；max_results 仅作为安全上限（<=0 不限）。
     - include/exclude 关键词匹配为大小写不敏感，匹配范围：title + abstract + comments（如有）。
     - include_mode：
       - "any"：命中任一 include 关键词即可保留
       - "all"：必须命中全部 include 关键词才保留
+    - 关键词支持 `"flow"` 形式的整词/短语匹配；keyword_filter 为预编译的 KeywordFilter（给定时忽略上面三个参数）。
+    - rate_limiter：可选的共享限速器；每次请求前会先从中取令牌（多分类并发抓取时共享）。
+    - stats：可选的 FetchStats，用于统计请求页数/字节数。
+    - cache：可选的 ArxivHttpCache，复用/回放磁盘上的原始响应快照。
+    - store：可选的 PaperStore；窗口内解析到的全部条目（关键词过滤前）都会 upsert 进去。
     """
-    if now_utc is None:
-        now_utc = datetime.now(timezone.utc)
-    if now_utc.tzinfo is None:
-        now_utc = now_utc.replace(tzinfo=timezone.utc)
-
+    now_utc = normalize_now(now_utc)
     if lookback_hours <= 0:
         raise ValueError("lookback_hours 必须为正整数")
-
-    include_mode = include_mode.lower().strip()
-    if include_mode not in ("any", "all"):
-        raise ValueError("include_mode 仅支持 'any' 或 'all'")
-
+    match = keyword_filter or KeywordFilter.compile(include_keywords, exclude_keywords, include_mode)
     threshold = now_utc - timedelta(hours=lookback_hours)
 
-    params = {
-        "search_query": f"cat:{category}",
-        "start": 0,
-        "max_results": max_results,
-        "sortBy": "submittedDate",
-        "sortOrder": "descending",
-    }
-    headers = {
-        "User-Agent": "customize-arxiv-daily (https://github.com; contact: local)",
-    }
-    resp = requests.get(
-        "https://export.arxiv.org/api/query",
-        params=params,
-        headers=headers,
-        timeout=30,
-    )
-    resp.raise_for_status()
-
-    ns = {
-        "atom": "http://www.w3.org/2005/Atom",
-        "arxiv": "http://arxiv.org/schemas/atom",
-    }
-    root = ET.fromstring(resp.text)
-    entries = root.findall("atom:entry", ns)
-
-    include_keywords_norm = [k.casefold().strip() for k in (include_keywords or []) if k.strip()]
-    exclude_keywords_norm = [k.casefold().strip() for k in (exclude_keywords or []) if k.strip()]
+    papers: list[dict] = []
+    parsed: list[dict] = []
+    for paper, haystack in iter_recent_arxiv_entries(
+        f"cat:{category}",
+        threshold,
+        page_size=page_size,
+        max_results=max_results,
+        rate_limiter=rate_limiter,
+        stats=stats,
+        cache=cache,
+    ):
+        parsed.append(paper)
+        if not match(haystack):
+            continue
+        papers.append(paper)
 
-    def _match_include(text: str) -> bool:
-        if not include_keywords_norm:
-            return True
-        if include_mode == "all":
-            return all(k in text for k in include_keywords_norm)
-        return any(k in text for k in include_keywords_norm)
+    if store is not None:
+        store.upsert(parsed, category=category)
+    return papers
 
-    def _match_exclude(text: str) -> bool:
-        if not exclude_keywords_norm:
-            return False
-        return any(k in text for k in exclude_keywords_norm)
 
-    papers: list[dict] = []
-    for entry in entries:
-        published_text = entry.findtext("atom:published", default="", namespaces=ns).strip()
-        if not published_text:
-            continue
-        # 例：2026-01-05T08:12:34Z
-        published = datetime.fromisoformat(published_text.replace("Z", "+00:00"))
-        if published < threshold:
-            break
+def get_recent_arxiv_papers_combined(
+    categories: list[str],
+    max_results: int = 100,
+    lookback_hours: int = 24,
+    *,
+    now_utc: datetime | None = None,
+    include_keywords: list[str] | None = None,
+    exclude_keywords: list[str] | None = None,
+    include_mode: str = "any",
+    keyword_filter: KeywordFilter | None = None,
+    page_size: int = 100,
+    request_interval: float = ARXIV_REQUEST_INTERVAL,
+    rate_limiter: TokenBucket | None = None,
+    stats: FetchStats | None = None,
+    cache: ArxivHttpCache | None = None,
+    store: PaperStore | None = None,
+) -> dict[str, list[dict]]:
+    """
+    用一个 `cat:A OR cat:B ...` 组合查询一次性拉取多个分类，按 start 分页。
 
-        title = entry.findtext("atom:title", default="", namespaces=ns).strip()
-        title = " ".join(title.split())
-        abstract = entry.findtext("atom:summary", default="", namespaces=ns).strip()
-        abstract = " ".join(abstract.split())
-        abs_url = entry.findtext("atom:id", default="", namespaces=ns).strip()
-
-        pdf_url = ""
-        for link in entry.findall("atom:link", ns):
-            link_type = (link.get("type") or "").strip()
-            link_title = (link.get("title") or "").strip().lower()
-            if link_type == "application/pdf" or link_title == "pdf":
-                pdf_url = link.get("href") or ""
-                break
-
-        comments = entry.findtext("arxiv:comment", default="", namespaces=ns).strip()
-        arxiv_id = abs_url.rsplit("/", 1)[-1] if abs_url else ""
-
-        haystack = "\n".join([title, abstract, comments]).casefold()
-        if not _match_include(haystack):
+    跨分类论文只会被下载与解析一次；每篇论文的 matched_categories 记录它属于哪些请求的分类。
+    返回 {category: papers}（与逐分类抓取的结构一致，同一篇论文在多个分类下共享同一个 dict）。
+    - max_results：整个组合查询最多拉取的条目数（所有分类合计；<=0 不限）。
+    - 关键词参数含义同 get_recent_arxiv_papers。
+    """
+    now_utc = normalize_now(now_utc)
+    if lookback_hours <= 0:
+        raise ValueError("lookback_hours 必须为正整数")
+    match = keyword_filter or KeywordFilter.compile(include_keywords, exclude_keywords, include_mode)
+    threshold = now_utc - timedelta(hours=lookback_hours)
+    if rate_limiter is None:
+        rate_limiter = TokenBucket.from_interval(request_interval)
+
+    categories = list(dict.fromkeys(categories))
+    result: dict[str, list[dict]] = {category: [] for category in categories}
+    if not categories:
+        return result
+    requested = set(categories)
+    search_query = " OR ".join(f"cat:{category}" for category in categories)
+
+    parsed: list[dict] = []
+    for paper, haystack in iter_recent_arxiv_entries(
+        search_query,
+        threshold,
+        page_size=page_size,
+        max_results=max_results,
+        rate_limiter=rate_limiter,
+        stats=stats,
+        cache=cache,
+    ):
+        parsed.append(paper)
+        matched = [c for c in paper["categories"] if c in requested]
+        if not matched:
             continue
-        if _match_exclude(haystack):
+        if not match(haystack):
             continue
+        paper["matched_categories"] = matched
+        for category in matched:
+            result[category].append(paper)
 
-        papers.append(
-            {
-                "title": title or "No title available",
-                "arXiv_id": arxiv_id,
-                "abstract": abstract or "No abstract available",
-                "comments": comments or "No comments available",
-                "pdf_url": pdf_url or (f"https://arxiv.org/pdf/{arxiv_id}" if arxiv_id else ""),
-                "abstract_url": abs_url or (f"https://arxiv.org/abs/{arxiv_id}" if arxiv_id else ""),
-                "published_utc": published.isoformat(),
-            }
-        )
+    if store is not None:
+        store.upsert(parsed)
+    return result
 
-    return papers
+
+def fetch_recent_arxiv_papers_concurrently(
+    categories: list[str],
+    max_results: int = 100,
+    lookback_hours: int = 24,
+    *,
+    now_utc: datetime | None = None,
+    include_keywords: list[str] | None = None,
+    exclude_keywords: list[str] | None = None,
+    include_mode: str = "any",
+    keyword_filter: KeywordFilter | None = None,
+    page_size: int = 100,
+    max_workers: int = 4,
+    request_interval: float = ARXIV_REQUEST_INTERVAL,
+    rate_limiter: TokenBucket | None = None,
+    stats: FetchStats | None = None,
+    cache: ArxivHttpCache | None = None,
+    store: PaperStore | None = None,
+) -> dict[str, list[dict]]:
+    """
+    并发抓取多个分类，所有请求共享同一个令牌桶限速器。
+
+    总耗时由 arXiv 的请求间隔决定（约 request_interval * 分类数），而不是逐个分类的固定随机等待。
+    返回 {category: papers}，顺序与 categories 一致；任一分类抓取失败会直接抛出异常。
+    """
+    # 所有分类共用同一个时间基准（naive datetime 按 UTC 处理，与单分类抓取一致）
+    now_utc = normalize_now(now_utc)
+    if rate_limiter is None:
+        rate_limiter = TokenBucket.from_interval(request_interval)
+    if keyword_filter is None:
+        # 所有分类共用一份编译结果
+        keyword_filter = KeywordFilter.compile(include_keywords, exclude_keywords, include_mode)
+
+    categories = list(dict.fromkeys(categories))
+    if not categories:
+        return {}
+
+    workers = max(1, min(int(max_workers), len(categories)))
+    with ThreadPoolExecutor(workers) as executor:
+        futures = {
+            category: executor.submit(
+                get_recent_arxiv_papers,
+                category=category,
+                max_results=max_results,
+                lookback_hours=lookback_hours,
+                now_utc=now_utc,
+                include_keywords=include_keywords,
+                exclude_keywords=exclude_keywords,
+                include_mode=include_mode,
+                keyword_filter=keyword_filter,
+                page_size=page_size,
+                rate_limiter=rate_limiter,
+                stats=stats,
+                cache=cache,
+                store=store,
+            )
+            for category in categories
+        }
+        return {category: future.result() for category, future in futures.items()}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,239 @@
+"""
+紧凑的 seen 集合：把新式 arXiv id（YYMM.NNNNN[vN]，或 content 粒度的 YYMM.NNNNN#hhhhhh）打包成 64 位整数，
+按整数排序存放在 array('Q') 中，处理日期以“距 2000-01-01 的天数”存放在平行的 array('H') 中。
+
+每条记录约 10 字节（JSON 字典中一条记录通常要 150~200 字节内存、约 30 字节文件），
+查找为 C 实现的 bisect 二分查找（百万级记录约 20 次比较）。
+无法打包的旧式 id（如 hep-th/9901001）放在一个小字典里兜底。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterator, MutableMapping
+from datetime import date, timedelta
+
+
+_NEW_ID_RE = re.compile(r"^(\d{4})\.(\d{4,5})(?:v(\d{1,3})|#([0-9a-f]{6}))?$")
+# content key（带 6 位哈希）用最高位标记：1 | 31 位 id | 24 位哈希；普通 id 不超过 41 位，两者不会冲突
+_CONTENT_FLAG = 1 << 63
+_EPOCH = date(2000, 1, 1)
+_MAGIC = b"ASN1"
+_HEADER = struct.Struct("<4sII")
+
+
+def pack_arxiv_id(arxiv_id: str) -> int | None:
+    """'2601.00770v2' -> 64 位整数；旧式 id 或非法版本号返回 None。"""
+    # 快速路径：最常见的无版本号 5 位编号 id，跳过正则
+    if len(arxiv_id) == 10 and arxiv_id[4] == ".":
+        digits = arxiv_id[:4] + arxiv_id[5:]
+        if digits.isdigit() and digits.isascii():
+            return (int(digits) * 2 + 1) * 1000
+    m = _NEW_ID_RE.match(arxiv_id)
+    if not m:
+        return None
+    yymm, number, version, digest = m.groups()
+    if digest is not None:
+        return _CONTENT_FLAG | ((int(yymm) * 100000 + int(number)) * 2 + (len(number) == 5)) << 24 | int(digest, 16)
+    ver = int(version) if version is not None else 0
+    if version is not None and ver == 0:
+        return None
+    return ((int(yymm) * 100000 + int(number)) * 2 + (len(number) == 5)) * 1000 + ver
+
+
+def _format_base(rest: int) -> str:
+    rest, five_digit = divmod(rest, 2)
+    yymm, number = divmod(rest, 100000)
+    return f"{yymm:04d}.{number:05d}" if five_digit else f"{yymm:04d}.{number:04d}"
+
+
+def unpack_arxiv_id(packed: int) -> str:
+    if packed & _CONTENT_FLAG:
+        digest = packed & 0xFFFFFF
+        return f"{_format_base((packed & ~_CONTENT_FLAG) >> 24)}#{digest:06x}"
+    rest, ver = divmod(packed, 1000)
+    text = _format_base(rest)
+    return f"{text}v{ver}" if ver else text
+
+
+def _day_to_offset(day: str) -> int:
+    offset = (date.fromisoformat(day[:10]) - _EPOCH).days
+    return min(max(offset, 0), 0xFFFF)
+
+
+def _offset_to_day(offset: int) -> str:
+    return (_EPOCH + timedelta(days=offset)).isoformat()
+
+
+class CompactSeenSet(MutableMapping):
+    """
+    行为与 dict[str, str]（id -> YYYY-MM-DD）一致的紧凑映射。
+
+    写入先进入一个小的增量字典，达到阈值或需要遍历/序列化时再归并进有序数组。
+    """
+
+    flush_threshold = 4096
+
+    def __init__(self) -> None:
+        self._keys = array("Q")
+        self._days = array("H")
+        self._delta: dict[int, int] = {}
+        self._other: dict[str, int] = {}
+
+    @classmethod
+    def from_dict(cls, ids: dict[str, str]) -> "CompactSeenSet":
+        self = cls()
+        for key, day in ids.items():
+            self[key] = day
+        self._flush()
+        return self
+
+    # --- 内部 ---
+
+    def _flush(self) -> None:
+        if not self._delta:
+            return
+        new = sorted(self._delta.items())
+        self._delta = {}
+        old_keys, old_days = self._keys, self._days
+        keys, days = array("Q"), array("H")
+        i = j = 0
+        n_old, n_new = len(old_keys), len(new)
+        while i < n_old or j < n_new:
+            if j >= n_new or (i < n_old and old_keys[i] < new[j][0]):
+                keys.append(old_keys[i])
+                days.append(old_days[i])
+                i += 1
+            elif i >= n_old or new[j][0] < old_keys[i]:
+                keys.append(new[j][0])
+                days.append(new[j][1])
+                j += 1
+            else:
+                keys.append(old_keys[i])
+                days.append(max(old_days[i], new[j][1]))
+                i += 1
+                j += 1
+        self._keys, self._days = keys, days
+
+    def _find(self, packed: int) -> int:
+        idx = bisect_left(self._keys, packed)
+        if idx < len(self._keys) and self._keys[idx] == packed:
+            return idx
+        return -1
+
+    def _get_offset(self, key: str) -> int | None:
+        packed = pack_arxiv_id(key)
+        if packed is None:
+            return self._other.get(key)
+        offset = self._delta.get(packed)
+        if offset is not None:
+            return offset
+        keys = self._keys
+        idx = bisect_left(keys, packed)
+        if idx < len(keys) and keys[idx] == packed:
+            return self._days[idx]
+        return None
+
+    # --- Mapping 接口 ---
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._get_offset(key) is not None
+
+    def __getitem__(self, key: str) -> str:
+        offset = self._get_offset(key)
+        if offset is None:
+            raise KeyError(key)
+        return _offset_to_day(offset)
+
+    def __setitem__(self, key: str, day: str) -> None:
+        offset = _day_to_offset(day)
+        packed = pack_arxiv_id(key)
+        if packed is None:
+            self._other[key] = offset
+            return
+        idx = self._find(packed)
+        if idx >= 0:
+            self._days[idx] = offset
+            return
+        self._delta[packed] = offset
+        if len(self._delta) >= self.flush_threshold:
+            self._flush()
+
+    def __delitem__(self, key: str) -> None:
+        packed = pack_arxiv_id(key)
+        if packed is None:
+            del self._other[key]
+            return
+        if self._delta.pop(packed, None) is not None:
+            return
+        idx = self._find(packed)
+        if idx < 0:
+            raise KeyError(key)
+        del self._keys[idx]
+        del self._days[idx]
+
+    def __iter__(self) -> Iterator[str]:
+        self._flush()
+        for k in self._keys:
+            yield unpack_arxiv_id(k)
+        yield from list(self._other)
+
+    def __len__(self) -> int:
+        return len(self._keys) + len(self._delta) + len(self._other)
+
+    def items(self):
+        self._flush()
+        pairs = [(unpack_arxiv_id(k), _offset_to_day(d)) for k, d in zip(self._keys, self._days)]
+        pairs.extend((k, _offset_to_day(d)) for k, d in self._other.items())
+        return pairs
+
+    # --- 批量操作 ---
+
+    def prune(self, cutoff_day: str) -> None:
+        """删除处理日期早于 cutoff_day 的记录（单次线性扫描）。"""
+        self._flush()
+        cut = _day_to_offset(cutoff_day)
+        keys, days = array("Q"), array("H")
+        for k, d in zip(self._keys, self._days):
+            if d >= cut:
+                keys.append(k)
+                days.append(d)
+        self._keys, self._days = keys, days
+        self._other = {k: d for k, d in self._other.items() if d >= cut}
+
+    def nbytes(self) -> int:
+        """数组部分占用的内存字节数（不含增量与兜底字典）。"""
+        return self._keys.itemsize * len(self._keys) + self._days.itemsize * len(self._days)
+
+    def to_bytes(self) -> bytes:
+        self._flush()
+        keys, days = array("Q", self._keys), array("H", self._days)
+        if sys.byteorder != "little":
+            keys.byteswap()
+            days.byteswap()
+        other = json.dumps(self._other, separators=(",", ":"), sort_keys=True).encode("utf-8")
+        return _HEADER.pack(_MAGIC, len(keys), len(other)) + keys.tobytes() + days.tobytes() + other
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CompactSeenSet":
+        magic, n, n_other = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC:
+            raise ValueError("不是 seen 紧凑格式文件")
+        pos = _HEADER.size
+        if len(data) < pos + 10 * n + n_other:
+            raise ValueError("seen 紧凑格式文件被截断")
+        self = cls()
+        self._keys.frombytes(data[pos : pos + 8 * n])
+        pos += 8 * n
+        self._days.frombytes(data[pos : pos + 2 * n])
+        pos += 2 * n
+        if sys.byteorder != "little":
+            self._keys.byteswap()
+            self._days.byteswap()
+        self._other = {str(k): int(v) for k, v in json.loads(data[pos : pos + n_other] or b"{}").items()}
+        return self
@@ -1,57 +1,461 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import re
-from dataclasses import dataclass
+import sqlite3
+import struct
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 
+from util.seen_compact import CompactSeenSet
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl：退化为仅靠原子替换保证文件完整
+    fcntl = None
+
 
 _ARXIV_VERSION_RE = re.compile(r"v\d+$", re.IGNORECASE)
 
 
 def normalize_arxiv_id(arxiv_id: str, scope: str) -> str:
+    """
+    scope：base=去掉版本号；version=原样；content=去掉版本号，保留 `#<内容哈希>` 后缀（见 content_seen_key）。
+    """
     scope = (scope or "").strip().lower()
-    if scope not in ("base", "version"):
-        raise ValueError("seen_scope 仅支持 'base' 或 'version'")
+    if scope not in ("base", "version", "content"):
+        raise ValueError("seen_scope 仅支持 'base'、'version' 或 'content'")
     if scope == "version":
         return arxiv_id
-    return _ARXIV_VERSION_RE.sub("", arxiv_id)
+    arxiv_id, sep, digest = arxiv_id.partition("#")
+    base = _ARXIV_VERSION_RE.sub("", arxiv_id)
+    if scope == "content" and sep:
+        return f"{base}#{digest}"
+    return base
+
+
+def content_hash(title: str, abstract: str) -> str:
+    """标题+摘要的短哈希（忽略大小写与空白差异），6 位十六进制，紧凑后端可直接打包。"""
+    text = " ".join(f"{title or ''}\n{abstract or ''}".casefold().split())
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:6]
+
+
+def content_seen_key(paper: dict) -> str:
+    """content 粒度的 seen key：`<base id>#<标题+摘要哈希>`，只有内容改动的新版本才会得到新 key。"""
+    base = normalize_arxiv_id(paper.get("arXiv_id", ""), "base")
+    return f"{base}#{content_hash(paper.get('title', ''), paper.get('abstract', ''))}"
+
+
+def split_arxiv_version(arxiv_id: str) -> tuple[str, int | None]:
+    """'2601.00770v2' -> ('2601.00770', 2)；无版本号时返回 (id, None)。"""
+    m = _ARXIV_VERSION_RE.search(arxiv_id)
+    if not m:
+        return arxiv_id, None
+    return arxiv_id[: m.start()], int(m.group(0)[1:])
+
+
+def _normalize_day(value: str) -> str | None:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10]).isoformat()
+    except ValueError:
+        return None
+
+
+def read_json_ids(path: Path) -> dict[str, str]:
+    """
+    读取 JSON 格式的 seen 文件，兼容两种格式：
+    1) 旧：{"2601.00770": "2026-01-05", ...}
+    2) 新：{"scope": "...", "ids": {...}}
+    文件不存在时返回空字典；文件损坏时抛出 ValueError（而不是当作空集合，避免重复处理并在保存时覆盖掉旧记录）。
+    """
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"seen 文件 {path} 已损坏：{e}；请修复或移走后重试") from e
+    if isinstance(data, dict) and "ids" in data and isinstance(data["ids"], dict):
+        return {str(k): str(v) for k, v in data["ids"].items()}
+    if isinstance(data, dict):
+        return {str(k): str(v) for k, v in data.items()}
+    raise ValueError(f"seen 文件 {path} 格式不正确：顶层应为 JSON 对象")
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """写入同目录的临时文件并 fsync，再 os.replace：读者只会看到旧文件或完整的新文件。"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """在 `<path>.lock` 上加排他的 flock 咨询锁（跨进程）；进程退出时内核自动释放。"""
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class _JsonBackend:
+    """整文件 JSON（默认，兼容旧版本）：每次保存重写全部 id。"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def read_all(self) -> dict[str, str]:
+        return read_json_ids(self.path)
+
+    def lookup(self, keys: list[str]) -> dict[str, str]:
+        ids = self.read_all()
+        return {k: ids[k] for k in keys if k in ids}
+
+    def save(self, db: "SeenDb") -> None:
+        ids = db.reload()
+        payload = {
+            "scope": db.scope,
+            "retention_days": db.retention_days,
+            "ids": dict(sorted(ids.items(), key=lambda kv: kv[0])),
+        }
+        _atomic_write(self.path, (json.dumps(payload, ensure_ascii=False, indent=2) + "\n").encode("utf-8"))
+
+
+class _AppendLogBackend:
+    """
+    追加日志（每行 `id<TAB>YYYY-MM-DD`，后写覆盖先写；日期为空的行表示删除）：保存时只追加本次新增/删除的行。
+    当日志行数超过存活记录数的 compact_ratio 倍时整体压缩一次（同时落实 prune）。
+
+    整个日志只在第一次查询时解析一遍，之后的 lookup 复用内存中的索引（文件大小变化说明其他进程写过，才重新读取）；
+    保存时的行数由上次读取时的行数与文件大小推算，不再逐行计数。
+    """
+
+    compact_ratio = 2.0
+    compact_min_lines = 1000
+    _sample_bytes = 1 << 16
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._index: dict[str, str] | None = None
+        # _index 对应的文件大小与行数
+        self._size = 0
+        self._lines = 0
+
+    def _file_size(self) -> int:
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def read_all(self) -> dict[str, str]:
+        ids: dict[str, str] = {}
+        size = lines = 0
+        if self.path.exists():
+            with open(self.path, "rb") as f:
+                for raw in f:
+                    size += len(raw)
+                    lines += 1
+                    key, sep, day = raw.decode("utf-8").rstrip("\n").partition("\t")
+                    if not sep or not key:
+                        continue
+                    if day:
+                        ids[key] = day
+                    else:
+                        ids.pop(key, None)
+        self._index, self._size, self._lines = ids, size, lines
+        return dict(ids)
+
+    def lookup(self, keys: list[str]) -> dict[str, str]:
+        if self._index is None or self._file_size() != self._size:
+            self.read_all()
+        return {k: self._index[k] for k in keys if k in self._index}
+
+    def save(self, db: "SeenDb") -> None:
+        # 在锁内重新估算：其他进程可能刚追加或压缩过
+        lines = self._count_lines() + len(db._added) + len(db._removed)
+        if lines <= self.compact_min_lines:
+            self._append(db._added, db._removed)
+            return
+        ids = db.reload()
+        if lines > self.compact_ratio * len(ids):
+            self._rewrite(ids)
+        else:
+            self._append(db._added, db._removed)
+
+    def _count_lines(self) -> int:
+        """文件未变时用上次读取的行数；否则按开头一段的平均行长估算（只用于判断是否需要压缩）。"""
+        size = self._file_size()
+        if size == self._size and self._index is not None:
+            return self._lines
+        if size == 0:
+            return 0
+        with open(self.path, "rb") as f:
+            sample = f.read(self._sample_bytes)
+        count = sample.count(b"\n")
+        if len(sample) >= size:
+            return count
+        return round(size * max(count, 1) / len(sample))
+
+    def _append(self, added: dict[str, str], removed: set[str]) -> None:
+        if not added and not removed:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        text = "".join(f"{key}\t\n" for key in sorted(removed))
+        text += "".join(f"{key}\t{day}\n" for key, day in added.items())
+        data = text.encode("utf-8")
+        with open(self.path, "a+b") as f:
+            # 上一次写入若中途崩溃留下了半行，先补一个换行，避免与本次的第一行粘连
+            end = f.seek(0, os.SEEK_END)
+            if end > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if self._index is not None and end == self._size:
+            # 索引与追加前的文件一致：直接叠加本次写入，下次查询不必重新解析
+            for key in removed:
+                self._index.pop(key, None)
+            self._index.update(added)
+            self._size = end + len(data)
+            self._lines += data.count(b"\n")
+        else:
+            self._index = None
+
+    def _rewrite(self, ids: dict[str, str]) -> None:
+        lines = [f"{key}\t{day}\n" for key, day in sorted(ids.items(), key=lambda kv: (kv[1], kv[0]))]
+        data = "".join(lines).encode("utf-8")
+        _atomic_write(self.path, data)
+        self._index, self._size, self._lines = dict(ids), len(data), len(lines)
+
+
+class _SqliteBackend:
+    """SQLite：mark 只插入新增行，prune 为 date 索引上的范围删除。"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("CREATE TABLE IF NOT EXISTS seen (id TEXT PRIMARY KEY, date TEXT NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_date ON seen (date)")
+        return conn
+
+    def read_all(self) -> dict[str, str]:
+        if not self.path.exists():
+            return {}
+        conn = self._connect()
+        try:
+            return {k: v for k, v in conn.execute("SELECT id, date FROM seen")}
+        finally:
+            conn.close()
+
+    def lookup(self, keys: list[str]) -> dict[str, str]:
+        if not self.path.exists() or not keys:
+            return {}
+        found: dict[str, str] = {}
+        conn = self._connect()
+        try:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                marks = ",".join("?" for _ in chunk)
+                found.update(
+                    conn.execute(f"SELECT id, date FROM seen WHERE id IN ({marks})", chunk).fetchall()
+                )
+        finally:
+            conn.close()
+        return found
+
+    def save(self, db: "SeenDb") -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO seen (id, date) VALUES (?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET date = MAX(date, excluded.date)",
+                    list(db._added.items()),
+                )
+                conn.executemany("DELETE FROM seen WHERE id = ?", [(k,) for k in db._removed])
+                if db._cutoff:
+                    conn.execute("DELETE FROM seen WHERE date < ?", (db._cutoff,))
+        finally:
+            conn.close()
+
+
+class _CompactBackend:
+    """
+    紧凑二进制（见 util/seen_compact.py）：打包整数 id + 天数偏移的有序数组，适合多年保留期。
+    每次保存整体重写，但文件只有 JSON 的几分之一，读入为 array.frombytes，几乎没有解析开销。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def read_all(self) -> CompactSeenSet:
+        if not self.path.exists():
+            return CompactSeenSet()
+        try:
+            return CompactSeenSet.from_bytes(self.path.read_bytes())
+        except (ValueError, struct.error) as e:
+            raise ValueError(f"seen 文件 {self.path} 已损坏：{e}；请修复或移走后重试") from e
+
+    def lookup(self, keys: list[str]) -> dict[str, str]:
+        ids = self.read_all()
+        return {k: ids[k] for k in keys if k in ids}
+
+    def save(self, db: "SeenDb") -> None:
+        ids = db.reload()
+        if not isinstance(ids, CompactSeenSet):
+            ids = CompactSeenSet.from_dict(ids)
+        _atomic_write(self.path, ids.to_bytes())
+
+
+_BACKENDS = {
+    "json": _JsonBackend,
+    "log": _AppendLogBackend,
+    "sqlite": _SqliteBackend,
+    "compact": _CompactBackend,
+}
+_SUFFIX_BACKENDS = {
+    ".json": "json",
+    ".log": "log",
+    ".tsv": "log",
+    ".sqlite": "sqlite",
+    ".sqlite3": "sqlite",
+    ".db": "sqlite",
+    ".bin": "compact",
+}
 
 
 @dataclass
 class SeenDb:
+    """
+    已处理论文 id -> 处理日期（YYYY-MM-DD）。
+
+    scope="content" 时 key 为 `<base id>#<标题+摘要哈希>`（用 key_for(paper) 生成）：
+    新版本只有在标题/摘要确实改动时才会被视为未处理。
+
+    backend：
+    - "json"：整文件 JSON（默认/旧格式）；
+    - "log"：追加日志，保存只追加新增行，定期压缩；
+    - "sqlite"：增量插入 + 按日期索引范围删除；
+    - "compact"：打包整数 id 的紧凑二进制，内存/文件约为 JSON 的几分之一，适合多年保留期；
+    - "auto"：按文件后缀选择（.json / .log,.tsv / .sqlite,.sqlite3,.db / .bin）。
+    非 JSON 后端首次创建时，会自动导入同目录同名的 .json 文件（旧数据迁移）。
+
+    并发：save() 持有 `<path>.lock` 上的 flock，整文件写入一律“临时文件 + 原子替换”并先与磁盘上的最新内容合并，
+    多个进程可以安全地共享同一个 seen 文件；文件损坏时读取会抛出 ValueError，而不是当作空集合。
+    """
+
     path: Path
     scope: str = "base"
     retention_days: int = 30
     ids: dict[str, str] | None = None
+    backend: str = "auto"
+    _added: dict[str, str] = field(default_factory=dict, init=False, repr=False)
+    _removed: set[str] = field(default_factory=set, init=False, repr=False)
+    _cutoff: str | None = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.path = Path(self.path)
+        name = (self.backend or "auto").strip().lower()
+        if name == "auto":
+            name = _SUFFIX_BACKENDS.get(self.path.suffix.lower(), "json")
+        if name not in _BACKENDS:
+            raise ValueError("seen_db backend 仅支持 'auto'、'json'、'log'、'sqlite' 或 'compact'")
+        self.backend = name
+        self._backend = _BACKENDS[name](self.path)
+        if name != "json" and not self.path.exists():
+            legacy = self.path.with_suffix(".json")
+            if legacy.exists():
+                self.import_json(legacy)
+
+    def key_for(self, paper: dict) -> str:
+        """按当前 scope 生成论文的 seen key。"""
+        if self.scope == "content":
+            return content_seen_key(paper)
+        return normalize_arxiv_id(paper.get("arXiv_id", ""), self.scope)
+
+    def import_json(self, json_path: Path) -> int:
+        """把旧 JSON 文件中的记录合并进当前后端（保存时写入）。"""
+        imported = read_json_ids(Path(json_path))
+        for key, value in imported.items():
+            day = _normalize_day(value)
+            if day and day > self._added.get(key, ""):
+                self._added[key] = day
+        if self.ids is not None:
+            self.ids.update(self._added)
+        return len(imported)
 
     def load(self) -> dict[str, str]:
         if self.ids is not None:
             return self.ids
-        if not self.path.exists():
-            self.ids = {}
-            return self.ids
-        try:
-            data = json.loads(self.path.read_text(encoding="utf-8"))
-        except Exception:
-            self.ids = {}
-            return self.ids
+        return self.reload()
 
-        # 兼容两种格式：
-        # 1) 旧：{"2601.00770": "2026-01-05", ...}
-        # 2) 新：{"scope": "...", "ids": {...}}
-        if isinstance(data, dict) and "ids" in data and isinstance(data["ids"], dict):
-            ids = {str(k): str(v) for k, v in data["ids"].items()}
-        elif isinstance(data, dict):
-            ids = {str(k): str(v) for k, v in data.items()}
-        else:
-            ids = {}
+    def reload(self) -> dict[str, str]:
+        """重新读取后端的最新内容，叠加本进程尚未保存的新增记录并应用过期删除（保存时在锁内调用，实现 merge-on-save）。"""
+        ids = self._backend.read_all()
+        for key, day in self._added.items():
+            if day > ids.get(key, ""):
+                ids[key] = day
+        for key in self._removed:
+            ids.pop(key, None)
         self.ids = ids
-        return ids
+        if self._cutoff:
+            self._apply_cutoff()
+        return self.ids
+
+    def contains(self, keys: list[str]) -> set[str]:
+        """
+        返回 keys 中已处理（且未过期）的子集；未整体读入时由后端按需查询
+        （sqlite 按主键查询；log 第一次查询时解析整个日志并缓存索引；json/compact 每次读入整个文件）。
+        """
+        if self.ids is not None:
+            return {k for k in keys if k in self.ids}
+        wanted = set(keys)
+        found = self._backend.lookup(list(wanted))
+        found.update({k: d for k, d in self._added.items() if k in wanted})
+        return {
+            k
+            for k, d in found.items()
+            if k not in self._removed and (not self._cutoff or (_normalize_day(d) or "") >= self._cutoff)
+        }
+
+    def _apply_cutoff(self) -> None:
+        if isinstance(self.ids, CompactSeenSet):
+            self.ids.prune(self._cutoff)
+            return
+        kept: dict[str, str] = {}
+        for k, v in (self.ids or {}).items():
+            d = _normalize_day(v)
+            if d is None:
+                continue
+            if d >= self._cutoff:
+                kept[k] = d
+        self.ids = kept
 
     def prune(self, now_utc: datetime | None = None) -> None:
-        ids = self.load()
         if self.retention_days <= 0:
             return
         if now_utc is None:
@@ -60,20 +464,14 @@ class SeenDb:
             now_utc = now_utc.replace(tzinfo=timezone.utc)
 
         cutoff = (now_utc.date() - timedelta(days=self.retention_days)).isoformat()
-        kept: dict[str, str] = {}
-        for k, v in ids.items():
-            if not v:
-                continue
-            try:
-                d = date.fromisoformat(v[:10]).isoformat()
-            except Exception:
-                continue
-            if d >= cutoff:
-                kept[k] = d
-        self.ids = kept
+        if self._cutoff is None or cutoff > self._cutoff:
+            self._cutoff = cutoff
+        if self.backend == "json" or self.ids is not None:
+            self.load()
+            self._apply_cutoff()
 
     def mark_processed(self, arxiv_ids: list[str], now_utc: datetime | None = None) -> None:
-        ids = self.load()
+        """arxiv_ids 可以是原始 id，也可以是 key_for() 生成的 key（content 粒度需要后者）。"""
         if now_utc is None:
             now_utc = datetime.now(timezone.utc)
         if now_utc.tzinfo is None:
@@ -83,16 +481,27 @@ class SeenDb:
             if not raw_id:
                 continue
             key = normalize_arxiv_id(raw_id, self.scope)
-            ids[key] = stamp
-        self.ids = ids
+            self._added[key] = stamp
+            self._removed.discard(key)
+            if self.ids is not None:
+                self.ids[key] = stamp
 
-    def save(self) -> None:
-        ids = self.load()
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        payload = {
-            "scope": self.scope,
-            "retention_days": self.retention_days,
-            "ids": dict(sorted(ids.items(), key=lambda kv: kv[0])),
-        }
-        self.path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    def discard(self, keys: list[str]) -> None:
+        """删除记录（保存时生效），用于把旧粒度下的记录迁移成新 key 后去掉旧 key。"""
+        for key in keys:
+            if not key:
+                continue
+            self._added.pop(key, None)
+            self._removed.add(key)
+            if self.ids is not None:
+                self.ids.pop(key, None)
 
+    def save(self) -> None:
+        """
+        加锁后由后端合并保存：整文件后端先重新读取磁盘上的最新内容再叠加本进程的新增，
+        因此多个进程（不同 profile）共享同一个 seen 文件时不会互相覆盖。
+        """
+        with _file_lock(self.path):
+            self._backend.save(self)
+        self._added = {}
+        self._removed = set()